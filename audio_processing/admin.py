@@ -1,16 +1,18 @@
 from django.contrib import admin
-from .models import RSSFeed, Podcast, Tag
-from audio_processing.tasks.podcast_tasks import add_transcript, suggest_and_apply_tags, process_complete_workflow
+from django.urls import reverse
+from django.utils.html import format_html
+from .models import RSSFeed, Podcast, Tag, LLMCacheEntry, LLMCacheCounter, LLMBatchJob, JobCheckpoint, WorkflowRun, PodcastStage, ProviderCircuit, BackgroundJob, BackgroundJobItem
+from audio_processing import background_jobs
 from import_export.admin import ImportExportModelAdmin
 from audio_processing.tasks.rss_tasks import process_rss_feed_by_id
 
 @admin.register(RSSFeed)
 class RSSFeedAdmin(ImportExportModelAdmin):
-    list_display = ('name', 'url', 'is_active', 'last_processed', 'podcast_count')
-    list_filter = ('is_active', 'created_at', 'last_processed', 'tags')
+    list_display = ('name', 'url', 'is_active', 'auto_process', 'last_processed', 'podcast_count')
+    list_filter = ('is_active', 'auto_process', 'created_at', 'last_processed', 'tags')
     search_fields = ('name', 'url', 'description')
     readonly_fields = ('created_at', 'updated_at', 'last_processed')
-    list_editable = ('is_active',)
+    list_editable = ('is_active', 'auto_process')
     
     def podcast_count(self, obj):
         return obj.podcasts.count()
@@ -20,6 +22,9 @@ class RSSFeedAdmin(ImportExportModelAdmin):
         ('Basic Information', {
             'fields': ('name', 'url', 'description', 'is_active', 'tags')
         }),
+        ('Automatic Processing', {
+            'fields': ('auto_process', 'auto_process_backlog_limit')
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at', 'last_processed'),
             'classes': ('collapse',)
@@ -46,13 +51,25 @@ class RSSFeedAdmin(ImportExportModelAdmin):
     process_feed.short_description = "Process selected RSS feeds"
 
 
+class PodcastStageInline(admin.TabularInline):
+    model = PodcastStage
+    extra = 0
+    can_delete = False
+    fields = ('stage', 'status', 'attempts', 'started_at', 'finished_at', 'error', 'input_fingerprint')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Podcast)
 class PodcastAdmin(admin.ModelAdmin):
     list_display = ('title', 'truncated_url', 'rss_feed', 'has_transcript', 'has_script', 'has_summary', 'created_at', 'updated_at', 'release_date')
-    list_filter = ('rss_feed', 'created_at', 'updated_at', 'tags', 'release_date')
+    list_filter = ('rss_feed', 'priority', 'created_at', 'updated_at', 'tags', 'release_date')
     search_fields = ('raw_audio_url', 'transcript', 'script_transcript', 'rss_feed__name')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('created_at', 'updated_at', 'model_routing')
     raw_id_fields = ('rss_feed',)
+    inlines = [PodcastStageInline]
     
     def truncated_url(self, obj):
         if len(obj.raw_audio_url) > 50:
@@ -77,12 +94,16 @@ class PodcastAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('rss_feed', 'raw_audio_url', 'tags', 'title', 'release_date')
+            'fields': ('rss_feed', 'raw_audio_url', 'tags', 'title', 'release_date', 'priority')
         }),
         ('Content', {
-            'fields': ('transcript', 'script_transcript', 'summary'),
+            'fields': ('transcript', 'script_transcript', 'summary', 'guest_names', 'topics'),
             'classes': ('wide',)
         }),
+        ('Model Routing', {
+            'fields': ('model_routing',),
+            'classes': ('collapse',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -90,7 +111,7 @@ class PodcastAdmin(admin.ModelAdmin):
     )
 
     actions = ['clear_transcript', 'export_transcripts', 'fetch_transcript',
-               'suggest_tags', 'generate_speaker_scripts', 'run_complete_workflow', 'add_summary']
+               'suggest_tags', 'suggest_tags_batched', 'generate_speaker_scripts', 'run_complete_workflow', 'add_summary']
 
     def clear_transcript(self, request, queryset):
         queryset.update(transcript='')
@@ -103,168 +124,45 @@ class PodcastAdmin(admin.ModelAdmin):
         self.message_user(request, f"Found {count} podcasts with transcripts to export.")
     export_transcripts.short_description = "Export transcripts for selected podcasts"
     
+    def _start_job(self, request, queryset, action, description):
+        """Run an action on the selected podcasts as a background job (see background_jobs)."""
+        job = background_jobs.start(action, queryset, request.user.get_username())
+        url = reverse('admin:audio_processing_backgroundjob_change', args=[job.pk])
+        self.message_user(
+            request,
+            format_html('{} started for {} podcasts. <a href="{}">Track progress</a>.', description, job.total_count, url)
+        )
+
     def fetch_transcript(self, request, queryset):
         """Fetch transcripts for selected podcasts."""
-        for podcast in queryset:
-            add_transcript.delay(podcast.id)
-        self.message_user(request, f"Transcript processing initiated for {queryset.count()} podcasts.")
+        self._start_job(request, queryset, 'fetch_transcript', "Transcript processing")
     fetch_transcript.short_description = "Fetch transcripts for selected podcasts"
 
     def add_summary(self, request, queryset):
         """Generate summaries for selected podcasts."""
-        success_count = 0
-        error_count = 0
-        
-        for podcast in queryset:
-            try:
-                summary = podcast.generate_summary()
-                if summary:
-                    success_count += 1
-            except Exception as e:
-                error_count += 1
-                self.message_user(
-                    request, 
-                    f"Error generating summary for {podcast.raw_audio_url[:50]}...: {str(e)}", 
-                    level='ERROR'
-                )
-        
-        if success_count > 0:
-            self.message_user(
-                request, 
-                f"Successfully generated summaries for {success_count} podcasts."
-            )
-        
-        if error_count > 0:
-            self.message_user(
-                request, 
-                f"{error_count} podcasts failed to generate summaries.", 
-                level='ERROR'
-            )
+        self._start_job(request, queryset, 'add_summary', "Summary generation")
     
     def suggest_tags(self, request, queryset):
         """Use AI to suggest and apply tags to selected podcasts."""
-        success_count = 0
-        error_count = 0
-        no_transcript_count = 0
-        
-        for podcast in queryset:
-            if not podcast.transcript or not podcast.transcript.strip():
-                no_transcript_count += 1
-                continue
-            try:
-                applied_tags = suggest_and_apply_tags.delay(podcast.id)
-            except Exception as e:
-                error_count += 1
-                self.message_user(
-                    request, 
-                    f"Error suggesting tags for {podcast.raw_audio_url[:50]}...: {str(e)}", 
-                    level='ERROR'
-                )
-        
-        if success_count > 0:
-            self.message_user(
-                request, 
-                f"Successfully suggested tags for {success_count} podcasts."
-            )
-        
-        if no_transcript_count > 0:
-            self.message_user(
-                request, 
-                f"{no_transcript_count} podcasts skipped (no transcript available).", 
-                level='WARNING'
-            )
-        
-        if error_count > 0:
-            self.message_user(
-                request, 
-                f"{error_count} podcasts failed to process.", 
-                level='ERROR'
-            )
+        self._start_job(request, queryset, 'suggest_tags', "Tag suggestion")
     
     suggest_tags.short_description = "AI suggest and apply tags for selected podcasts"
     
+    def suggest_tags_batched(self, request, queryset):
+        """Use AI to suggest and apply tags, several podcasts per LLM request."""
+        self._start_job(request, queryset, 'suggest_tags_batched', "Batched tag suggestion")
+    
+    suggest_tags_batched.short_description = "AI suggest and apply tags for selected podcasts (batched)"
+    
     def generate_speaker_scripts(self, request, queryset):
         """Generate speaker-attributed scripts for selected podcasts."""
-        success_count = 0
-        error_count = 0
-        no_transcript_count = 0
-        already_has_script_count = 0
-        
-        for podcast in queryset:
-            if not podcast.transcript or not podcast.transcript.strip():
-                no_transcript_count += 1
-                continue
-            
-            if podcast.script_transcript and podcast.script_transcript.strip():
-                already_has_script_count += 1
-                continue
-                
-            try:
-                script = podcast.generate_speaker_script()
-            except Exception as e:
-                error_count += 1
-                self.message_user(
-                    request, 
-                    f"Error generating speaker script for {podcast.raw_audio_url[:50]}...: {str(e)}", 
-                    level='ERROR'
-                )
-        
-        if success_count > 0:
-            self.message_user(
-                request, 
-                f"Successfully generated speaker scripts for {success_count} podcasts."
-            )
-        
-        if no_transcript_count > 0:
-            self.message_user(
-                request, 
-                f"{no_transcript_count} podcasts skipped (no transcript available).", 
-                level='WARNING'
-            )
-        
-        if already_has_script_count > 0:
-            self.message_user(
-                request, 
-                f"{already_has_script_count} podcasts skipped (already have speaker scripts).", 
-                level='WARNING'
-            )
-        
-        if error_count > 0:
-            self.message_user(
-                request, 
-                f"{error_count} podcasts failed to generate speaker scripts.", 
-                level='ERROR'
-            )
+        self._start_job(request, queryset, 'generate_speaker_scripts', "Speaker script generation")
     
     generate_speaker_scripts.short_description = "Generate speaker scripts for selected podcasts"
     
     def run_complete_workflow(self, request, queryset):
         """Run the complete workflow (transcript, tags, summary, speaker script) for selected podcasts."""
-        total_processed = 0
-        total_errors = []
-        
-        for podcast in queryset:
-            try:
-                process_complete_workflow.delay(podcast.id)
-                total_processed += 1
-            except Exception as e:
-                total_errors.append(f"{podcast.raw_audio_url[:30]}...: {str(e)}")
-        
-        self.message_user(
-            request, 
-            f"Processed {total_processed} podcasts. "
-        )
-        
-        if total_errors:
-            for error in total_errors[:5]:  # Show first 5 errors
-                self.message_user(request, f"Error: {error}", level='ERROR')
-            
-            if len(total_errors) > 5:
-                self.message_user(
-                    request, 
-                    f"...and {len(total_errors) - 5} more errors. Check logs for details.", 
-                    level='ERROR'
-                )
+        self._start_job(request, queryset, 'run_complete_workflow', "Complete workflow")
     
     run_complete_workflow.short_description = "Run complete workflow (transcript + tags + speaker script)"
 
@@ -306,3 +204,86 @@ class TagAdmin(ImportExportModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(LLMCacheEntry)
+class LLMCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('key', 'model', 'hit_count', 'created_at', 'last_accessed_at', 'expires_at')
+    list_filter = ('model', 'created_at')
+    search_fields = ('key', 'response')
+    readonly_fields = ('key', 'model', 'response', 'hit_count', 'created_at', 'last_accessed_at', 'expires_at')
+
+
+@admin.register(LLMCacheCounter)
+class LLMCacheCounterAdmin(admin.ModelAdmin):
+    list_display = ('name', 'count', 'updated_at')
+    readonly_fields = ('name', 'count', 'updated_at')
+
+
+@admin.register(LLMBatchJob)
+class LLMBatchJobAdmin(admin.ModelAdmin):
+    list_display = ('provider_batch_id', 'stage', 'status', 'provider_status', 'request_count', 'applied_count', 'failed_count', 'created_at', 'completed_at')
+    list_filter = ('stage', 'status', 'created_at')
+    search_fields = ('provider_batch_id',)
+    readonly_fields = (
+        'stage', 'status', 'provider_batch_id', 'provider_status', 'input_file_id', 'output_file_id', 'error_file_id',
+        'request_count', 'applied_count', 'failed_count', 'errors', 'created_at', 'updated_at', 'completed_at'
+    )
+
+
+@admin.register(JobCheckpoint)
+class JobCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'kind', 'status', 'processed_count', 'total_count', 'failed_count', 'cursor', 'started_at', 'finished_at')
+    list_filter = ('kind', 'status', 'started_at')
+    search_fields = ('name',)
+    readonly_fields = (
+        'name', 'kind', 'status', 'params', 'cursor', 'total_count', 'processed_count', 'failed_count',
+        'last_error', 'started_at', 'updated_at', 'finished_at'
+    )
+
+
+@admin.register(WorkflowRun)
+class WorkflowRunAdmin(admin.ModelAdmin):
+    list_display = ('podcast', 'enrichment', 'status', 'started_at', 'transcribed_at', 'finished_at')
+    list_filter = ('status', 'enrichment', 'started_at')
+    search_fields = ('podcast__title', 'podcast__raw_audio_url')
+    readonly_fields = (
+        'podcast', 'enrichment', 'status', 'stages', 'stage_results', 'results',
+        'started_at', 'transcribed_at', 'finished_at'
+    )
+
+
+@admin.register(ProviderCircuit)
+class ProviderCircuitAdmin(admin.ModelAdmin):
+    list_display = ('provider', 'failure_count', 'opened_until', 'last_failure_at', 'updated_at')
+    readonly_fields = ('provider', 'failure_count', 'opened_until', 'last_failure_at', 'last_error', 'updated_at')
+
+
+class BackgroundJobItemInline(admin.TabularInline):
+    model = BackgroundJobItem
+    extra = 0
+    can_delete = False
+    fields = ('podcast_id', 'status', 'message', 'created_at')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'action', 'status', 'progress', 'done_count', 'failed_count', 'skipped_count', 'total_count', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('action', 'status', 'created_at')
+    search_fields = ('requested_by',)
+    readonly_fields = (
+        'action', 'status', 'requested_by', 'total_count', 'done_count', 'failed_count', 'skipped_count',
+        'podcast_ids', 'created_at', 'started_at', 'finished_at'
+    )
+    inlines = [BackgroundJobItemInline]
+
+    def progress(self, obj):
+        return f"{background_jobs.progress(obj)['percent']}%"
+    progress.short_description = 'Progress'
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,122 @@
+"""
+Admission control for external providers.
+
+Every transcription or LLM stage holds a lease tagged with the provider it
+calls (see locking), so the leases held at any moment are the provider's
+in-flight work. A stage is admitted only if it can take one of the
+provider's PROVIDER_IN_FLIGHT_LIMITS slots (see locking.claim_slot), which is
+claimed atomically so concurrent workers can't overshoot the limit:
+
+- groq: Whisper transcriptions
+- aws: AWS Transcribe jobs, including their S3 uploads
+- groq-llm: LLM stages (tags, script, summary, enrichment)
+
+A task that isn't admitted is re-sent with a randomized ADMISSION_REQUEUE_SECONDS
+delay instead of failing, and doesn't use up one of its retries. It is marked
+as enqueued, so enqueue() doesn't send a duplicate while it waits. The jitter
+spreads the re-sent tasks out, so the provider stays at its limit instead of
+alternating between a burst of rejections and an idle gap. Providers without
+a limit are always admitted.
+
+gauge() reports the in-flight and queued work per provider, the depth of
+each Celery queue and the LLM cache counters; it is served to staff at
+/admission/ for monitoring. Queue depths are cached for
+ADMISSION_QUEUE_DEPTHS_CACHE_SECONDS, so polling the gauge doesn't open a
+broker connection on every request.
+"""
+import logging
+import random
+
+from django.conf import settings
+
+from . import locking
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDER = 'groq-llm'
+QUEUE_DEPTHS_KEY = 'audio_processing:queue_depths'
+
+
+def limit(provider):
+    """In-flight limit for provider, or None if it is unlimited."""
+    return (getattr(settings, 'PROVIDER_IN_FLIGHT_LIMITS', {}) or {}).get(provider)
+
+
+def admit(provider, podcast_id, name):
+    """Whether a podcast's work for provider may start; call while holding the work's lease."""
+    provider_limit = limit(provider)
+    if provider_limit is None:
+        return True
+    if not locking.claim_slot(podcast_id, name, provider, provider_limit):
+        logger.info(f"{provider} is at its in-flight limit ({provider_limit}), deferring {name} for podcast {podcast_id}")
+        return False
+    return True
+
+
+def requeue_delay():
+    """Seconds to wait before re-sending work that wasn't admitted."""
+    base = getattr(settings, 'ADMISSION_REQUEUE_SECONDS', 30)
+    return base * random.uniform(0.5, 1.5)
+
+
+def requeue(task, podcast_id=None, name=None):
+    """
+    Re-send the currently executing task after requeue_delay(), on the same queue and with the same retries.
+    With podcast_id and name, the work's lease is marked as enqueued until the task runs again.
+    """
+    delay = requeue_delay()
+    logger.info(f"Re-queueing {task.name} {task.request.args} in {delay:.0f}s")
+    task.signature_from_request().apply_async(countdown=delay)
+    if podcast_id is not None:
+        locking.mark_enqueued(podcast_id, name)
+
+
+def queue_depths():
+    """Messages waiting in each Celery queue, or None where the broker can't tell."""
+    from django.core.cache import cache
+
+    cache_seconds = getattr(settings, 'ADMISSION_QUEUE_DEPTHS_CACHE_SECONDS', 15)
+    depths = cache.get(QUEUE_DEPTHS_KEY) if cache_seconds else None
+    if depths is None:
+        depths = _read_queue_depths()
+        if cache_seconds:
+            cache.set(QUEUE_DEPTHS_KEY, depths, cache_seconds)
+    return depths
+
+
+def _read_queue_depths():
+    from .celery import app, QUEUES
+
+    depths = {}
+    try:
+        with app.connection_for_read() as connection:
+            channel = connection.default_channel
+            for queue in QUEUES:
+                try:
+                    depths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+                except Exception as e:
+                    logger.warning(f"Failed to read depth of queue {queue}: {str(e)}")
+                    depths[queue] = None
+    except Exception as e:
+        logger.warning(f"Failed to connect to the broker for queue depths: {str(e)}")
+        depths = {queue: None for queue in QUEUES}
+    return depths
+
+
+def gauge():
+    """In-flight and queued work per provider, Celery queue depths and LLM cache counters."""
+    from .llm_cache import get_cache_stats
+
+    limits = getattr(settings, 'PROVIDER_IN_FLIGHT_LIMITS', {}) or {}
+    return {
+        'providers': {
+            provider: {
+                'in_flight': locking.running(provider),
+                'queued': locking.queued(provider),
+                'limit': provider_limit,
+            }
+            for provider, provider_limit in limits.items()
+        },
+        'queues': queue_depths(),
+        'llm_cache': get_cache_stats(),
+    }
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class AudioProcessingConfig(AppConfig):
+    name = 'audio_processing'
+
+    def ready(self):
+        from . import signals  # noqa: F401
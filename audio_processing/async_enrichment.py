@@ -0,0 +1,425 @@
+"""
+Asyncio execution path for the I/O-bound LLM enrichment stages.
+
+The tag, speaker script, summary and combined enrichment stages spend nearly all
+of their time waiting on Groq. Running them as coroutines on one event loop lets
+a single worker process keep hundreds of enrichments in flight, where the
+threaded model methods tie up a whole prefork process per podcast. Prompts,
+response parsing and the writers are shared with the model mixins; ORM access
+goes through the async ORM for reads and _db for everything else. Building
+prompts compresses transcripts and counts tokens, which is CPU work, so it runs
+on the thread pool through _offload instead of blocking the event loop.
+
+LLM responses are cached and rate-limited exactly as in the sync path
+(see llm_cache and llm_scheduler). Responses are not streamed here. A stage
+whose request the rate limiter held back too long is reported in
+throttled_stages, so the caller can send it again later; the pieces of a
+fanned-out stage that did finish are served from the cache then.
+"""
+import asyncio
+import logging
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from . import llm_cache, locking, stage_state
+from .chunking import estimate_tokens, split_into_chunks, merge_overlapping_lines
+from .model_routing import route
+from .prompt_budget import count_tokens, fits
+from .llm_scheduler import async_scheduled_post, RateLimitWaitExceeded
+from .models.groq_mixin import (
+    GROQ_CHAT_URL, SCRIPT_MAX_TOKENS, ROSTER_MAX_TOKENS, TAG_MAX_TOKENS,
+    build_chat_request, estimate_request_tokens, strip_think_blocks, parse_speaker_roster, merge_rosters
+)
+from .models.summarizable_mixin import (
+    SUMMARY_MAX_TOKENS, SEGMENT_SUMMARY_MAX_TOKENS, format_segment_summaries
+)
+from .models.enrichable_mixin import ENRICHMENT_MAX_TOKENS
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('tags', 'script', 'summary', 'enrichment')
+DEFAULT_STAGES = ('enrichment', 'script')
+
+
+def _db(func):
+    """
+    Wrap blocking ORM work for the event loop. Calls run on the loop's thread pool
+    rather than the single shared thread sync_to_async uses by default, so database
+    work for different podcasts isn't serialized. Each call closes its connections
+    when it is done, as in run_concurrently.
+    """
+    def call(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+
+    return sync_to_async(call, thread_sensitive=False)
+
+
+def _offload(func):
+    """Run CPU-bound prompt building (compression, token counting) on the thread pool, off the event loop."""
+    return sync_to_async(func, thread_sensitive=False)
+
+
+def _prompt_tokens(build_prompt, *args, **kwargs):
+    """Build a prompt and count its tokens, for routing."""
+    return count_tokens(build_prompt(*args, **kwargs))
+
+
+class AsyncGroqClient:
+    """Async Groq chat client sharing one HTTP connection pool across all coroutines."""
+
+    def __init__(self, client, max_concurrent_requests):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
+
+    async def chat(self, prompt, model, max_tokens, temperature=0.3, json_mode=False):
+        """
+        Async version of GroqMixin._call_groq_chat.
+        Returns the response content with <think> blocks removed, or None if failed.
+        """
+        api_key = getattr(settings, 'GROQ_API_KEY', '')
+
+        if not api_key:
+            logger.error("GROQ_API_KEY not configured")
+            return None
+
+        messages, params = build_chat_request(prompt, max_tokens, temperature, json_mode)
+        cache_key = llm_cache.make_cache_key(model, params, messages)
+        cached = await _db(llm_cache.get_cached_response)(cache_key)
+        if cached is not None:
+            return cached
+
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+        data = {
+            "model": model,
+            "messages": messages,
+            **params
+        }
+
+        try:
+            async with self.semaphore:
+                response = await async_scheduled_post(
+                    self.client, GROQ_CHAT_URL, api_key, model, estimate_request_tokens(messages, max_tokens, model),
+                    headers=headers, json=data
+                )
+            response.raise_for_status()
+
+            result = response.json()
+            content = strip_think_blocks(result['choices'][0]['message']['content'].strip())
+
+            await _db(llm_cache.store_response)(cache_key, model, content)
+            return content
+
+        except httpx.HTTPError as e:
+            logger.error(f"Async Groq chat request failed ({model}): {str(e)}")
+            return None
+        except (KeyError, IndexError, ValueError) as e:
+            logger.error(f"Unexpected async Groq chat response ({model}): {str(e)}")
+            return None
+
+
+def _merge_tag_ids(classifier_tag_ids, llm_tag_ids):
+    return classifier_tag_ids + [tag_id for tag_id in llm_tag_ids if tag_id not in classifier_tag_ids]
+
+
+async def suggest_and_apply_tags(podcast, groq):
+    """Async version of TaggableMixin.classify_and_apply_tags."""
+    tag_list = await _db(podcast._get_available_tags)()
+    if tag_list is None:
+        return None
+
+    classifier_tag_ids, tag_list = await _db(podcast._prefilter_tags)(tag_list)
+    if classifier_tag_ids and not tag_list:
+        return classifier_tag_ids
+
+    prompt = await _db(podcast._get_tag_suggestion_prompt)(tag_list)
+    model = await _db(route)(podcast, 'tags', await _offload(count_tokens)(prompt), TAG_MAX_TOKENS)
+    response = await groq.chat(prompt, model, TAG_MAX_TOKENS)
+    if response is None:
+        logger.error(f"Failed to get tag suggestions for: {podcast.raw_audio_url}")
+        return classifier_tag_ids or None
+
+    llm_tag_ids = await _db(podcast._parse_and_apply_tags)(response)
+    if llm_tag_ids is None:
+        return classifier_tag_ids or None
+    return _merge_tag_ids(classifier_tag_ids, llm_tag_ids)
+
+
+async def _summarize_segments(podcast, text, groq):
+    """Summarize token-budgeted segments of text concurrently. Returns None if any failed."""
+    from .prompts import get_segment_summary_prompt
+
+    def measure():
+        segments = split_into_chunks(text, getattr(settings, 'SUMMARY_CHUNK_TOKENS', 5000))
+        prompt_tokens = max(
+            _prompt_tokens(get_segment_summary_prompt, segment, number, len(segments))
+            for number, segment in enumerate(segments, start=1)
+        )
+        return segments, prompt_tokens
+
+    def build_prompts(segments, model):
+        return [
+            get_segment_summary_prompt(segment, number, len(segments), model=model, max_tokens=SEGMENT_SUMMARY_MAX_TOKENS)
+            for number, segment in enumerate(segments, start=1)
+        ]
+
+    segments, prompt_tokens = await _offload(measure)()
+    model = await _db(route)(podcast, 'segment_summary', prompt_tokens, SEGMENT_SUMMARY_MAX_TOKENS)
+    prompts = await _offload(build_prompts)(segments, model)
+    segment_summaries = await asyncio.gather(*[
+        groq.chat(prompt, model, SEGMENT_SUMMARY_MAX_TOKENS) for prompt in prompts
+    ])
+    if not all(segment_summaries):
+        return None
+    return list(segment_summaries)
+
+
+async def _reduce_to_prompt_size(podcast, groq, stage, max_tokens, build_prompt):
+    """
+    Async version of SummarizableMixin._reduce_to_prompt_size: build and route the stage's
+    prompt, replacing the transcript with segment summaries until the prompt fits the model
+    it is routed to. Returns (prompt, model), or (None, None) if a segment failed.
+    """
+    def measure(text, from_segment_summaries):
+        prompt = build_prompt(text, from_segment_summaries)
+        return prompt, count_tokens(prompt)
+
+    text = podcast.transcript
+    prompt, prompt_tokens = await _offload(measure)(text, False)
+    model = await _db(route)(podcast, stage, prompt_tokens, max_tokens)
+    while not await _offload(fits)(prompt, model, max_tokens):
+        segment_summaries = await _summarize_segments(podcast, text, groq)
+        if segment_summaries is None:
+            return None, None
+        text = format_segment_summaries(segment_summaries)
+        prompt, prompt_tokens = await _offload(measure)(text, True)
+        model = await _db(route)(podcast, stage, prompt_tokens, max_tokens)
+    return prompt, model
+
+
+async def generate_summary(podcast, groq):
+    """Async version of SummarizableMixin.generate_summary (single or hierarchical)."""
+    from .prompts import get_episode_summary_prompt
+
+    prompt, model = await _reduce_to_prompt_size(podcast, groq, 'summary', SUMMARY_MAX_TOKENS, get_episode_summary_prompt)
+    if prompt is None:
+        return None
+    summary_content = await groq.chat(prompt, model, SUMMARY_MAX_TOKENS)
+    return await _db(podcast._apply_summary)(summary_content)
+
+
+async def generate_speaker_script(podcast, groq):
+    """Async version of GroqMixin.generate_speaker_script (single or windowed)."""
+    from .prompts import get_speaker_transcript_prompt, get_speaker_roster_prompt
+
+    if estimate_tokens(podcast.transcript) <= getattr(settings, 'SCRIPT_WINDOW_TOKENS', 3000):
+        prompt_tokens = await _offload(_prompt_tokens)(get_speaker_transcript_prompt, podcast.transcript)
+        model = await _db(route)(podcast, 'script', prompt_tokens, SCRIPT_MAX_TOKENS)
+        prompt = await _offload(get_speaker_transcript_prompt)(podcast.transcript, model=model, max_tokens=SCRIPT_MAX_TOKENS)
+        script_content = await groq.chat(prompt, model, SCRIPT_MAX_TOKENS)
+        return await _db(podcast._apply_speaker_script)(script_content)
+
+    def measure_rosters():
+        windows = podcast._get_script_windows()
+        return windows, max(_prompt_tokens(get_speaker_roster_prompt, window) for window in windows)
+
+    def build_roster_prompts(windows, model):
+        return [get_speaker_roster_prompt(window, model=model, max_tokens=ROSTER_MAX_TOKENS) for window in windows]
+
+    def measure_scripts(windows, roster):
+        return max(
+            _prompt_tokens(
+                get_speaker_transcript_prompt, window,
+                speaker_roster=roster, window_number=number, total_windows=len(windows)
+            )
+            for number, window in enumerate(windows, start=1)
+        )
+
+    def build_script_prompts(windows, roster, model):
+        return [
+            get_speaker_transcript_prompt(
+                window, speaker_roster=roster, window_number=number, total_windows=len(windows),
+                model=model, max_tokens=SCRIPT_MAX_TOKENS
+            )
+            for number, window in enumerate(windows, start=1)
+        ]
+
+    windows, roster_tokens = await _offload(measure_rosters)()
+    roster_model = await _db(route)(podcast, 'roster', roster_tokens, ROSTER_MAX_TOKENS)
+    roster_prompts = await _offload(build_roster_prompts)(windows, roster_model)
+    rosters = await asyncio.gather(*[groq.chat(prompt, roster_model, ROSTER_MAX_TOKENS) for prompt in roster_prompts])
+    roster = merge_rosters(parse_speaker_roster(response) for response in rosters)
+
+    prompt_tokens = await _offload(measure_scripts)(windows, roster)
+    model = await _db(route)(podcast, 'script', prompt_tokens, SCRIPT_MAX_TOKENS)
+    script_prompts = await _offload(build_script_prompts)(windows, roster, model)
+    window_scripts = await asyncio.gather(*[groq.chat(prompt, model, SCRIPT_MAX_TOKENS) for prompt in script_prompts])
+    if not all(window_scripts):
+        logger.error(f"Script windows failed for: {podcast.raw_audio_url}")
+        return None
+
+    script = await _offload(merge_overlapping_lines)(window_scripts)
+    return await _db(podcast._apply_speaker_script)(script)
+
+
+async def enrich_with_llm(podcast, groq):
+    """Async version of EnrichableMixin.enrich_with_llm."""
+    from .prompts import get_episode_enrichment_prompt
+
+    tag_list = await _db(podcast._get_available_tags)()
+    if tag_list is None:
+        return None
+
+    classifier_tag_ids, tag_list = await _db(podcast._prefilter_tags)(tag_list)
+    tag_list = await _db(podcast._shortlist_tags)(tag_list, podcast.transcript)
+
+    prompt, model = await _reduce_to_prompt_size(
+        podcast, groq, 'enrichment', ENRICHMENT_MAX_TOKENS,
+        lambda text, from_segment_summaries: get_episode_enrichment_prompt(tag_list, text, from_segment_summaries)
+    )
+    if prompt is None:
+        return None
+    response = await groq.chat(prompt, model, ENRICHMENT_MAX_TOKENS, json_mode=True)
+    if response is None:
+        return None
+
+    enrichment = await _db(podcast._apply_enrichment)(response, tag_list)
+    if enrichment is not None:
+        enrichment['tag_ids'] = _merge_tag_ids(classifier_tag_ids, enrichment['tag_ids'])
+    return enrichment
+
+
+def _claim_stages(podcast, stages, results):
+    """
+    Take the lease on each stage (see locking) and start the ones that are not up
+    to date (see stage_state). Skipped and already-running stages are recorded in
+    results. Returns the leases of the started stages by stage.
+    """
+    leases = {}
+    for stage in stages:
+        token = locking.acquire(podcast.pk, stage)
+        if token is None:
+            results['errors'].append(f"{stage} stage is already running")
+            continue
+
+        fingerprint = stage_state.fingerprint(podcast, stage)
+        if stage_state.is_current(podcast, stage, fingerprint):
+            locking.release(podcast.pk, stage, token)
+            results['skipped_stages'].append(stage)
+            continue
+
+        stage_state.begin(podcast, stage, fingerprint)
+        leases[stage] = token
+    return leases
+
+
+async def enrich_podcast(podcast_id, groq, stages=DEFAULT_STAGES):
+    """
+    Run the requested enrichment stages for one podcast concurrently.
+    Returns a results dict in the same shape as Podcast.process_complete_workflow.
+    """
+    from .models import Podcast
+
+    results = {
+        'podcast_id': podcast_id,
+        'tags_applied': 0,
+        'script_generated': False,
+        'summary_generated': False,
+        'skipped_stages': [],
+        'throttled_stages': [],
+        'errors': []
+    }
+
+    try:
+        podcast = await Podcast.objects.aget(pk=podcast_id)
+    except Podcast.DoesNotExist:
+        results['errors'].append(f"Podcast {podcast_id} does not exist")
+        return results
+
+    if not podcast.transcript or not podcast.transcript.strip():
+        results['errors'].append("No transcript available")
+        return results
+
+    # Stages running elsewhere or already run on the current transcript are skipped
+    leases = await _db(_claim_stages)(podcast, stages, results)
+    stages = list(leases)
+
+    stage_functions = {
+        'tags': suggest_and_apply_tags,
+        'script': generate_speaker_script,
+        'summary': generate_summary,
+        'enrichment': enrich_with_llm,
+    }
+    try:
+        outcomes = await asyncio.gather(
+            *[stage_functions[stage](podcast, groq) for stage in stages],
+            return_exceptions=True
+        )
+        for stage, outcome in zip(stages, outcomes):
+            errors = len(results['errors'])
+            if isinstance(outcome, RateLimitWaitExceeded):
+                results['errors'].append(f"{stage} throttled: {str(outcome)}")
+                results['throttled_stages'].append(stage)
+            elif isinstance(outcome, Exception):
+                logger.error(f"Async {stage} stage failed for podcast {podcast_id}: {str(outcome)}")
+                results['errors'].append(f"{stage} error: {str(outcome)}")
+            elif outcome is None or (stage != 'tags' and not outcome):
+                # An empty tag list means no tag applies, which is a successful run
+                results['errors'].append(f"Failed to run {stage} stage")
+            elif stage == 'tags':
+                results['tags_applied'] = len(outcome)
+            elif stage == 'enrichment':
+                results['tags_applied'] = len(outcome['tag_ids'])
+                results['summary_generated'] = True
+            elif stage == 'script':
+                results['script_generated'] = True
+            elif stage == 'summary':
+                results['summary_generated'] = True
+            await _db(stage_state.finish)(podcast, stage, results['errors'][errors:])
+    finally:
+        for stage, token in leases.items():
+            await _db(locking.release)(podcast.pk, stage, token)
+
+    return results
+
+
+async def run_enrichments(podcast_ids, stages=DEFAULT_STAGES, concurrency=None):
+    """
+    Enrich many podcasts on one event loop, with at most `concurrency` podcasts and
+    ASYNC_MAX_CONCURRENT_REQUESTS Groq requests in flight at once.
+    Returns the list of per-podcast results.
+    """
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown enrichment stages: {', '.join(sorted(unknown))}")
+
+    if concurrency is None:
+        concurrency = getattr(settings, 'ASYNC_ENRICHMENT_CONCURRENCY', 200)
+    max_requests = getattr(settings, 'ASYNC_MAX_CONCURRENT_REQUESTS', 100)
+    podcast_slots = asyncio.Semaphore(concurrency)
+
+    limits = httpx.Limits(max_connections=max_requests, max_keepalive_connections=max_requests)
+    timeout = httpx.Timeout(getattr(settings, 'ASYNC_REQUEST_TIMEOUT_SECONDS', 300), connect=10)
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        groq = AsyncGroqClient(client, max_requests)
+
+        async def bounded(podcast_id):
+            async with podcast_slots:
+                return await enrich_podcast(podcast_id, groq, stages)
+
+        return await asyncio.gather(*[bounded(podcast_id) for podcast_id in podcast_ids])
+
+
+def enrich_podcasts(podcast_ids, stages=DEFAULT_STAGES, concurrency=None):
+    """Synchronous entry point: run run_enrichments on a new event loop."""
+    return asyncio.run(run_enrichments(list(podcast_ids), tuple(stages), concurrency))
@@ -0,0 +1,90 @@
+"""
+Automatic processing of newly ingested episodes.
+
+When RSSFeed.process_feed creates podcasts for a feed with auto_process on,
+their complete workflow is enqueued in one batch once the transaction that
+created them commits, so a worker never picks up a podcast it can't see yet.
+With process_all_active_rss_feeds running every few minutes from celery beat,
+a new episode is transcribed and enriched minutes after it is published, with
+no one clicking "Run complete workflow" in the admin.
+
+Fresh episodes are always processed. Back-catalog episodes (released more than
+ROUTING_BACKLOG_DAYS ago, see model_routing) are processed newest first, and at
+most the feed's auto_process_backlog_limit of them over the feed's lifetime,
+so adding a feed with years of episodes doesn't spend the provider quota on
+all of them; the rest can still be run from the admin. Back-catalog episodes
+run on the backfill queue (see celery.podcast_options).
+
+AUTO_PROCESS_ENABLED=False turns automatic processing off for every feed.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import locking
+
+logger = logging.getLogger(__name__)
+
+
+def is_backlog(podcast):
+    """Whether a podcast is a back-catalog episode."""
+    from .model_routing import get_priority, BACKLOG
+
+    return get_priority(podcast) == BACKLOG
+
+
+def backlog_processed(feed):
+    """Back-catalog episodes of feed that were already processed automatically."""
+    backlog_age = timedelta(days=getattr(settings, 'ROUTING_BACKLOG_DAYS', 30))
+    return feed.podcasts.filter(auto_enqueued_at__isnull=False).filter(
+        Q(priority='backlog') | Q(priority='', release_date__lt=F('auto_enqueued_at') - backlog_age)
+    ).count()
+
+
+def select(feed, podcasts):
+    """The podcasts to process automatically: every fresh one, and the newest back-catalog ones up to the feed's limit."""
+    fresh = [podcast for podcast in podcasts if not is_backlog(podcast)]
+    backlog = sorted(
+        (podcast for podcast in podcasts if is_backlog(podcast)),
+        key=lambda podcast: podcast.release_date or podcast.created_at,
+        reverse=True,
+    )
+    remaining = max(0, feed.auto_process_backlog_limit - backlog_processed(feed))
+    return fresh + backlog[:remaining]
+
+
+def enqueue_new(feed_id, podcast_ids):
+    """Enqueue the complete workflow for newly created podcasts of a feed. Returns a summary."""
+    from .models import Podcast, RSSFeed
+    from .tasks.podcast_tasks import process_complete_workflow
+
+    feed = RSSFeed.objects.filter(pk=feed_id).first()
+    if feed is None or not feed.auto_process:
+        return {'enqueued': 0, 'skipped': len(podcast_ids)}
+
+    podcasts = list(Podcast.objects.filter(pk__in=podcast_ids, rss_feed=feed, auto_enqueued_at__isnull=True))
+    enqueued = []
+    for podcast in select(feed, podcasts):
+        try:
+            locking.enqueue(process_complete_workflow, podcast, 'workflow')
+        except Exception as e:
+            logger.error(f"Failed to enqueue workflow for {podcast.raw_audio_url}: {str(e)}")
+            continue
+        enqueued.append(podcast.pk)
+
+    Podcast.objects.filter(pk__in=enqueued).update(auto_enqueued_at=timezone.now())
+    summary = {'enqueued': len(enqueued), 'skipped': len(podcasts) - len(enqueued)}
+    logger.info(f"Auto-processing new episodes of {feed.name}: {summary}")
+    return summary
+
+
+def on_podcasts_created(feed, podcasts):
+    """Enqueue the workflow for podcasts just created from feed, once the current transaction commits."""
+    if not podcasts or not feed.auto_process or not getattr(settings, 'AUTO_PROCESS_ENABLED', True):
+        return
+    podcast_ids = [podcast.pk for podcast in podcasts]
+    transaction.on_commit(lambda: enqueue_new(feed.pk, podcast_ids))
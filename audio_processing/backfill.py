@@ -0,0 +1,272 @@
+"""
+Checkpointed, rate-limited reprocessing of one stage across the corpus.
+
+A backfill job selects podcasts by the state of a stage (see stage_state) and
+optional filters, and walks them in primary-key order: each chunk is the next
+BACKFILL_CHUNK_SIZE podcasts after the job's cursor, read with a server-side
+cursor, so the cost of a chunk doesn't grow with how far the job has got and
+memory stays flat on any corpus size. The job only covers podcasts that
+existed when it started, so its total is fixed and its progress predictable.
+
+Each podcast is either enqueued as the stage's task (deduplicated, on its
+usual queue, see locking) or run inline in the current process, at no more
+than the target rate in podcasts per second. Inline runs wait while the
+provider is at its in-flight limit (see admission). The JobCheckpoint row is
+updated after every chunk, so an interrupted job resumes after the last
+completed chunk; redoing part of a chunk is harmless, since stages that are
+up to date are skipped. Callers run a job under its lease (see
+locking.job_lease), so a resumed job can't be run by two processes at once.
+
+To reprocess completed stages after a prompt change, bump the stage in
+stage_state.STAGE_VERSIONS first; otherwise they are still up to date.
+
+estimate() predicts a job's duration without running it: the target rate
+caps the throughput, and so does the provider, which can finish about
+PROVIDER_IN_FLIGHT_LIMITS / mean stage duration podcasts per second (the mean
+is taken over recently completed runs of the stage).
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import admission, locking, workflow
+
+logger = logging.getLogger(__name__)
+
+KIND = 'backfill'
+
+ENQUEUE = 'enqueue'
+RUN = 'run'
+MODES = [ENQUEUE, RUN]
+
+# pending: never completed; failed: last run failed; completed: last run completed; all: every podcast
+STATES = ['pending', 'failed', 'completed', 'all']
+
+# Task in tasks.podcast_tasks that runs each stage on its own
+STAGE_TASKS = {
+    'transcript': 'add_transcript',
+    'tags': 'suggest_and_apply_tags',
+    'script': 'generate_speaker_script',
+    'summary': 'generate_summary',
+}
+
+DURATION_SAMPLE_SIZE = 500
+
+
+def candidate_podcasts(params):
+    """Podcasts a backfill with the given params covers, ordered by ID."""
+    from .models import Podcast, PodcastStage
+
+    stage = params['stage']
+    queryset = Podcast.objects.all()
+    if stage != workflow.TRANSCRIPT:
+        queryset = queryset.exclude(Q(transcript__isnull=True) | Q(transcript=''))
+
+    state = params.get('state', 'pending')
+    completed = PodcastStage.objects.filter(stage=stage, status='completed').values('podcast_id')
+    if state == 'pending':
+        queryset = queryset.exclude(pk__in=completed)
+    elif state == 'completed':
+        queryset = queryset.filter(pk__in=completed)
+    elif state == 'failed':
+        queryset = queryset.filter(pk__in=PodcastStage.objects.filter(stage=stage, status='failed').values('podcast_id'))
+
+    if params.get('feed_ids'):
+        queryset = queryset.filter(rss_feed_id__in=params['feed_ids'])
+    if params.get('priority'):
+        queryset = queryset.filter(priority=params['priority'])
+    if params.get('released_after'):
+        queryset = queryset.filter(release_date__gte=parse_datetime(params['released_after']))
+    if params.get('released_before'):
+        queryset = queryset.filter(release_date__lt=parse_datetime(params['released_before']))
+    if params.get('max_id') is not None:
+        queryset = queryset.filter(pk__lte=params['max_id'])
+    return queryset.order_by('pk')
+
+
+def provider(params):
+    """The provider whose in-flight limit bounds a backfill's throughput."""
+    if params['stage'] == workflow.TRANSCRIPT:
+        return params.get('method') or 'groq'
+    return admission.LLM_PROVIDER
+
+
+def mean_stage_seconds(stage):
+    """Mean duration of recently completed runs of a stage, or None without history."""
+    from .models import PodcastStage
+
+    runs = PodcastStage.objects.filter(
+        stage=stage, status='completed', started_at__isnull=False, finished_at__gt=F('started_at')
+    ).order_by('-finished_at').values_list('started_at', 'finished_at')[:DURATION_SAMPLE_SIZE]
+    durations = [(finished_at - started_at).total_seconds() for started_at, finished_at in runs]
+    if not durations:
+        return None
+    return sum(durations) / len(durations)
+
+
+def estimate(params, total, rate=None):
+    """Predicted throughput and duration of a backfill over total podcasts, without running it."""
+    rate = rate or getattr(settings, 'BACKFILL_RATE_PER_SECOND', 1.0)
+    stage_seconds = mean_stage_seconds(params['stage'])
+
+    if stage_seconds is None:
+        provider_rate = None
+    elif params.get('mode', ENQUEUE) == RUN:
+        # One podcast at a time in this process
+        provider_rate = 1 / stage_seconds
+    else:
+        provider_limit = admission.limit(provider(params))
+        provider_rate = provider_limit / stage_seconds if provider_limit else None
+
+    throughput = min(rate, provider_rate) if provider_rate else rate
+    return {
+        'total': total,
+        'chunks': -(-total // getattr(settings, 'BACKFILL_CHUNK_SIZE', 500)),
+        'target_rate': rate,
+        'mean_stage_seconds': stage_seconds,
+        'provider_rate': provider_rate,
+        'throughput': throughput,
+        'estimated_seconds': total / throughput if throughput else None,
+    }
+
+
+def build_params(stage, mode=ENQUEUE, state='pending', method=None, feed_ids=None, priority=None,
+                 released_after=None, released_before=None, refresh_cache=False):
+    """The selection and mode of a backfill, as stored on its JobCheckpoint."""
+    if mode == ENQUEUE and stage not in STAGE_TASKS:
+        raise ValueError(f"The {stage} stage has no standalone task; run it with mode '{RUN}'")
+
+    return {
+        'stage': stage,
+        'mode': mode,
+        'state': state,
+        'method': method,
+        'feed_ids': feed_ids or [],
+        'priority': priority or '',
+        'released_after': released_after.isoformat() if released_after else None,
+        'released_before': released_before.isoformat() if released_before else None,
+        'refresh_cache': refresh_cache,
+    }
+
+
+def start_job(**kwargs):
+    """
+    Create a backfill job over the podcasts that currently match; takes the
+    arguments of build_params(). Returns the JobCheckpoint.
+    """
+    from .models import JobCheckpoint, Podcast
+
+    now = timezone.now()
+    params = build_params(**kwargs)
+    params.update({
+        'max_id': Podcast.objects.order_by('-pk').values_list('pk', flat=True).first() or 0,
+        'sent': 0,
+        'duplicates': 0,
+        'skipped': 0,
+    })
+    job = JobCheckpoint.objects.create(
+        name=f"{KIND}-{params['stage']}-{now:%Y%m%dT%H%M%S%f}",
+        kind=KIND,
+        params=params,
+        total_count=candidate_podcasts(params).count(),
+    )
+    logger.info(f"Started backfill job {job.name}: {job.total_count} podcasts, stage {params['stage']}, mode {params['mode']}")
+    return job
+
+
+def _enqueue(job, podcast, task):
+    params = job.params
+    kwargs = {'method': params['method']} if params['stage'] == workflow.TRANSCRIPT and params.get('method') else {}
+    if params.get('refresh_cache') and params['stage'] != workflow.TRANSCRIPT:
+        kwargs['refresh'] = True
+    if locking.enqueue(task, podcast, params['stage'], **kwargs):
+        params['sent'] += 1
+    else:
+        params['duplicates'] += 1
+
+
+def _run(job, podcast):
+    params = job.params
+    refresh = params.get('refresh_cache', False)
+    result = workflow.run_stage(podcast, params['stage'], provider=params.get('method'), refresh=refresh)
+    while result.get('throttled'):
+        time.sleep(admission.requeue_delay())
+        result = workflow.run_stage(podcast, params['stage'], provider=params.get('method'), refresh=refresh)
+
+    if result['errors']:
+        job.last_error = f"Podcast {podcast.pk}: {'; '.join(result['errors'])}"
+        return False
+    if result.get('skipped'):
+        params['skipped'] += 1
+    else:
+        params['sent'] += 1
+    return True
+
+
+def run_job(job, chunk_size=None, rate=None):
+    """
+    Process a backfill job from its checkpoint to the end. Returns the job.
+    If the job was claimed and its lease is lost, stops without touching the job row.
+    """
+    from .tasks import podcast_tasks
+
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'BACKFILL_CHUNK_SIZE', 500)
+    rate = rate or getattr(settings, 'BACKFILL_RATE_PER_SECOND', 1.0)
+
+    params = job.params
+    task = getattr(podcast_tasks, STAGE_TASKS[params['stage']]) if params['mode'] == ENQUEUE else None
+    queryset = candidate_podcasts(params)
+    if params['mode'] == ENQUEUE:
+        # Enough to route and deduplicate the task
+        queryset = queryset.only('id', 'raw_audio_url', 'priority', 'release_date')
+
+    started = time.monotonic()
+    handled = 0
+    try:
+        while True:
+            chunk_count = 0
+            for podcast in queryset.filter(pk__gt=job.cursor)[:chunk_size].iterator(chunk_size=min(chunk_size, 100)):
+                if job.owner and not locking.renew_job(job):
+                    job.last_error = "Lost the job lease to another worker"
+                    return job
+                # Stay at or below the target rate
+                delay = started + handled / rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+                try:
+                    if task is not None:
+                        _enqueue(job, podcast, task)
+                    elif not _run(job, podcast):
+                        job.failed_count += 1
+                except Exception as e:
+                    logger.error(f"Backfill job {job.name} failed on podcast {podcast.pk}: {str(e)}")
+                    job.last_error = f"Podcast {podcast.pk}: {str(e)}"
+                    job.failed_count += 1
+                job.processed_count += 1
+                job.cursor = podcast.pk
+                handled += 1
+                chunk_count += 1
+
+            if not chunk_count:
+                break
+            job.save()
+            logger.info(f"Backfill job {job.name}: {job.processed_count}/{job.total_count} podcasts processed")
+
+    except Exception as e:
+        job.status = 'failed'
+        job.last_error = str(e)
+        job.save()
+        logger.error(f"Backfill job {job.name} failed after podcast {job.cursor}: {str(e)}")
+        return job
+
+    job.status = 'completed'
+    job.finished_at = timezone.now()
+    job.save()
+    logger.info(f"Backfill job {job.name} completed: {job.processed_count} podcasts, {job.failed_count} failed")
+    return job
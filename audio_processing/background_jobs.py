@@ -0,0 +1,207 @@
+"""
+Admin bulk actions as background jobs.
+
+An admin action only records the selected podcast IDs in a BackgroundJob and
+sends run_background_job, so the admin request returns at once whatever the
+selection size. The job task sends one task per podcast, on the podcast's
+queue and deduplicated like any other enqueue (see locking), and each of those
+reports its outcome back to the job: done, failed (with the error) or skipped
+(with the reason). Progress is shown in the Background Jobs admin and served
+as JSON at /jobs/<id>/.
+
+Outcomes are recorded once per podcast as BackgroundJobItem rows, so a
+redelivered task doesn't count twice, and the job's counters are incremented
+in place rather than rewriting the job row under a lock. The job completes
+when every selected podcast has an outcome. A task that is lost or dies
+without reporting would leave its job running forever, so sweep_stale() fails
+the missing podcasts of jobs that made no progress for
+BACKGROUND_JOB_TIMEOUT_SECONDS.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import locking
+
+logger = logging.getLogger(__name__)
+
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+# Per-podcast admin actions: the lease/stage name, the task in tasks.podcast_tasks, whether it
+# needs a transcript, and whether it regenerates without reusing cached LLM responses
+ACTIONS = {
+    'fetch_transcript': {'stage': 'transcript', 'task': 'add_transcript', 'needs_transcript': False},
+    'suggest_tags': {'stage': 'tags', 'task': 'suggest_and_apply_tags', 'needs_transcript': True, 'refresh': True},
+    'generate_speaker_scripts': {'stage': 'script', 'task': 'generate_speaker_script', 'needs_transcript': True, 'refresh': True},
+    'add_summary': {'stage': 'summary', 'task': 'generate_summary', 'needs_transcript': True, 'refresh': True},
+    'run_complete_workflow': {'stage': 'workflow', 'task': 'process_complete_workflow', 'needs_transcript': False},
+    # All selected podcasts go to a single suggest_and_apply_tags_batch task
+    'suggest_tags_batched': {'stage': 'tags', 'task': 'suggest_and_apply_tags_batch', 'needs_transcript': True},
+}
+
+
+def start(action, queryset, requested_by=''):
+    """Create a job running action on the podcasts in queryset and send it once committed. Returns the job."""
+    from .models import BackgroundJob
+    from .tasks.podcast_tasks import run_background_job
+
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown background job action: {action}")
+
+    podcast_ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    job = BackgroundJob.objects.create(
+        action=action,
+        requested_by=requested_by,
+        podcast_ids=podcast_ids,
+        total_count=len(podcast_ids),
+    )
+    transaction.on_commit(lambda: run_background_job.delay(job.pk))
+    return job
+
+
+def record_items(job_id, outcomes):
+    """
+    Record outcomes for a job's podcasts, given as {podcast_id: (status, message)}.
+    Podcasts that already have an outcome are left alone.
+    """
+    from .models import BackgroundJob, BackgroundJobItem
+
+    counts = {DONE: 'done_count', FAILED: 'failed_count', SKIPPED: 'skipped_count'}
+    added = {}
+    for podcast_id, (status, message) in outcomes.items():
+        _, created = BackgroundJobItem.objects.get_or_create(
+            job_id=job_id, podcast_id=podcast_id, defaults={'status': status, 'message': message or ''}
+        )
+        if created:
+            added[counts[status]] = added.get(counts[status], 0) + 1
+
+    jobs = BackgroundJob.objects.filter(pk=job_id)
+    if added:
+        jobs.update(**{field: F(field) + count for field, count in added.items()})
+    jobs.filter(
+        status='running', done_count__gte=F('total_count') - F('failed_count') - F('skipped_count')
+    ).update(status='completed', finished_at=timezone.now())
+
+
+def report(job_id, podcast_id, result):
+    """Record a podcast's stage or workflow result on its job, if it was started by one."""
+    if not job_id:
+        return
+    if result.get('skipped'):
+        outcome = (SKIPPED, result.get('reason', 'Already up to date'))
+    elif result.get('errors'):
+        outcome = (FAILED, '; '.join(result['errors']))
+    else:
+        outcome = (DONE, '')
+    record_items(job_id, {podcast_id: outcome})
+
+
+def _skip_reasons(action, podcast_ids):
+    from .models import Podcast
+
+    podcasts = Podcast.objects.filter(pk__in=podcast_ids)
+    reasons = {}
+    if action == 'generate_speaker_scripts':
+        for podcast_id in podcasts.exclude(Q(script_transcript__isnull=True) | Q(script_transcript='')).values_list('pk', flat=True):
+            reasons[podcast_id] = 'Already has a speaker script'
+    if ACTIONS[action]['needs_transcript']:
+        for podcast_id in podcasts.filter(Q(transcript__isnull=True) | Q(transcript='')).values_list('pk', flat=True):
+            reasons[podcast_id] = 'No transcript available'
+    return reasons
+
+
+def run(job_id):
+    """Send the per-podcast tasks of a queued job. Returns the number sent."""
+    from .models import BackgroundJob, Podcast
+    from .tasks import podcast_tasks
+
+    if not BackgroundJob.objects.filter(pk=job_id, status='queued').update(status='running', started_at=timezone.now()):
+        logger.info(f"Background job {job_id} was already started")
+        return 0
+
+    job = BackgroundJob.objects.get(pk=job_id)
+    spec = ACTIONS[job.action]
+    task = getattr(podcast_tasks, spec['task'])
+    skip_reasons = _skip_reasons(job.action, job.podcast_ids)
+    outcomes = {podcast_id: (SKIPPED, reason) for podcast_id, reason in skip_reasons.items()}
+
+    existing = set(Podcast.objects.filter(pk__in=job.podcast_ids).values_list('pk', flat=True))
+    for podcast_id in set(job.podcast_ids) - existing:
+        outcomes[podcast_id] = (FAILED, 'Podcast no longer exists')
+
+    to_send = [podcast_id for podcast_id in job.podcast_ids if podcast_id not in outcomes]
+    sent = 0
+    kwargs = {'refresh': True} if spec.get('refresh') else {}
+    if job.action == 'suggest_tags_batched':
+        if to_send:
+            task.delay(to_send, job_id=job.pk)
+            sent = len(to_send)
+    else:
+        podcasts = Podcast.objects.filter(pk__in=to_send).only('id', 'raw_audio_url', 'priority', 'release_date')
+        for podcast in podcasts.iterator(chunk_size=500):
+            try:
+                if locking.enqueue(task, podcast, spec['stage'], job_id=job.pk, **kwargs):
+                    sent += 1
+                else:
+                    outcomes[podcast.pk] = (SKIPPED, 'Already queued or running')
+            except Exception as e:
+                logger.error(f"Failed to enqueue {job.action} for {podcast.raw_audio_url}: {str(e)}")
+                outcomes[podcast.pk] = (FAILED, str(e))
+
+    # Also completes jobs where nothing was sent
+    record_items(job.pk, outcomes)
+    logger.info(f"Background job {job.pk} ({job.action}): sent {sent} of {job.total_count} podcasts")
+    return sent
+
+
+def sweep_stale(timeout=None):
+    """
+    Fail the podcasts without an outcome in jobs that were queued or made no
+    progress for timeout seconds (default BACKGROUND_JOB_TIMEOUT_SECONDS),
+    which completes those jobs. Returns the number of jobs swept.
+    """
+    from .models import BackgroundJob
+
+    if timeout is None:
+        timeout = getattr(settings, 'BACKGROUND_JOB_TIMEOUT_SECONDS', 7200)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+
+    swept = 0
+    for job in BackgroundJob.objects.filter(status__in=['queued', 'running'], created_at__lt=cutoff):
+        if job.items.filter(created_at__gte=cutoff).exists():
+            continue
+        if job.status == 'queued':
+            # run_background_job never ran; nothing was sent
+            BackgroundJob.objects.filter(pk=job.pk, status='queued').update(status='running', started_at=timezone.now())
+        reported = set(job.items.values_list('podcast_id', flat=True))
+        message = f"No outcome reported within {timeout} seconds"
+        record_items(job.pk, {
+            podcast_id: (FAILED, message) for podcast_id in job.podcast_ids if podcast_id not in reported
+        })
+        logger.warning(f"Background job {job.pk} ({job.action}) timed out; {job.total_count - len(reported)} podcasts marked failed")
+        swept += 1
+    return swept
+
+
+def progress(job):
+    """Progress of a job for the progress endpoint."""
+    errors = job.items.exclude(message='').order_by('podcast_id').values_list('podcast_id', 'message')
+    return {
+        'id': job.pk,
+        'action': job.action,
+        'status': job.status,
+        'total': job.total_count,
+        'done': job.done_count,
+        'failed': job.failed_count,
+        'skipped': job.skipped_count,
+        'percent': round(100 * job.finished_count / job.total_count) if job.total_count else 100,
+        'errors': {str(podcast_id): message for podcast_id, message in errors},
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
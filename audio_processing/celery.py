@@ -1,8 +1,107 @@
+"""
+Celery app, queues and task routing.
+
+Work is split over four queues so a burst of one kind of work can't hold up
+the others:
+
+- ingest: feed polling and short bookkeeping tasks
+- transcription: multi-minute downloads and speech-to-text requests
+- llm: per-episode LLM stages (tags, script, summary, enrichment)
+- backfill: bulk jobs (batched tagging, offline batches, re-tagging, the
+  classifier) and all work for backlog episodes
+
+Each queue should be consumed by its own worker with the profile in
+WORKER_PROFILES (see worker_command), e.g.
+
+    celery -A audio_processing worker -Q transcription -P prefork -c 2 --prefetch-multiplier 1 -n transcription@%h
+
+Long tasks get a prefetch multiplier of 1 so a worker never holds a queued
+transcription while it is busy with another; short LLM tasks prefetch a few
+each. Backlog episodes (see model_routing.get_priority) are sent to the
+backfill queue, so a large backfill only ever occupies the backfill workers and
+fresh episodes keep flat latency. Within a queue, fresh episodes also get a
+higher message priority, which brokers with priority support (Redis, RabbitMQ)
+honor; SQS ignores it and relies on the queue split alone.
+"""
 import os
 from celery import Celery
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "audio_processing.settings")
 
+INGEST = 'ingest'
+TRANSCRIPTION = 'transcription'
+LLM = 'llm'
+BACKFILL = 'backfill'
+QUEUES = [INGEST, TRANSCRIPTION, LLM, BACKFILL]
+
+# Message priorities by podcast priority class, 9 being the highest
+PRIORITIES = {'high': 9, 'normal': 5, 'backlog': 0}
+
+TASK_QUEUES = {
+    'audio_processing.tasks.rss_tasks.process_rss_feed_by_id': INGEST,
+    'audio_processing.tasks.rss_tasks.process_all_active_rss_feeds': INGEST,
+    'audio_processing.tasks.podcast_tasks.process_complete_workflow': INGEST,
+    'audio_processing.tasks.podcast_tasks.workflow_results': INGEST,
+    'audio_processing.tasks.podcast_tasks.poll_llm_batches': INGEST,
+    'audio_processing.tasks.podcast_tasks.dispatch_transcriptions': INGEST,
+    'audio_processing.tasks.podcast_tasks.run_background_job': INGEST,
+    'audio_processing.tasks.podcast_tasks.sweep_background_jobs': INGEST,
+    'audio_processing.tasks.podcast_tasks.add_transcript': TRANSCRIPTION,
+    'audio_processing.tasks.podcast_tasks.workflow_transcript': TRANSCRIPTION,
+    'audio_processing.tasks.podcast_tasks.suggest_and_apply_tags': LLM,
+    'audio_processing.tasks.podcast_tasks.workflow_tags': LLM,
+    'audio_processing.tasks.podcast_tasks.generate_speaker_script': LLM,
+    'audio_processing.tasks.podcast_tasks.generate_summary': LLM,
+    'audio_processing.tasks.podcast_tasks.workflow_script': LLM,
+    'audio_processing.tasks.podcast_tasks.workflow_summary': LLM,
+    'audio_processing.tasks.podcast_tasks.workflow_enrichment': LLM,
+    'audio_processing.tasks.podcast_tasks.suggest_and_apply_tags_batch': BACKFILL,
+    'audio_processing.tasks.podcast_tasks.enrich_podcasts_async': BACKFILL,
+    'audio_processing.tasks.podcast_tasks.submit_llm_batch': BACKFILL,
+    'audio_processing.tasks.podcast_tasks.update_tag_classifier': BACKFILL,
+    'audio_processing.tasks.podcast_tasks.rebuild_tag_classifier': BACKFILL,
+    'audio_processing.tasks.podcast_tasks.retag_changed_tags': BACKFILL,
+}
+
+# Recommended worker settings per queue
+WORKER_PROFILES = {
+    # Quick database and HTTP work
+    INGEST: {'pool': 'prefork', 'concurrency': 4, 'prefetch_multiplier': 4},
+    # Long, memory-heavy audio downloads and uploads; one task per process at a time
+    TRANSCRIPTION: {'pool': 'prefork', 'concurrency': 2, 'prefetch_multiplier': 1},
+    # Short requests that mostly wait on the LLM API
+    LLM: {'pool': 'threads', 'concurrency': 8, 'prefetch_multiplier': 4},
+    # Long bulk jobs; kept small so they only use spare API quota
+    BACKFILL: {'pool': 'prefork', 'concurrency': 2, 'prefetch_multiplier': 1},
+}
+
 app = Celery("audio_processing")
 app.config_from_object("django.conf:settings", namespace="CELERY")
+app.conf.task_default_queue = LLM
+app.conf.task_routes = {name: {'queue': queue} for name, queue in TASK_QUEUES.items()}
+app.conf.task_queue_max_priority = 10
+app.conf.task_default_priority = PRIORITIES['normal']
 app.autodiscover_tasks()
+
+
+def worker_command(queue):
+    """The command line for a worker consuming queue with its recommended profile."""
+    profile = WORKER_PROFILES[queue]
+    return (
+        f"celery -A audio_processing worker -Q {queue} -P {profile['pool']} -c {profile['concurrency']} "
+        f"--prefetch-multiplier {profile['prefetch_multiplier']} -n {queue}@%h"
+    )
+
+
+def podcast_options(podcast):
+    """
+    apply_async options for a task working on podcast: backlog episodes go to the
+    backfill queue, and fresh episodes get the highest priority.
+    """
+    from .model_routing import get_priority, BACKLOG
+
+    priority = get_priority(podcast)
+    options = {'priority': PRIORITIES.get(priority, PRIORITIES['normal'])}
+    if priority == BACKLOG:
+        options['queue'] = BACKFILL
+    return options
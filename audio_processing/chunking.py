@@ -0,0 +1,135 @@
+"""
+Helpers for splitting long transcripts into pieces that fit an LLM context window.
+"""
+import math
+import re
+
+# Rough average for English speech transcripts
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+def estimate_tokens(text):
+    """Estimate the number of tokens in a piece of text."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_sentences(text):
+    """Split text into sentences on terminal punctuation."""
+    return [sentence for sentence in _SENTENCE_BOUNDARY.split(text.strip()) if sentence]
+
+
+def _split_long_sentence(sentence, max_tokens):
+    """Break a single oversized sentence into word groups of at most max_tokens."""
+    pieces = []
+    current = []
+    current_tokens = 0
+    for word in sentence.split():
+        word_tokens = estimate_tokens(word) + 1
+        if current and current_tokens + word_tokens > max_tokens:
+            pieces.append(' '.join(current))
+            current = []
+            current_tokens = 0
+        current.append(word)
+        current_tokens += word_tokens
+    if current:
+        pieces.append(' '.join(current))
+    return pieces
+
+
+def split_into_chunks(text, max_tokens, overlap_tokens=0):
+    """
+    Split text into sentence-aligned chunks of roughly max_tokens each.
+
+    Args:
+        text: The text to split
+        max_tokens: Token budget for each chunk
+        overlap_tokens: Number of trailing tokens from each chunk to repeat
+            at the start of the next one
+
+    Returns:
+        list: The chunk strings, in order
+    """
+    if not text or not text.strip():
+        return []
+
+    sentences = []
+    for sentence in split_sentences(text):
+        if estimate_tokens(sentence) > max_tokens:
+            sentences.extend(_split_long_sentence(sentence, max_tokens))
+        else:
+            sentences.append(sentence)
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for sentence in sentences:
+        sentence_tokens = estimate_tokens(sentence)
+        if current and current_tokens + sentence_tokens > max_tokens:
+            chunks.append(' '.join(current))
+
+            # Carry trailing sentences over so the next chunk keeps some context
+            carried = []
+            carried_tokens = 0
+            for previous in reversed(current):
+                previous_tokens = estimate_tokens(previous)
+                if carried_tokens + previous_tokens > overlap_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous_tokens
+            if carried_tokens + sentence_tokens > max_tokens:
+                carried = []
+                carried_tokens = 0
+
+            current = carried
+            current_tokens = carried_tokens
+
+        current.append(sentence)
+        current_tokens += sentence_tokens
+
+    if current:
+        chunks.append(' '.join(current))
+
+    return chunks
+
+
+_SPEAKER_LABEL = re.compile(r'^[^:\[\]]{1,60}:\s*')
+_NON_WORD = re.compile(r'[^a-z0-9\s]')
+
+
+def _line_words(line):
+    """Lowercased words of a script line, without its speaker label or punctuation."""
+    dialogue = _SPEAKER_LABEL.sub('', line.strip(), count=1)
+    return _NON_WORD.sub(' ', dialogue.lower()).split()
+
+
+def merge_overlapping_lines(window_texts, lookback_lines=20, match_threshold=0.8):
+    """
+    Join texts produced from overlapping windows, dropping the lines at the start of
+    each window that repeat lines already present at the end of the previous one.
+
+    A line counts as a repeat when at least match_threshold of its words appear in the
+    last lookback_lines lines of the merged output. Speaker labels are ignored when
+    comparing, since overlapping windows may attribute the same words differently.
+    """
+    merged = []
+    for window_text in window_texts:
+        lines = window_text.strip().splitlines()
+        if merged:
+            tail_words = set()
+            for previous in merged[-lookback_lines:]:
+                tail_words.update(_line_words(previous))
+
+            skip = 0
+            for line in lines[:lookback_lines]:
+                words = _line_words(line)
+                if words and sum(1 for word in words if word in tail_words) / len(words) < match_threshold:
+                    break
+                skip += 1
+            lines = lines[skip:]
+        merged.extend(lines)
+
+    return '\n'.join(merged).strip()
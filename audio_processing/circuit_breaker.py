@@ -0,0 +1,83 @@
+"""
+Circuit breakers for external providers, shared by all workers.
+
+Each provider has a ProviderCircuit row counting its consecutive failures.
+After CIRCUIT_FAILURE_THRESHOLD failures in a row the circuit opens: allow()
+returns False for CIRCUIT_OPEN_SECONDS, so callers fail over to another
+provider instead of waiting on one that is down. Once that time has passed a
+single trial request is let through (half-open); its success closes the
+circuit, and its failure opens it again for another CIRCUIT_OPEN_SECONDS.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _open_for():
+    return timedelta(seconds=getattr(settings, 'CIRCUIT_OPEN_SECONDS', 300))
+
+
+def allow(provider):
+    """Whether a request may be sent to provider now."""
+    from .models import ProviderCircuit
+
+    circuit = ProviderCircuit.objects.filter(provider=provider).first()
+    if circuit is None or circuit.opened_until is None:
+        return True
+
+    now = timezone.now()
+    if circuit.opened_until > now:
+        return False
+
+    # Half-open: the worker that moves opened_until forward gets the one trial request
+    claimed = ProviderCircuit.objects.filter(pk=circuit.pk, opened_until=circuit.opened_until).update(
+        opened_until=now + _open_for(),
+        updated_at=now,
+    )
+    if claimed:
+        logger.info(f"Circuit for {provider} is half-open, sending a trial request")
+    return bool(claimed)
+
+
+def is_open(provider):
+    """Whether provider's circuit is open, i.e. requests are skipping it."""
+    from .models import ProviderCircuit
+
+    return ProviderCircuit.objects.filter(provider=provider, opened_until__gt=timezone.now()).exists()
+
+
+def record_success(provider):
+    """Close provider's circuit and reset its failure count."""
+    from .models import ProviderCircuit
+
+    closed = ProviderCircuit.objects.filter(provider=provider).filter(
+        Q(failure_count__gt=0) | Q(opened_until__isnull=False)
+    ).update(failure_count=0, opened_until=None, updated_at=timezone.now())
+    if closed:
+        logger.info(f"Circuit for {provider} closed")
+
+
+def record_failure(provider, error=''):
+    """Count a failed request to provider, opening its circuit at the threshold."""
+    from .models import ProviderCircuit
+
+    now = timezone.now()
+    ProviderCircuit.objects.get_or_create(provider=provider)
+    ProviderCircuit.objects.filter(provider=provider).update(
+        failure_count=F('failure_count') + 1,
+        last_failure_at=now,
+        last_error=error,
+        updated_at=now,
+    )
+
+    threshold = getattr(settings, 'CIRCUIT_FAILURE_THRESHOLD', 3)
+    opened = ProviderCircuit.objects.filter(provider=provider, failure_count__gte=threshold).update(
+        opened_until=now + _open_for()
+    )
+    if opened:
+        logger.warning(f"Circuit for {provider} opened for {_open_for().total_seconds():.0f}s after repeated failures: {error}")
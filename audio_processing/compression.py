@@ -0,0 +1,198 @@
+"""
+Local extractive compression of transcripts before they are sent to the LLM.
+
+Three CPU-side stages, applied by the prompt builders in prompts.py:
+
+1. Filler and disfluency removal ("um", "uh", "mm-hmm", ", you know,", stuttered
+   repeats of STUTTER_WORDS like "the the"), which is safe for every prompt;
+   other repeated words are left alone, since "had had" or "that that" can be
+   grammatical
+2. Near-duplicate sentence removal: sentences whose hashed bag-of-words vector
+   has a cosine similarity of at least DUPLICATE_SIMILARITY with an earlier one
+3. TextRank extractive selection: sentences are ranked by PageRank over their
+   similarity graph and the most central ones are kept, in their original
+   order, up to a token budget; text that can't be ranked (a single sentence)
+   or whose sentences are each over the budget is cut to the budget instead
+
+Sentence similarities are computed as one matrix product over a hashed TF-IDF
+matrix, so compressing a long episode takes milliseconds. Speaker scripts only
+get filler removal, since the script has to keep every sentence; tag prompts
+get a representative excerpt of TAG_EXCERPT_TOKENS instead of the first 2000
+characters (usually the intro and an ad read); summary and enrichment prompts
+keep COMPRESSION_SUMMARY_RATIO of the cleaned transcript once it is longer
+than COMPRESSION_MIN_TOKENS.
+"""
+import re
+import zlib
+
+import numpy as np
+from django.conf import settings
+
+from .chunking import CHARS_PER_TOKEN, estimate_tokens, split_sentences
+
+# Dimensions of the hashed sentence vectors; collisions only blur similarities slightly
+DIMENSIONS = 2 ** 11
+DUPLICATE_SIMILARITY = 0.9
+# Longer transcripts are ranked as passages of consecutive sentences to bound the matrix size
+MAX_UNITS = 2000
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+
+FILLER_WORDS = re.compile(r"\b(?:uh-huh|mm+-?hmm+|u+m+|u+h+|e+r+m+|h+m+)\b,?\s*", re.IGNORECASE)
+FILLER_PHRASES = re.compile(r",\s*(?:you know|i mean|like)\s*,", re.IGNORECASE)
+# Short words speakers stutter on; only these are collapsed when repeated
+STUTTER_WORDS = (
+    "i", "i'm", "i've", "a", "an", "the", "and", "but", "so", "or", "we", "you", "he", "she", "they", "it", "it's",
+    "to", "in", "of", "on", "is", "my", "well", "like", "just", "yeah", "no", "yes", "okay",
+)
+REPEATED_WORDS = re.compile(
+    r"\b(" + '|'.join(re.escape(word) for word in STUTTER_WORDS) + r")(?:,?\s+\1)+\b", re.IGNORECASE
+)
+SPACE_BEFORE_PUNCTUATION = re.compile(r"\s+([,.!?;:])")
+LEADING_COMMA = re.compile(r"(^|[.!?]\s+),\s*")
+REPEATED_PUNCTUATION = re.compile(r"[,\s]*([.!?])(?:\s*[.!?])*")
+MULTIPLE_SPACES = re.compile(r"[ \t]{2,}")
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def remove_fillers(text):
+    """Remove filler words and stuttered repeats."""
+    if not text:
+        return text
+    text = FILLER_WORDS.sub('', text)
+    text = FILLER_PHRASES.sub(',', text)
+    text = REPEATED_WORDS.sub(r'\1', text)
+    text = SPACE_BEFORE_PUNCTUATION.sub(r'\1', text)
+    text = LEADING_COMMA.sub(r'\1', text)
+    text = REPEATED_PUNCTUATION.sub(r'\1', text)
+    return MULTIPLE_SPACES.sub(' ', text).strip()
+
+
+def _truncate(text, token_budget):
+    """Cut text to about token_budget tokens, at a word boundary."""
+    max_chars = token_budget * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(' ', 1)[0]
+
+
+def _group_sentences(sentences, max_units):
+    """Join consecutive sentences into at most max_units passages."""
+    if len(sentences) <= max_units:
+        return sentences
+    size = -(-len(sentences) // max_units)
+    return [' '.join(sentences[start:start + size]) for start in range(0, len(sentences), size)]
+
+
+def sentence_matrix(sentences, dims=DIMENSIONS):
+    """Hashed TF-IDF matrix with one L2-normalized row per sentence."""
+    rows = []
+    columns = []
+    for row, sentence in enumerate(sentences):
+        for word in WORD_PATTERN.findall(sentence.lower()):
+            rows.append(row)
+            columns.append(zlib.crc32(word.encode('utf-8')) % dims)
+
+    cells = np.array(rows, dtype=np.int64) * dims + np.array(columns, dtype=np.int64)
+    counts = np.bincount(cells, minlength=len(sentences) * dims).reshape(len(sentences), dims)
+
+    matrix = np.log1p(counts.astype(np.float32))
+    doc_freq = np.count_nonzero(matrix, axis=0)
+    matrix *= np.log((1.0 + len(sentences)) / (1.0 + doc_freq)) + 1.0
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _near_duplicate_mask(similarity):
+    """True for sentences that nearly repeat an earlier sentence."""
+    earlier = np.triu(similarity, k=1)
+    return (earlier >= DUPLICATE_SIMILARITY).any(axis=0)
+
+
+def textrank_scores(similarity):
+    """PageRank over the sentence similarity graph."""
+    count = similarity.shape[0]
+    weights = np.clip(similarity, 0.0, None)
+    np.fill_diagonal(weights, 0.0)
+
+    out_weight = weights.sum(axis=1, keepdims=True)
+    # Sentences with no similar sentence spread their rank evenly
+    transition = np.divide(weights, out_weight, out=np.full_like(weights, 1.0 / count), where=out_weight > 0)
+
+    scores = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1.0 - DAMPING) / count + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def _select(sentences, scores, token_budget):
+    """Keep the highest-scoring sentences that fit in token_budget, in their original order."""
+    selected = []
+    used = 0
+    for index in np.argsort(-scores, kind='stable'):
+        tokens = estimate_tokens(sentences[index]) + 1
+        if used + tokens > token_budget:
+            continue
+        selected.append(index)
+        used += tokens
+    return [sentences[index] for index in sorted(selected)]
+
+
+def compress_transcript(text, token_budget=None):
+    """
+    Remove fillers and near-duplicate sentences, then, if the result is still over
+    token_budget, keep only the most central sentences that fit.
+    """
+    if not text or not text.strip():
+        return text
+
+    sentences = _group_sentences(split_sentences(remove_fillers(text)), MAX_UNITS)
+    if len(sentences) < 2:
+        # Nothing to rank
+        text = ' '.join(sentences)
+        return text if token_budget is None else _truncate(text, token_budget)
+
+    matrix = sentence_matrix(sentences)
+    similarity = matrix @ matrix.T
+    keep = ~_near_duplicate_mask(similarity)
+    sentences = [sentence for sentence, kept in zip(sentences, keep) if kept]
+
+    if token_budget is None or estimate_tokens(' '.join(sentences)) <= token_budget:
+        return ' '.join(sentences)
+
+    similarity = similarity[np.ix_(keep, keep)]
+    selected = _select(sentences, textrank_scores(similarity), token_budget)
+    if not selected:
+        # Every sentence is over the budget on its own
+        return _truncate(' '.join(sentences), token_budget)
+    return ' '.join(selected)
+
+
+def compress_for_tagging(transcript):
+    """A representative excerpt of the whole episode, of at most TAG_EXCERPT_TOKENS."""
+    if not getattr(settings, 'COMPRESSION_ENABLED', True):
+        return (transcript or '')[:2000]
+    return compress_transcript(transcript, getattr(settings, 'TAG_EXCERPT_TOKENS', 500))
+
+
+def compress_for_summary(transcript):
+    """
+    The transcript cleaned and cut to COMPRESSION_SUMMARY_RATIO of its length;
+    transcripts under COMPRESSION_MIN_TOKENS are only cleaned.
+    """
+    if not transcript or not getattr(settings, 'COMPRESSION_ENABLED', True):
+        return transcript
+    ratio = getattr(settings, 'COMPRESSION_SUMMARY_RATIO', 0.6)
+    min_tokens = getattr(settings, 'COMPRESSION_MIN_TOKENS', 1000)
+    return compress_transcript(transcript, max(min_tokens, int(estimate_tokens(remove_fillers(transcript)) * ratio)))
+
+
+def compress_for_script(transcript):
+    """The transcript with fillers removed; scripts must keep every sentence."""
+    if not getattr(settings, 'COMPRESSION_ENABLED', True):
+        return transcript
+    return remove_fillers(transcript)
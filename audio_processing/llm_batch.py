@@ -0,0 +1,300 @@
+"""
+Offline batch mode for bulk LLM backfills.
+
+Prompts for a queryset of podcasts are rendered into a JSONL file, uploaded to
+the provider's batch endpoint and processed within the completion window at
+batch pricing, without touching the interactive rate limits. Once the batch
+completes, results are applied with the same writers the interactive path uses
+(_parse_and_apply_tags, _apply_summary, _apply_speaker_script, _apply_enrichment)
+in one transaction, then recorded as completed in the podcasts' stage state and
+stored in the LLM response cache with bulk writes. Results for podcasts whose
+stage inputs changed after the batch was submitted are discarded.
+
+A job only leaves 'submitted' once its results are applied (or the batch
+failed), so a worker that dies while downloading or applying results leaves
+the job to be picked up again by the next poll.
+
+The API base URL is configurable with GROQ_BATCH_API_BASE, so the whole flow can
+be exercised against the local stand-in server (manage.py batch_standin_server).
+
+Transcripts that do not fit in a single prompt are skipped: hierarchical summaries
+and windowed scripts need several dependent calls and go through the interactive
+or async paths instead.
+"""
+import io
+import json
+import logging
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import llm_cache, stage_state
+from .chunking import estimate_tokens
+from .prompt_budget import fits
+from .tag_catalog import get_tag_catalog
+from .models.groq_mixin import (
+    SCRIPT_MODEL, SCRIPT_MAX_TOKENS, TAG_MODEL, TAG_MAX_TOKENS, build_chat_request, strip_think_blocks
+)
+from .models.summarizable_mixin import SUMMARY_MODEL, SUMMARY_MAX_TOKENS
+from .models.enrichable_mixin import ENRICHMENT_MODEL, ENRICHMENT_MAX_TOKENS
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('tags', 'summary', 'script', 'enrichment')
+
+# Statuses after which the provider will not change the batch any more
+PROVIDER_FINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+
+class BatchAPIError(Exception):
+    """Raised when the batch API returns an error or an unexpected response."""
+
+
+def _api_base():
+    return getattr(settings, 'GROQ_BATCH_API_BASE', 'https://api.groq.com/openai/v1').rstrip('/')
+
+
+def _headers():
+    api_key = getattr(settings, 'GROQ_API_KEY', '')
+    if not api_key:
+        raise BatchAPIError("GROQ_API_KEY not configured")
+    return {"Authorization": f"Bearer {api_key}"}
+
+
+def _request(method, path, **kwargs):
+    try:
+        response = requests.request(method, f"{_api_base()}{path}", headers=_headers(), timeout=60, **kwargs)
+        response.raise_for_status()
+        return response
+    except requests.exceptions.RequestException as e:
+        raise BatchAPIError(f"Batch API {method} {path} failed: {str(e)}") from e
+
+
+def render_request(podcast, stage, tag_list):
+    """
+    Render the chat request one podcast needs for a stage.
+    Returns (model, messages, params), or None if the podcast can't be handled in a single request.
+    """
+    from .prompts import get_episode_summary_prompt, get_speaker_transcript_prompt, get_episode_enrichment_prompt
+
+    if not podcast.transcript or not podcast.transcript.strip():
+        return None
+
+    if stage == 'tags':
+        messages, params = build_chat_request(podcast._get_tag_suggestion_prompt(tag_list), TAG_MAX_TOKENS)
+        return TAG_MODEL, messages, params
+    elif stage == 'summary':
+        prompt = get_episode_summary_prompt(podcast.transcript)
+        if fits(prompt, SUMMARY_MODEL, SUMMARY_MAX_TOKENS):
+            messages, params = build_chat_request(prompt, SUMMARY_MAX_TOKENS)
+            return SUMMARY_MODEL, messages, params
+    elif stage == 'script' and estimate_tokens(podcast.transcript) <= getattr(settings, 'SCRIPT_WINDOW_TOKENS', 3000):
+        prompt = get_speaker_transcript_prompt(podcast.transcript, model=SCRIPT_MODEL, max_tokens=SCRIPT_MAX_TOKENS)
+        messages, params = build_chat_request(prompt, SCRIPT_MAX_TOKENS)
+        return SCRIPT_MODEL, messages, params
+    elif stage == 'enrichment':
+        prompt = get_episode_enrichment_prompt(podcast._shortlist_tags(tag_list, podcast.transcript), podcast.transcript)
+        if fits(prompt, ENRICHMENT_MODEL, ENRICHMENT_MAX_TOKENS):
+            messages, params = build_chat_request(prompt, ENRICHMENT_MAX_TOKENS, json_mode=True)
+            return ENRICHMENT_MODEL, messages, params
+
+    return None
+
+
+def submit_batch(podcasts, stage):
+    """
+    Render requests for the podcasts, upload them as a JSONL batch and create the batch job.
+    Returns the LLMBatchJob, or None if no podcast needed a request.
+    """
+    from .models import LLMBatchJob
+
+    if stage not in STAGES:
+        raise ValueError(f"Unknown batch stage: {stage}")
+
+    tag_list = get_tag_catalog()
+
+    lines = []
+    input_fingerprints = {}
+    skipped = 0
+    for podcast in podcasts:
+        rendered = render_request(podcast, stage, tag_list)
+        if rendered is None:
+            skipped += 1
+            continue
+        model, messages, params = rendered
+        lines.append(json.dumps({
+            "custom_id": f"podcast-{podcast.id}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": model, "messages": messages, **params},
+        }))
+        input_fingerprints[str(podcast.id)] = stage_state.fingerprint(podcast, stage)
+
+    if skipped:
+        logger.info(f"Skipped {skipped} podcasts that can't be handled in a single {stage} request")
+    if not lines:
+        logger.info(f"No podcasts to submit for {stage} batch")
+        return None
+
+    upload = _request(
+        'POST', '/files',
+        data={"purpose": "batch"},
+        files={"file": (f"{stage}-batch.jsonl", io.BytesIO("\n".join(lines).encode('utf-8')), "application/jsonl")}
+    ).json()
+
+    batch = _request('POST', '/batches', json={
+        "input_file_id": upload['id'],
+        "endpoint": "/v1/chat/completions",
+        "completion_window": getattr(settings, 'LLM_BATCH_COMPLETION_WINDOW', '24h'),
+    }).json()
+
+    job = LLMBatchJob.objects.create(
+        stage=stage,
+        provider_batch_id=batch['id'],
+        provider_status=batch.get('status', ''),
+        input_file_id=upload['id'],
+        request_count=len(lines),
+        input_fingerprints=input_fingerprints,
+    )
+    logger.info(f"Submitted {stage} batch {job.provider_batch_id} with {len(lines)} requests")
+    return job
+
+
+def poll_batch(job):
+    """
+    Refresh a submitted job from the provider, and apply its results once the batch completes.
+    Returns the updated job.
+    """
+    batch = _request('GET', f"/batches/{job.provider_batch_id}").json()
+    job.provider_status = batch.get('status', '')
+    job.output_file_id = batch.get('output_file_id') or ''
+    job.error_file_id = batch.get('error_file_id') or ''
+
+    if job.provider_status not in PROVIDER_FINAL_STATUSES:
+        job.save()
+        return job
+
+    job.completed_at = timezone.now()
+    if job.provider_status != 'completed' or not job.output_file_id:
+        job.status = 'failed'
+        job.errors = job.errors + [f"Batch ended with status: {job.provider_status}"]
+        if job.error_file_id:
+            job.errors = job.errors + _read_error_file(job.error_file_id)
+        job.save()
+        logger.error(f"{job.stage} batch {job.provider_batch_id} ended with status {job.provider_status}")
+        return job
+
+    # Keep the job 'submitted' until the results are applied, so a failed download is polled again
+    output = _request('GET', f"/files/{job.output_file_id}/content").text
+    if job.error_file_id:
+        job.errors = job.errors + _read_error_file(job.error_file_id)
+    return apply_results(job, output.splitlines())
+
+
+def _read_error_file(error_file_id):
+    """Read per-request errors from a batch error file."""
+    try:
+        content = _request('GET', f"/files/{error_file_id}/content").text
+    except BatchAPIError as e:
+        return [str(e)]
+
+    errors = []
+    for line in content.splitlines():
+        if line.strip():
+            try:
+                entry = json.loads(line)
+                errors.append(f"{entry.get('custom_id')}: {entry.get('error') or entry.get('response')}")
+            except json.JSONDecodeError:
+                errors.append(line)
+    return errors
+
+
+def apply_results(job, output_lines):
+    """Apply batch output lines to their podcasts with the interactive writers."""
+    from .models import Podcast
+
+    tag_list = get_tag_catalog()
+
+    results = {}
+    errors = []
+    for line in output_lines:
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+            podcast_id = int(entry['custom_id'].split('-', 1)[1])
+            response = entry.get('response') or {}
+            if entry.get('error') or response.get('status_code') != 200:
+                errors.append(f"{entry['custom_id']}: {entry.get('error') or response.get('body')}")
+                continue
+            results[podcast_id] = response['body']
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            errors.append(f"Unreadable batch output line: {str(e)}")
+
+    podcasts = Podcast.objects.in_bulk(list(results.keys()))
+    applied_fingerprints = {}
+    cache_entries = []
+    with transaction.atomic():
+        for podcast_id, body in results.items():
+            error = _apply_result(job, podcasts.get(podcast_id), podcast_id, body, tag_list, cache_entries)
+            if error:
+                errors.append(f"podcast-{podcast_id}: {error}")
+            else:
+                applied_fingerprints[podcast_id] = stage_state.fingerprint(podcasts[podcast_id], job.stage)
+
+        stage_state.complete_many(job.stage, applied_fingerprints)
+        job.applied_count = len(applied_fingerprints)
+        job.errors = job.errors + errors
+        job.failed_count = len(job.errors)
+        job.status = 'applied'
+        job.save()
+
+    # Make later interactive reruns of the same prompts free as well
+    llm_cache.store_responses(cache_entries)
+    logger.info(
+        f"Applied {job.applied_count} results from {job.stage} batch {job.provider_batch_id} "
+        f"({job.failed_count} errors)"
+    )
+    return job
+
+
+def _apply_result(job, podcast, podcast_id, body, tag_list, cache_entries):
+    """
+    Apply one podcast's result with the interactive writer and queue its cache entry.
+    Returns an error message, or None if the result was applied.
+    """
+    if podcast is None:
+        return "podcast no longer exists"
+
+    input_fingerprint = stage_state.fingerprint(podcast, job.stage)
+    if job.input_fingerprints.get(str(podcast_id), input_fingerprint) != input_fingerprint:
+        return f"{job.stage} inputs changed since the batch was submitted"
+
+    try:
+        content = strip_think_blocks(body['choices'][0]['message']['content'].strip())
+    except (KeyError, IndexError, TypeError):
+        return "response has no content"
+
+    if job.stage == 'tags':
+        outcome = podcast._parse_and_apply_tags(content)
+        if outcome == [] and json.loads(content):
+            # Every suggested tag ID was invalid; an empty suggestion is a valid result
+            outcome = None
+    elif job.stage == 'summary':
+        outcome = podcast._apply_summary(content)
+    elif job.stage == 'script':
+        outcome = podcast._apply_speaker_script(content)
+    else:
+        outcome = podcast._apply_enrichment(content, tag_list)
+
+    if outcome is None:
+        return f"failed to apply {job.stage} result"
+
+    rendered = render_request(podcast, job.stage, tag_list)
+    if rendered is not None:
+        model, messages, params = rendered
+        cache_entries.append((llm_cache.make_cache_key(model, params, messages), model, content))
+    return None
+
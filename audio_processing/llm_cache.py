@@ -0,0 +1,232 @@
+"""
+Content-addressed cache for LLM responses.
+
+Responses are keyed by a hash of the model, request parameters and rendered
+messages, so re-running a stage on an unchanged episode is served from the
+cache instead of calling the provider again. The backend is chosen with the
+LLM_CACHE_BACKEND setting:
+
+- 'database': LLMCacheEntry rows, shared by all workers, with TTL and
+  least-recently-used eviction once LLM_CACHE_MAX_ENTRIES is exceeded; the
+  table is culled on about one store in LLM_CACHE_CULL_EVERY rather than on
+  every store
+- 'django': the Django cache named by LLM_CACHE_ALIAS; size is bounded by
+  that cache's own MAX_ENTRIES option
+- 'none': caching disabled
+
+Hits, misses, stores and evictions are counted in LLMCacheCounter rows, so
+get_cache_stats() reports totals across all workers; they are served with the
+admission gauge at /admission/.
+
+The key includes the model. Routing (see model_routing) may send a stage to a
+different tier than last time, depending on priority and remaining quota, and
+prompts are budgeted to the routed model's context window, so a rerun routed
+to another tier is a miss by design: its prompt and response differ.
+"""
+import hashlib
+import json
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STATS = ('hits', 'misses', 'stores', 'evictions')
+
+
+def _record(stat, count=1):
+    """Add count to a shared counter. Counter errors are logged and otherwise ignored."""
+    from .models import LLMCacheCounter
+
+    try:
+        if not LLMCacheCounter.objects.filter(name=stat).update(count=F('count') + count):
+            LLMCacheCounter.objects.get_or_create(name=stat)
+            LLMCacheCounter.objects.filter(name=stat).update(count=F('count') + count)
+    except Exception as e:
+        logger.warning(f"Failed to record LLM cache {stat}: {str(e)}")
+
+
+def get_cache_stats():
+    """Return hit/miss counters across all workers, including the hit rate."""
+    from .models import LLMCacheCounter
+
+    stats = dict.fromkeys(STATS, 0)
+    stats.update(LLMCacheCounter.objects.filter(name__in=STATS).values_list('name', 'count'))
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def make_cache_key(model, params, messages):
+    """Hash the model, request parameters and messages into a cache key."""
+    payload = json.dumps(
+        {'model': model, 'params': params, 'messages': messages},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class DatabaseCacheBackend:
+    """Stores responses in the LLMCacheEntry table."""
+
+    def __init__(self, ttl, max_entries, cull_frequency, cull_every=1):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cull_frequency = cull_frequency
+        self.cull_every = cull_every
+
+    def get(self, key):
+        from .models import LLMCacheEntry
+
+        now = timezone.now()
+        entry = LLMCacheEntry.objects.filter(key=key).only('response', 'expires_at').first()
+        if entry is None:
+            return None
+        if entry.expires_at and entry.expires_at <= now:
+            entry.delete()
+            return None
+        LLMCacheEntry.objects.filter(pk=entry.pk).update(hit_count=F('hit_count') + 1, last_accessed_at=now)
+        return entry.response
+
+    def set(self, key, model, response):
+        from .models import LLMCacheEntry
+
+        now = timezone.now()
+        LLMCacheEntry.objects.update_or_create(
+            key=key,
+            defaults={
+                'model': model,
+                'response': response,
+                'last_accessed_at': now,
+                'expires_at': now + timedelta(seconds=self.ttl) if self.ttl else None,
+            }
+        )
+        # The delete and count scan the table, so only some stores pay for them
+        if self.cull_every <= 1 or random.random() < 1 / self.cull_every:
+            self._cull(now)
+
+    def set_many(self, entries):
+        from .models import LLMCacheEntry
+
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=self.ttl) if self.ttl else None
+        LLMCacheEntry.objects.bulk_create(
+            [
+                LLMCacheEntry(key=key, model=model, response=response, last_accessed_at=now, expires_at=expires_at)
+                for key, model, response in entries
+            ],
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['model', 'response', 'last_accessed_at', 'expires_at'],
+        )
+        self._cull(now)
+
+    def _cull(self, now):
+        """Delete expired entries, then the least recently used ones once over max_entries."""
+        from .models import LLMCacheEntry
+
+        evicted, _ = LLMCacheEntry.objects.filter(expires_at__lte=now).delete()
+
+        if self.max_entries and LLMCacheEntry.objects.count() > self.max_entries:
+            # Like Django's database cache, cull a fraction at once rather than one row per insert
+            cull_count = max(1, self.max_entries // self.cull_frequency)
+            stale_ids = list(
+                LLMCacheEntry.objects.order_by('last_accessed_at').values_list('id', flat=True)[:cull_count]
+            )
+            culled, _ = LLMCacheEntry.objects.filter(id__in=stale_ids).delete()
+            evicted += culled
+
+        if evicted:
+            _record('evictions', evicted)
+
+
+class DjangoCacheBackend:
+    """Stores responses in a configured Django cache."""
+
+    def __init__(self, alias, ttl):
+        self.alias = alias
+        self.ttl = ttl
+
+    def _cache(self):
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    def get(self, key):
+        return self._cache().get(f"llm-response:{key}")
+
+    def set(self, key, model, response):
+        self._cache().set(f"llm-response:{key}", response, self.ttl or None)
+
+    def set_many(self, entries):
+        self._cache().set_many(
+            {f"llm-response:{key}": response for key, model, response in entries}, self.ttl or None
+        )
+
+
+def get_backend():
+    """Build the backend configured by LLM_CACHE_BACKEND, or None if caching is disabled."""
+    backend = getattr(settings, 'LLM_CACHE_BACKEND', 'database')
+    ttl = getattr(settings, 'LLM_CACHE_TTL_SECONDS', 30 * 24 * 60 * 60)
+
+    if backend == 'database':
+        return DatabaseCacheBackend(
+            ttl=ttl,
+            max_entries=getattr(settings, 'LLM_CACHE_MAX_ENTRIES', 50000),
+            cull_frequency=getattr(settings, 'LLM_CACHE_CULL_FREQUENCY', 10),
+            cull_every=getattr(settings, 'LLM_CACHE_CULL_EVERY', 100)
+        )
+    elif backend == 'django':
+        return DjangoCacheBackend(alias=getattr(settings, 'LLM_CACHE_ALIAS', 'default'), ttl=ttl)
+    elif backend == 'none':
+        return None
+
+    logger.error(f"Unknown LLM_CACHE_BACKEND: {backend}")
+    return None
+
+
+def get_cached_response(key):
+    """Return the cached response for key, or None on a miss. Cache errors count as misses."""
+    backend = get_backend()
+    if backend is None:
+        return None
+
+    try:
+        response = backend.get(key)
+    except Exception as e:
+        logger.warning(f"LLM cache lookup failed: {str(e)}")
+        response = None
+
+    _record('hits' if response is not None else 'misses')
+    return response
+
+
+def store_response(key, model, response):
+    """Store a response in the cache. Cache errors are logged and otherwise ignored."""
+    backend = get_backend()
+    if backend is None or not response:
+        return
+
+    try:
+        backend.set(key, model, response)
+        _record('stores')
+    except Exception as e:
+        logger.warning(f"LLM cache store failed: {str(e)}")
+
+
+def store_responses(entries):
+    """Store many (key, model, response) entries in one write, e.g. for batch results."""
+    backend = get_backend()
+    entries = [entry for entry in entries if entry[2]]
+    if backend is None or not entries:
+        return
+
+    try:
+        backend.set_many(entries)
+        _record('stores', len(entries))
+    except Exception as e:
+        logger.warning(f"LLM cache store failed: {str(e)}")
@@ -0,0 +1,302 @@
+"""
+Cluster-wide rate limiting for Groq API requests.
+
+Every worker draws from the same token buckets, stored as RateLimitBucket rows
+and updated under a row lock, so the combined request and token rate across
+all Celery workers stays within the per-model RPM/TPM quota. Requests that
+still get a 429 (or a 5xx) are retried after the server's retry-after, or a
+jittered exponential backoff, and the model's buckets are paused for everyone
+in the meantime.
+
+Limits come from the GROQ_RATE_LIMITS setting, keyed by model name, with the
+'default' entry used for models that are not listed:
+
+    GROQ_RATE_LIMITS = {
+        'default': {'rpm': 30, 'tpm': 6000},
+        'llama3-70b-8192': {'rpm': 30, 'tpm': 6000},
+    }
+"""
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from datetime import timedelta
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PROVIDER = 'groq'
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimitWaitExceeded(Exception):
+    """
+    Raised when a request would have to wait longer than LLM_SCHEDULER_MAX_WAIT_SECONDS for quota.
+    Not a request failure: callers let it propagate so the stage is re-queued (see workflow.run_stage).
+    """
+
+
+def _api_key_id(api_key):
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+
+def get_model_limits(model):
+    """Return the {'rpm': ..., 'tpm': ...} limits configured for a model."""
+    limits = getattr(settings, 'GROQ_RATE_LIMITS', {})
+    return limits.get(model) or limits.get('default') or {'rpm': 30, 'tpm': 6000}
+
+
+def _get_buckets(api_key, model):
+    """Return the locked request and token buckets for a model, creating them if needed."""
+    from .models import RateLimitBucket
+
+    key_id = _api_key_id(api_key)
+    limits = get_model_limits(model)
+    now = timezone.now()
+
+    buckets = {}
+    for kind, limit in ((RateLimitBucket.REQUESTS, limits.get('rpm')), (RateLimitBucket.TOKENS, limits.get('tpm'))):
+        if not limit:
+            continue
+        RateLimitBucket.objects.get_or_create(
+            provider=PROVIDER, api_key_id=key_id, model=model, kind=kind,
+            defaults={
+                'capacity': limit,
+                'available': limit,
+                'refill_per_second': limit / 60.0,
+                'updated_at': now,
+            }
+        )
+        bucket = RateLimitBucket.objects.select_for_update().get(
+            provider=PROVIDER, api_key_id=key_id, model=model, kind=kind
+        )
+        if bucket.capacity != limit:
+            # Limits were reconfigured
+            bucket.capacity = limit
+            bucket.refill_per_second = limit / 60.0
+            bucket.available = min(bucket.available, limit)
+
+        elapsed = max(0.0, (now - bucket.updated_at).total_seconds())
+        bucket.available = min(bucket.capacity, bucket.available + elapsed * bucket.refill_per_second)
+        bucket.updated_at = now
+        buckets[kind] = bucket
+
+    return buckets
+
+
+def _try_acquire(api_key, model, estimated_tokens):
+    """
+    Take one request and estimated_tokens tokens from the model's buckets if available.
+    Returns 0 on success, otherwise the number of seconds to wait before trying again.
+    """
+    from .models import RateLimitBucket
+
+    with transaction.atomic():
+        buckets = _get_buckets(api_key, model)
+        now = timezone.now()
+        needed = {RateLimitBucket.REQUESTS: 1, RateLimitBucket.TOKENS: estimated_tokens}
+
+        wait = 0.0
+        for kind, bucket in buckets.items():
+            if bucket.blocked_until and bucket.blocked_until > now:
+                wait = max(wait, (bucket.blocked_until - now).total_seconds())
+            # A request larger than the whole bucket can only ever run on a full bucket
+            amount = min(needed[kind], bucket.capacity)
+            if bucket.available < amount:
+                wait = max(wait, (amount - bucket.available) / bucket.refill_per_second)
+
+        if wait == 0:
+            for kind, bucket in buckets.items():
+                bucket.available -= min(needed[kind], bucket.capacity)
+
+        for bucket in buckets.values():
+            bucket.save(update_fields=['capacity', 'available', 'refill_per_second', 'updated_at'])
+
+        return wait
+
+
+def acquire(api_key, model, estimated_tokens):
+    """
+    Block until the shared buckets have room for one request of estimated_tokens.
+    Raises RateLimitWaitExceeded if that would take longer than LLM_SCHEDULER_MAX_WAIT_SECONDS.
+    """
+    max_wait = getattr(settings, 'LLM_SCHEDULER_MAX_WAIT_SECONDS', 300)
+    deadline = time.monotonic() + max_wait
+
+    while True:
+        wait = _try_acquire(api_key, model, estimated_tokens)
+        if wait == 0:
+            return
+        if time.monotonic() + wait > deadline:
+            raise RateLimitWaitExceeded(f"Rate limit quota for {model} not available within {max_wait}s")
+        # Jitter so workers that were waiting on the same bucket don't all wake at once
+        time.sleep(wait + random.uniform(0, min(1.0, wait)))
+
+
+def _db(func):
+    """
+    Wrap bucket updates for the event loop. Like async_enrichment._db, calls run on the
+    thread pool rather than sync_to_async's single shared thread, so coroutines waiting
+    on quota don't queue behind each other, and close their connections when done.
+    """
+    def call(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+
+    return sync_to_async(call, thread_sensitive=False)
+
+
+async def async_acquire(api_key, model, estimated_tokens):
+    """Async version of acquire() that yields to the event loop while waiting."""
+    max_wait = getattr(settings, 'LLM_SCHEDULER_MAX_WAIT_SECONDS', 300)
+    deadline = time.monotonic() + max_wait
+
+    while True:
+        wait = await _db(_try_acquire)(api_key, model, estimated_tokens)
+        if wait == 0:
+            return
+        if time.monotonic() + wait > deadline:
+            raise RateLimitWaitExceeded(f"Rate limit quota for {model} not available within {max_wait}s")
+        await asyncio.sleep(wait + random.uniform(0, min(1.0, wait)))
+
+
+def remaining_quota(api_key, model):
+    """
+    Fraction (0 to 1) of the model's quota that is available right now, the lower of
+    its request and token buckets. Read without locking, so it is an estimate.
+    """
+    from .models import RateLimitBucket
+
+    now = timezone.now()
+    fraction = 1.0
+    for bucket in RateLimitBucket.objects.filter(provider=PROVIDER, api_key_id=_api_key_id(api_key), model=model):
+        if bucket.blocked_until and bucket.blocked_until > now:
+            return 0.0
+        elapsed = max(0.0, (now - bucket.updated_at).total_seconds())
+        available = min(bucket.capacity, bucket.available + elapsed * bucket.refill_per_second)
+        fraction = min(fraction, available / bucket.capacity if bucket.capacity else 1.0)
+    return fraction
+
+
+def block_until(api_key, model, seconds):
+    """Pause all requests for a model across the cluster, e.g. after a 429 with retry-after."""
+    from .models import RateLimitBucket
+
+    blocked_until = timezone.now() + timedelta(seconds=seconds)
+    RateLimitBucket.objects.filter(
+        provider=PROVIDER, api_key_id=_api_key_id(api_key), model=model
+    ).update(blocked_until=blocked_until)
+
+
+def sync_from_headers(api_key, model, headers):
+    """
+    Lower the shared buckets to the remaining quota the API reported, so estimates
+    that ran low are corrected by the server's own accounting.
+    """
+    from .models import RateLimitBucket
+
+    remaining = {
+        RateLimitBucket.REQUESTS: headers.get('x-ratelimit-remaining-requests'),
+        RateLimitBucket.TOKENS: headers.get('x-ratelimit-remaining-tokens'),
+    }
+    for kind, value in remaining.items():
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        RateLimitBucket.objects.filter(
+            provider=PROVIDER, api_key_id=_api_key_id(api_key), model=model, kind=kind, available__gt=value
+        ).update(available=value)
+
+
+def _retry_after_seconds(response):
+    """Read the retry-after header (seconds) from a response, if present."""
+    value = response.headers.get('retry-after')
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_seconds(attempt):
+    """Full-jitter exponential backoff."""
+    base = getattr(settings, 'LLM_BACKOFF_BASE_SECONDS', 1.0)
+    cap = getattr(settings, 'LLM_BACKOFF_MAX_SECONDS', 60.0)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _retry_delay(response, attempt):
+    """Seconds to wait before retrying a 429/5xx response."""
+    retry_after = _retry_after_seconds(response)
+    if retry_after is not None:
+        return retry_after + random.uniform(0, min(1.0, retry_after * 0.1 + 0.1))
+    return _backoff_seconds(attempt)
+
+
+def scheduled_post(url, api_key, model, estimated_tokens, **kwargs):
+    """
+    POST to the Groq API once quota is available, retrying 429 and 5xx responses.
+    Accepts the same keyword arguments as requests.post and returns the final
+    response; callers still call raise_for_status() on it.
+    """
+    max_retries = getattr(settings, 'LLM_MAX_RETRIES', 5)
+
+    attempt = 0
+    while True:
+        acquire(api_key, model, estimated_tokens)
+        response = requests.post(url, **kwargs)
+
+        if response.status_code not in RETRY_STATUS_CODES:
+            sync_from_headers(api_key, model, response.headers)
+            return response
+
+        if attempt >= max_retries:
+            logger.error(f"Giving up on {model} request after {attempt + 1} attempts (HTTP {response.status_code})")
+            return response
+
+        delay = _retry_delay(response, attempt)
+        logger.warning(f"HTTP {response.status_code} from Groq for {model}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+        response.close()
+        if response.status_code == 429:
+            # Pause the model for every worker; the next acquire() waits it out
+            block_until(api_key, model, delay)
+        else:
+            time.sleep(delay)
+        attempt += 1
+
+
+async def async_scheduled_post(client, url, api_key, model, estimated_tokens, **kwargs):
+    """
+    Async version of scheduled_post() using an httpx.AsyncClient.
+    Accepts the same keyword arguments as client.post and returns the final response.
+    """
+    max_retries = getattr(settings, 'LLM_MAX_RETRIES', 5)
+
+    attempt = 0
+    while True:
+        await async_acquire(api_key, model, estimated_tokens)
+        response = await client.post(url, **kwargs)
+
+        if response.status_code not in RETRY_STATUS_CODES:
+            await _db(sync_from_headers)(api_key, model, response.headers)
+            return response
+
+        if attempt >= max_retries:
+            logger.error(f"Giving up on {model} request after {attempt + 1} attempts (HTTP {response.status_code})")
+            return response
+
+        delay = _retry_delay(response, attempt)
+        logger.warning(f"HTTP {response.status_code} from Groq for {model}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+        if response.status_code == 429:
+            await _db(block_until)(api_key, model, delay)
+        else:
+            await asyncio.sleep(delay)
+        attempt += 1
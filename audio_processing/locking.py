@@ -0,0 +1,223 @@
+"""
+Per-podcast, per-stage leases so the same work never runs twice at once.
+
+A lease is a PodcastLease row claimed with a single conditional UPDATE: the
+claim succeeds only if the row is free or its previous lease has expired, so
+two workers can't both hold it, and a worker that dies without releasing it
+only blocks the work for PODCAST_LEASE_SECONDS. Workers take the lease before
+any download or LLM request and give up immediately when it is taken.
+
+Enqueueing is deduplicated on the same rows: enqueue() sends a task only if no
+task for that work is already waiting (enqueued within ENQUEUE_DEDUP_SECONDS
+and not yet picked up) and no worker holds the lease, so double clicks and
+overlapping admin selections don't queue duplicates. Work re-sent later with
+mark_enqueued() counts as queued the same way.
+
+A lease holder takes one of its provider's in-flight slots with claim_slot().
+Claims lock the provider's ProviderCircuit row, so two workers can't both
+take the last slot.
+
+Checkpointed jobs (JobCheckpoint) are leased the same way with claim_job(), so
+a resumed re-tag or backfill can't run twice at once. The job lease lasts
+JOB_LEASE_SECONDS and is renewed as the job makes progress.
+"""
+import contextlib
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def _lease_rows(podcast_id, name):
+    from .models import PodcastLease
+
+    PodcastLease.objects.get_or_create(podcast_id=podcast_id, name=name)
+    return PodcastLease.objects.filter(podcast_id=podcast_id, name=name)
+
+
+def _free(now):
+    return Q(expires_at__isnull=True) | Q(expires_at__lte=now)
+
+
+def acquire(podcast_id, name, seconds=None, provider=''):
+    """
+    Take the lease on a podcast's work, sent to provider if it calls one.
+    Returns the owner token, or None if another worker holds it.
+    """
+    if seconds is None:
+        seconds = getattr(settings, 'PODCAST_LEASE_SECONDS', 3600)
+    token = uuid.uuid4().hex
+    now = timezone.now()
+
+    claimed = _lease_rows(podcast_id, name).filter(_free(now)).update(
+        owner=token,
+        expires_at=now + timedelta(seconds=seconds),
+        enqueued_at=None,
+        admitted=False,
+        provider=provider,
+    )
+    if not claimed:
+        logger.info(f"{name} for podcast {podcast_id} is already running, skipping")
+        return None
+    return token
+
+
+def release(podcast_id, name, token):
+    """Give up a lease, if it is still held by token."""
+    from .models import PodcastLease
+
+    PodcastLease.objects.filter(podcast_id=podcast_id, name=name, owner=token).update(owner='', expires_at=None, admitted=False)
+
+
+def claim_slot(podcast_id, name, provider, limit):
+    """
+    Take one of provider's limit in-flight slots for a lease the caller holds.
+    Returns whether a slot was free.
+    """
+    from .models import PodcastLease, ProviderCircuit
+
+    with transaction.atomic():
+        # Serializes claims for the provider; the row is shared with circuit_breaker
+        ProviderCircuit.objects.get_or_create(provider=provider)
+        ProviderCircuit.objects.select_for_update().get(provider=provider)
+
+        now = timezone.now()
+        taken = PodcastLease.objects.filter(provider=provider, admitted=True, expires_at__gt=now).exclude(
+            podcast_id=podcast_id, name=name
+        ).count()
+        if taken >= limit:
+            return False
+        PodcastLease.objects.filter(podcast_id=podcast_id, name=name, expires_at__gt=now).update(admitted=True)
+        return True
+
+
+@contextlib.contextmanager
+def lease(podcast_id, name, seconds=None, provider=''):
+    """Hold a lease for the duration of the block. Yields whether it was acquired."""
+    token = acquire(podcast_id, name, seconds, provider)
+    try:
+        yield token is not None
+    finally:
+        if token is not None:
+            release(podcast_id, name, token)
+
+
+def enqueue(task, podcast, name, *args, provider='', **kwargs):
+    """
+    Send task(podcast.id, *args, **kwargs) unless the same work is already queued
+    or running, on the podcast's queue and priority (see celery.podcast_options).
+    Returns whether the task was sent.
+    """
+    from .celery import podcast_options
+
+    podcast_id = podcast.pk
+    now = timezone.now()
+    dedup_window = timedelta(seconds=getattr(settings, 'ENQUEUE_DEDUP_SECONDS', 3600))
+
+    marked = _lease_rows(podcast_id, name).filter(_free(now)).filter(
+        Q(enqueued_at__isnull=True) | Q(enqueued_at__lte=now - dedup_window)
+    ).update(enqueued_at=now, provider=provider)
+    if not marked:
+        logger.info(f"{name} for podcast {podcast_id} is already queued or running, not enqueueing again")
+        return False
+
+    try:
+        task.apply_async((podcast_id,) + args, kwargs, **podcast_options(podcast))
+    except Exception:
+        _lease_rows(podcast_id, name).filter(enqueued_at=now).update(enqueued_at=None)
+        raise
+    return True
+
+
+def mark_enqueued(podcast_id, name):
+    """Record that a task for this work was re-sent, so enqueue() doesn't send another meanwhile."""
+    _lease_rows(podcast_id, name).update(enqueued_at=timezone.now())
+
+
+def claim_job(job, seconds=None):
+    """
+    Take the lease on a checkpointed job, recording the owner token on job.
+    Returns whether it was acquired; False if another worker is running the job.
+    """
+    from .models import JobCheckpoint
+
+    if seconds is None:
+        seconds = getattr(settings, 'JOB_LEASE_SECONDS', 900)
+    token = uuid.uuid4().hex
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=seconds)
+
+    claimed = JobCheckpoint.objects.filter(pk=job.pk).filter(
+        Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now)
+    ).update(owner=token, lease_expires_at=expires_at)
+    if not claimed:
+        logger.info(f"Job {job.name} is already being run by another worker")
+        return False
+    job.owner, job.lease_expires_at = token, expires_at
+    return True
+
+
+def renew_job(job, seconds=None):
+    """
+    Extend the lease on a job claimed with claim_job(). Returns False if it was lost.
+    The row is only updated once half the lease has passed, so this is cheap to call often.
+    """
+    from .models import JobCheckpoint
+
+    if seconds is None:
+        seconds = getattr(settings, 'JOB_LEASE_SECONDS', 900)
+    now = timezone.now()
+    if job.lease_expires_at and job.lease_expires_at - now > timedelta(seconds=seconds / 2):
+        return True
+    expires_at = now + timedelta(seconds=seconds)
+    if not JobCheckpoint.objects.filter(pk=job.pk, owner=job.owner).update(lease_expires_at=expires_at):
+        logger.warning(f"Lost the lease on job {job.name}")
+        return False
+    job.lease_expires_at = expires_at
+    return True
+
+
+def release_job(job):
+    """Give up the lease on a job, if it is still held."""
+    from .models import JobCheckpoint
+
+    JobCheckpoint.objects.filter(pk=job.pk, owner=job.owner).update(owner='', lease_expires_at=None)
+    job.owner, job.lease_expires_at = '', None
+
+
+@contextlib.contextmanager
+def job_lease(job, seconds=None):
+    """Hold the lease on a checkpointed job for the duration of the block. Yields whether it was acquired."""
+    acquired = claim_job(job, seconds)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            release_job(job)
+
+
+def running(provider):
+    """Work for provider that a worker is running now: leases held and not expired."""
+    from .models import PodcastLease
+
+    return PodcastLease.objects.filter(provider=provider, expires_at__gt=timezone.now()).count()
+
+
+def queued(provider):
+    """Work for provider that is enqueued but not picked up by a worker yet."""
+    from .models import PodcastLease
+
+    now = timezone.now()
+    dedup_window = timedelta(seconds=getattr(settings, 'ENQUEUE_DEDUP_SECONDS', 3600))
+    return PodcastLease.objects.filter(provider=provider, enqueued_at__gt=now - dedup_window).filter(_free(now)).count()
+
+
+def in_flight(provider):
+    """Work for provider that is queued or running."""
+    return running(provider) + queued(provider)
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from audio_processing import locking, backfill
+from audio_processing.models import JobCheckpoint
+from audio_processing.stage_state import STAGE_VERSIONS
+
+
+class Command(BaseCommand):
+    help = "Reprocess one stage across the corpus in key-ordered, checkpointed chunks at a target rate."
+
+    def add_arguments(self, parser):
+        parser.add_argument('stage', nargs='?', choices=list(STAGE_VERSIONS), help="Stage to backfill")
+        parser.add_argument('--mode', choices=backfill.MODES, default=backfill.ENQUEUE, help="Enqueue each podcast's stage task, or run the stage in this process")
+        parser.add_argument('--state', choices=backfill.STATES, default='pending', help="Select podcasts by the stage's state (default: pending)")
+        parser.add_argument('--method', choices=['groq', 'aws'], help="Transcription provider for the transcript stage")
+        parser.add_argument('--feed-ids', type=int, nargs='+', help="Only podcasts from these RSS feeds")
+        parser.add_argument('--priority', choices=['high', 'normal', 'backlog'], help="Only podcasts with this explicit priority")
+        parser.add_argument('--released-after', help="Only podcasts released at or after this ISO datetime")
+        parser.add_argument('--released-before', help="Only podcasts released before this ISO datetime")
+        parser.add_argument('--refresh-cache', action='store_true', help="Don't reuse cached LLM responses, e.g. after bumping the stage in STAGE_VERSIONS")
+        parser.add_argument('--chunk-size', type=int, default=None, help="Podcasts per checkpoint (default: BACKFILL_CHUNK_SIZE)")
+        parser.add_argument('--rate', type=float, default=None, help="Podcasts per second at most (default: BACKFILL_RATE_PER_SECOND)")
+        parser.add_argument('--dry-run', action='store_true', help="Count the podcasts and estimate throughput without processing anything")
+        parser.add_argument('--resume', metavar='JOB_NAME', help="Resume an interrupted job by name")
+
+    def handle(self, *args, **options):
+        if options['rate'] is not None and options['rate'] <= 0:
+            raise CommandError("--rate must be positive")
+
+        if options['resume']:
+            try:
+                job = JobCheckpoint.objects.get(name=options['resume'], kind=backfill.KIND)
+            except JobCheckpoint.DoesNotExist:
+                raise CommandError(f"No backfill job named {options['resume']}")
+            if job.status == 'completed':
+                raise CommandError(f"Job {job.name} already completed")
+            if options['dry_run']:
+                remaining = backfill.candidate_podcasts(job.params).filter(pk__gt=job.cursor).count()
+                self._print_estimate(backfill.estimate(job.params, remaining, options['rate']))
+                return
+            self.stdout.write(f"Resuming {job.name} after podcast {job.cursor} ({job.processed_count}/{job.total_count} done)")
+        else:
+            if not options['stage']:
+                raise CommandError("Give a stage to backfill, or --resume JOB_NAME")
+            params = {
+                'stage': options['stage'],
+                'mode': options['mode'],
+                'state': options['state'],
+                'method': options['method'],
+                'feed_ids': options['feed_ids'],
+                'priority': options['priority'],
+                'released_after': self._parse_datetime(options['released_after']),
+                'released_before': self._parse_datetime(options['released_before']),
+                'refresh_cache': options['refresh_cache'],
+            }
+            try:
+                job_params = backfill.build_params(**params)
+            except ValueError as e:
+                raise CommandError(str(e))
+
+            if options['dry_run']:
+                total = backfill.candidate_podcasts(job_params).count()
+                self._print_estimate(backfill.estimate(job_params, total, options['rate']))
+                return
+
+            job = backfill.start_job(**params)
+            self.stdout.write(f"Started {job.name}: {job.total_count} podcasts")
+
+        with locking.job_lease(job) as acquired:
+            if not acquired:
+                raise CommandError(f"{job.name} is being run by another worker")
+            try:
+                job = backfill.run_job(job, options['chunk_size'], options['rate'])
+            except KeyboardInterrupt:
+                raise CommandError(f"Interrupted; {job.name} is checkpointed. Resume with --resume {job.name}")
+
+        if job.status == 'completed':
+            verb = 'enqueued' if job.params['mode'] == backfill.ENQUEUE else 'run'
+            self.stdout.write(self.style.SUCCESS(
+                f"{job.name} completed: {job.processed_count} podcasts processed ({job.params['sent']} {verb}, "
+                f"{job.params['duplicates']} already queued, {job.params['skipped']} up to date), {job.failed_count} failed."
+            ))
+            if job.failed_count:
+                self.stderr.write(f"Last error: {job.last_error}")
+        else:
+            raise CommandError(f"{job.name} failed after podcast {job.cursor}: {job.last_error}. Resume with --resume {job.name}")
+
+    def _parse_datetime(self, value):
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise CommandError(f"Invalid datetime: {value}")
+        return parsed
+
+    def _print_estimate(self, estimate):
+        self.stdout.write(f"Podcasts: {estimate['total']} in {estimate['chunks']} chunks")
+        self.stdout.write(f"Target rate: {estimate['target_rate']:.2f}/s")
+        if estimate['provider_rate'] is None:
+            self.stdout.write("Provider throughput: unknown (no completed runs of this stage, or no in-flight limit)")
+        else:
+            self.stdout.write(
+                f"Provider throughput: {estimate['provider_rate']:.2f}/s "
+                f"(mean stage run {estimate['mean_stage_seconds']:.1f}s)"
+            )
+        self.stdout.write(f"Expected throughput: {estimate['throughput']:.2f}/s")
+        if estimate['estimated_seconds'] is not None:
+            self.stdout.write(f"Estimated duration: {timedelta(seconds=round(estimate['estimated_seconds']))}")
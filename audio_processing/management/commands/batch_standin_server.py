@@ -0,0 +1,156 @@
+import json
+import re
+import threading
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+def canned_content(body):
+    """A plausible response for a batched chat request, good enough for the writers to apply."""
+    if body.get('response_format', {}).get('type') == 'json_object':
+        return json.dumps({
+            "tag_ids": [],
+            "summary": "Stand-in summary of the episode.",
+            "guest_names": [],
+            "topics": ["stand-in"],
+        })
+
+    prompt = body['messages'][-1]['content'] if body.get('messages') else ''
+    if 'suggests relevant tags' in prompt:
+        return "[]"
+    if 'speaker identification' in prompt:
+        return "Speaker 1: Stand-in speaker script."
+    return "Stand-in summary of the episode."
+
+
+class StandinBatchAPI:
+    """In-memory implementation of the file and batch endpoints used by llm_batch."""
+
+    def __init__(self):
+        self.files = {}
+        self.batches = {}
+        self.lock = threading.Lock()
+
+    def add_file(self, content):
+        file_id = f"file_{uuid.uuid4().hex}"
+        with self.lock:
+            self.files[file_id] = content
+        return file_id
+
+    def create_batch(self, input_file_id):
+        """Process the whole batch immediately; polling sees it as completed."""
+        outputs = []
+        for line in self.files[input_file_id].decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            outputs.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": request['custom_id'],
+                "response": {
+                    "status_code": 200,
+                    "body": {
+                        "model": request['body'].get('model'),
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": canned_content(request['body'])}}],
+                    },
+                },
+                "error": None,
+            }))
+
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        batch = {
+            "id": batch_id,
+            "object": "batch",
+            "input_file_id": input_file_id,
+            "output_file_id": self.add_file("\n".join(outputs).encode('utf-8')),
+            "error_file_id": None,
+            "status": "completed",
+            "request_counts": {"total": len(outputs), "completed": len(outputs), "failed": 0},
+        }
+        with self.lock:
+            self.batches[batch_id] = batch
+        return batch
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_body(self):
+            return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        def do_POST(self):
+            body = self._read_body()
+            path = self.path.rstrip('/')
+
+            if path.endswith('/files'):
+                # Parse the multipart upload with the stdlib email parser
+                message = BytesParser(policy=HTTP).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode('utf-8') + body
+                )
+                for part in message.iter_parts():
+                    if part.get_param('name', header='content-disposition') == 'file':
+                        file_id = api.add_file(part.get_payload(decode=True))
+                        return self._send_json(200, {"id": file_id, "object": "file", "purpose": "batch"})
+                return self._send_json(400, {"error": {"message": "Missing file"}})
+
+            if path.endswith('/batches'):
+                input_file_id = json.loads(body or b'{}').get('input_file_id')
+                if input_file_id not in api.files:
+                    return self._send_json(404, {"error": {"message": "Unknown input file"}})
+                return self._send_json(200, api.create_batch(input_file_id))
+
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+        def do_GET(self):
+            match = re.search(r'/batches/([^/]+)$', self.path)
+            if match:
+                batch = api.batches.get(match.group(1))
+                if batch is None:
+                    return self._send_json(404, {"error": {"message": "Unknown batch"}})
+                return self._send_json(200, batch)
+
+            match = re.search(r'/files/([^/]+)/content$', self.path)
+            if match and match.group(1) in api.files:
+                content = api.files[match.group(1)]
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/jsonl')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+                return
+
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    return Handler
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Groq batch API that completes batches immediately with canned responses. "
+        "Point GROQ_BATCH_API_BASE at http://<host>:<port>/openai/v1 to exercise llm_batch end to end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer((options['host'], options['port']), make_handler(StandinBatchAPI()))
+        self.stdout.write(f"Stand-in batch API listening on http://{options['host']}:{options['port']}/openai/v1")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from audio_processing.async_enrichment import enrich_podcasts, STAGES, DEFAULT_STAGES
+from audio_processing.models import Podcast
+
+
+class Command(BaseCommand):
+    help = "Run LLM enrichment for many podcasts concurrently on one asyncio event loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument('podcast_ids', nargs='*', type=int, help="Podcast IDs to enrich (default: podcasts with a transcript but no summary or script)")
+        parser.add_argument('--stages', default=','.join(DEFAULT_STAGES), help=f"Comma-separated stages to run: {', '.join(STAGES)}")
+        parser.add_argument('--concurrency', type=int, default=None, help="Podcasts in flight at once (default: ASYNC_ENRICHMENT_CONCURRENCY)")
+        parser.add_argument('--limit', type=int, default=1000, help="Maximum number of podcasts to select when no IDs are given")
+
+    def handle(self, *args, **options):
+        stages = tuple(stage.strip() for stage in options['stages'].split(',') if stage.strip())
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            raise CommandError(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+        podcast_ids = options['podcast_ids']
+        if not podcast_ids:
+            podcast_ids = list(
+                Podcast.objects
+                .exclude(Q(transcript__isnull=True) | Q(transcript=''))
+                .filter(Q(summary__isnull=True) | Q(summary='') | Q(script_transcript__isnull=True) | Q(script_transcript=''))
+                .order_by('id')
+                .values_list('id', flat=True)[:options['limit']]
+            )
+
+        if not podcast_ids:
+            self.stdout.write("No podcasts to enrich.")
+            return
+
+        self.stdout.write(f"Enriching {len(podcast_ids)} podcasts ({', '.join(stages)})...")
+        results = enrich_podcasts(podcast_ids, stages, options['concurrency'])
+
+        failed = [result for result in results if result['errors']]
+        for result in failed[:20]:
+            self.stderr.write(f"Podcast {result['podcast_id']}: {'; '.join(result['errors'])}")
+        self.stdout.write(self.style.SUCCESS(f"Enriched {len(results) - len(failed)} podcasts, {len(failed)} with errors."))
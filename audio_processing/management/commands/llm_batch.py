@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from audio_processing.llm_batch import submit_batch, poll_batch, BatchAPIError, STAGES
+from audio_processing.models import Podcast, LLMBatchJob
+
+
+# Podcasts that are still missing each stage's output
+MISSING_OUTPUT = {
+    'tags': Q(tags__isnull=True),
+    'summary': Q(summary__isnull=True) | Q(summary=''),
+    'script': Q(script_transcript__isnull=True) | Q(script_transcript=''),
+    'enrichment': Q(summary__isnull=True) | Q(summary='') | Q(tags__isnull=True),
+}
+
+
+class Command(BaseCommand):
+    help = "Submit offline LLM batches for bulk backfills, or poll submitted batches and apply their results."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+
+        submit = subparsers.add_parser('submit', help="Render prompts for podcasts and submit them as one batch")
+        submit.add_argument('stage', choices=STAGES)
+        submit.add_argument('podcast_ids', nargs='*', type=int, help="Podcast IDs to include (default: podcasts with a transcript that are missing the stage's output)")
+        submit.add_argument('--limit', type=int, default=10000, help="Maximum number of podcasts to select when no IDs are given")
+
+        subparsers.add_parser('poll', help="Poll submitted batches and apply the results of completed ones")
+
+    def handle(self, *args, **options):
+        try:
+            if options['action'] == 'submit':
+                self._submit(options)
+            else:
+                self._poll()
+        except BatchAPIError as e:
+            raise CommandError(str(e))
+
+    def _submit(self, options):
+        stage = options['stage']
+        podcasts = Podcast.objects.exclude(Q(transcript__isnull=True) | Q(transcript=''))
+        if options['podcast_ids']:
+            podcasts = podcasts.filter(pk__in=options['podcast_ids'])
+        else:
+            podcast_ids = podcasts.filter(MISSING_OUTPUT[stage]).order_by('id').values_list('id', flat=True).distinct()
+            podcasts = Podcast.objects.filter(pk__in=list(podcast_ids[:options['limit']]))
+
+        job = submit_batch(podcasts.order_by('id').iterator(), stage)
+        if job is None:
+            self.stdout.write("No podcasts to submit.")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Submitted {stage} batch {job.provider_batch_id} with {job.request_count} requests."))
+
+    def _poll(self):
+        jobs = LLMBatchJob.objects.filter(status='submitted')
+        if not jobs.exists():
+            self.stdout.write("No submitted batches.")
+            return
+
+        for job in jobs:
+            job = poll_batch(job)
+            if job.status == 'applied':
+                self.stdout.write(self.style.SUCCESS(
+                    f"{job.stage} batch {job.provider_batch_id}: applied {job.applied_count}, {job.failed_count} failed."
+                ))
+            elif job.status == 'failed':
+                self.stderr.write(f"{job.stage} batch {job.provider_batch_id} failed: {job.provider_status}")
+            else:
+                self.stdout.write(f"{job.stage} batch {job.provider_batch_id}: {job.provider_status}")
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from audio_processing import locking, retagging
+from audio_processing.models import JobCheckpoint
+
+
+class Command(BaseCommand):
+    help = "Re-tag only the podcasts plausibly affected by new or edited tags, in checkpointed batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tag-ids', type=int, nargs='+', help="Re-tag for these tags instead of the ones changed since the last job")
+        parser.add_argument('--since', help="Re-tag for tags changed after this ISO datetime")
+        parser.add_argument('--resume', metavar='JOB_NAME', help="Resume an interrupted job by name")
+        parser.add_argument('--batch-size', type=int, default=None, help="Podcasts per checkpoint (default: RETAG_BATCH_SIZE)")
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                job = JobCheckpoint.objects.get(name=options['resume'], kind=retagging.KIND)
+            except JobCheckpoint.DoesNotExist:
+                raise CommandError(f"No re-tag job named {options['resume']}")
+            if job.status == 'completed':
+                raise CommandError(f"Job {job.name} already completed")
+            self.stdout.write(f"Resuming {job.name} after podcast {job.cursor} ({job.processed_count}/{job.total_count} done)")
+        else:
+            since = None
+            if options['since']:
+                since = parse_datetime(options['since'])
+                if since is None:
+                    raise CommandError(f"Invalid datetime: {options['since']}")
+            job = retagging.start_job(options['tag_ids'], since)
+            if job is None:
+                self.stdout.write("Nothing to re-tag.")
+                return
+            self.stdout.write(f"Started {job.name}: {job.total_count} candidate podcasts for tags {job.params['tag_ids']}")
+
+        with locking.job_lease(job) as acquired:
+            if not acquired:
+                raise CommandError(f"{job.name} is being run by another worker")
+            job = retagging.run_job(job, options['batch_size'])
+        if job.status == 'completed':
+            self.stdout.write(self.style.SUCCESS(
+                f"{job.name} completed: {job.processed_count} podcasts processed, {job.failed_count} failed."
+            ))
+        else:
+            raise CommandError(f"{job.name} failed at podcast {job.cursor}: {job.last_error}. Resume with --resume {job.name}")
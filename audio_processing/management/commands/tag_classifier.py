@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from audio_processing import tag_classifier
+from audio_processing.models import Podcast
+
+
+class Command(BaseCommand):
+    help = "Rebuild the local tag classifier, or show how it would tag episodes."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(dest='action', required=True)
+
+        subparsers.add_parser('rebuild', help="Retrain the classifier from the tag catalog and every tagged episode")
+
+        classify = subparsers.add_parser('classify', help="Show the classifier's decision for episodes without applying it")
+        classify.add_argument('podcast_ids', nargs='+', type=int)
+
+    def handle(self, *args, **options):
+        if options['action'] == 'rebuild':
+            started = time.monotonic()
+            classifier = tag_classifier.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f"Rebuilt tag classifier: {len(classifier.tag_ids)} tags, {classifier.document_count} episodes "
+                f"in {time.monotonic() - started:.1f}s."
+            ))
+            return
+
+        for podcast in Podcast.objects.filter(pk__in=options['podcast_ids']).prefetch_related('tags'):
+            started = time.monotonic()
+            result = tag_classifier.classify(podcast.transcript or '')
+            elapsed_ms = (time.monotonic() - started) * 1000
+            if result is None:
+                raise CommandError("The tag classifier is disabled or has not been trained yet.")
+
+            tag_ids, uncertain_ids = result
+            current = sorted(tag.id for tag in podcast.tags.all())
+            if not tag_ids:
+                decision = "no confident tags, would ask the LLM"
+            elif uncertain_ids:
+                decision = f"would apply {tag_ids} and ask the LLM about {uncertain_ids}"
+            else:
+                decision = f"would apply {tag_ids}"
+            self.stdout.write(f"Podcast {podcast.id}: {decision} (current tags {current}, {elapsed_ms:.1f} ms)")
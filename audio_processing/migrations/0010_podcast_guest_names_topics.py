@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0009_podcast_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='guest_names',
+            field=models.JSONField(blank=True, default=list, help_text="AI-extracted names of the episode's guests"),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='topics',
+            field=models.JSONField(blank=True, default=list, help_text='AI-extracted topics discussed in the episode'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0010_podcast_guest_names_topics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='partial_outputs',
+            field=models.JSONField(blank=True, default=dict, help_text='Partial streamed LLM output per stage, used to resume interrupted requests'),
+        ),
+    ]
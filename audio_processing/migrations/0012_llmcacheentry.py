@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0011_podcast_partial_outputs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='SHA-256 of the model, parameters and rendered messages', max_length=64, unique=True)),
+                ('model', models.CharField(help_text='LLM model that produced the response', max_length=100)),
+                ('response', models.TextField(help_text='Cached response content')),
+                ('hit_count', models.PositiveIntegerField(default=0, help_text='Number of times this response was served from the cache')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed_at', models.DateTimeField(db_index=True, help_text='Last time this response was stored or served')),
+                ('expires_at', models.DateTimeField(blank=True, db_index=True, help_text='When this entry stops being served', null=True)),
+            ],
+            options={
+                'verbose_name': 'LLM Cache Entry',
+                'verbose_name_plural': 'LLM Cache Entries',
+                'ordering': ['-last_accessed_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-19 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0012_llmcacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(help_text='API provider, e.g. groq', max_length=50)),
+                ('api_key_id', models.CharField(help_text='Hash prefix identifying the API key (never the key itself)', max_length=16)),
+                ('model', models.CharField(help_text='Model the limit applies to', max_length=100)),
+                ('kind', models.CharField(choices=[('requests', 'Requests per minute'), ('tokens', 'Tokens per minute')], max_length=10)),
+                ('capacity', models.FloatField(help_text='Maximum units available at once (the per-minute limit)')),
+                ('available', models.FloatField(help_text='Units currently available')),
+                ('refill_per_second', models.FloatField(help_text='Units added back per second')),
+                ('blocked_until', models.DateTimeField(blank=True, help_text='No requests are sent before this time (set from retry-after)', null=True)),
+                ('updated_at', models.DateTimeField(help_text='Last time available was refilled')),
+            ],
+            options={
+                'verbose_name': 'Rate Limit Bucket',
+                'verbose_name_plural': 'Rate Limit Buckets',
+                'constraints': [models.UniqueConstraint(fields=('provider', 'api_key_id', 'model', 'kind'), name='unique_rate_limit_bucket')],
+            },
+        ),
+    ]
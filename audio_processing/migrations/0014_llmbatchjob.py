@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0013_ratelimitbucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMBatchJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(choices=[('tags', 'Tags'), ('summary', 'Summary'), ('script', 'Speaker script'), ('enrichment', 'Combined enrichment')], help_text='Enrichment stage the batch produces', max_length=20)),
+                ('status', models.CharField(choices=[('submitted', 'Submitted'), ('completed', 'Completed'), ('applied', 'Applied'), ('failed', 'Failed')], db_index=True, default='submitted', max_length=20)),
+                ('provider_batch_id', models.CharField(blank=True, help_text='Batch ID returned by the provider', max_length=255)),
+                ('provider_status', models.CharField(blank=True, help_text='Last status reported by the provider', max_length=50)),
+                ('input_file_id', models.CharField(blank=True, max_length=255)),
+                ('output_file_id', models.CharField(blank=True, max_length=255)),
+                ('error_file_id', models.CharField(blank=True, max_length=255)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('applied_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list, help_text='Per-request errors from the batch output')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'LLM Batch Job',
+                'verbose_name_plural': 'LLM Batch Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0014_llmbatchjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagClassifierArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=0, help_text='Incremented on every update so workers reload the model')),
+                ('data', models.BinaryField(help_text='Compressed NumPy arrays of the hashed TF-IDF tag classifier')),
+                ('metadata', models.JSONField(default=dict, help_text='Tag order, example counts, seed texts and training labels')),
+                ('labeled_documents', models.PositiveIntegerField(default=0, help_text='Tagged episodes the model was trained on')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Tag Classifier Artifact',
+                'verbose_name_plural': 'Tag Classifier Artifacts',
+            },
+        ),
+    ]
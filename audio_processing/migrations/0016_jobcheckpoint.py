@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0015_tagclassifierartifact'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Unique name of the job run', max_length=255, unique=True)),
+                ('kind', models.CharField(db_index=True, help_text="Type of job, e.g. 'retag'", max_length=50)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='running', max_length=20)),
+                ('params', models.JSONField(blank=True, default=dict, help_text='Parameters the job was started with')),
+                ('cursor', models.BigIntegerField(default=0, help_text='ID of the last processed row; the job resumes after it')),
+                ('total_count', models.PositiveIntegerField(default=0, help_text='Rows selected when the job started')),
+                ('processed_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Job Checkpoint',
+                'verbose_name_plural': 'Job Checkpoints',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
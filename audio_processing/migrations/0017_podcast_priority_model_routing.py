@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0016_jobcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='model_routing',
+            field=models.JSONField(blank=True, default=dict, help_text='Model chosen for each stage and why (see model_routing)'),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='priority',
+            field=models.CharField(blank=True, choices=[('high', 'High (breaking news)'), ('normal', 'Normal'), ('backlog', 'Backlog')], default='', help_text='Processing priority; derived from the release date when blank (see model_routing)', max_length=10),
+        ),
+    ]
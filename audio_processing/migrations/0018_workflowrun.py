@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0017_podcast_priority_model_routing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrichment', models.CharField(help_text="'combined' or 'separate' enrichment stages", max_length=20)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='running', max_length=20)),
+                ('stages', models.JSONField(default=list, help_text='Stages that run in parallel after the transcript')),
+                ('stage_results', models.JSONField(blank=True, default=dict, help_text='Result of each finished stage')),
+                ('results', models.JSONField(blank=True, default=dict, help_text='Joined workflow results')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('transcribed_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('podcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workflow_runs', to='audio_processing.podcast')),
+            ],
+            options={
+                'verbose_name': 'Workflow Run',
+                'verbose_name_plural': 'Workflow Runs',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
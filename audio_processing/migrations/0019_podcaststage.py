@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0018_workflowrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PodcastStage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(help_text="Workflow stage, e.g. 'transcript' or 'summary'", max_length=20)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('input_fingerprint', models.CharField(blank=True, help_text='Hash of the inputs the stage last ran on', max_length=64)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('podcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stage_states', to='audio_processing.podcast')),
+            ],
+            options={
+                'verbose_name': 'Podcast Stage',
+                'verbose_name_plural': 'Podcast Stages',
+                'indexes': [models.Index(fields=['stage', 'status'], name='podcast_stage_status_idx'), models.Index(fields=['status', 'finished_at'], name='podcast_stage_finished_idx')],
+                'constraints': [models.UniqueConstraint(fields=('podcast', 'stage'), name='unique_podcast_stage')],
+            },
+        ),
+    ]
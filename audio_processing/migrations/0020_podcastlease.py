@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0019_podcaststage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PodcastLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text="Stage or task the lease guards, e.g. 'transcript' or 'workflow'", max_length=20)),
+                ('owner', models.CharField(blank=True, help_text='Token of the worker holding the lease', max_length=32)),
+                ('expires_at', models.DateTimeField(blank=True, help_text='The lease is free after this time', null=True)),
+                ('enqueued_at', models.DateTimeField(blank=True, help_text='When a task for this work was last enqueued', null=True)),
+                ('podcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leases', to='audio_processing.podcast')),
+            ],
+            options={
+                'verbose_name': 'Podcast Lease',
+                'verbose_name_plural': 'Podcast Leases',
+                'constraints': [models.UniqueConstraint(fields=('podcast', 'name'), name='unique_podcast_lease')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0020_podcastlease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='audio_bytes',
+            field=models.BigIntegerField(blank=True, help_text='Size of the audio file, from the feed enclosure or a HEAD request', null=True),
+        ),
+        migrations.AddField(
+            model_name='podcast',
+            name='duration_seconds',
+            field=models.PositiveIntegerField(blank=True, help_text='Length of the episode, from itunes:duration', null=True),
+        ),
+        migrations.AddField(
+            model_name='podcastlease',
+            name='provider',
+            field=models.CharField(blank=True, db_index=True, help_text='External provider the work is sent to, for per-provider concurrency limits', max_length=20),
+        ),
+    ]
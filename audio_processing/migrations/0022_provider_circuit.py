@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0021_transcription_scheduling'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderCircuit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(help_text='External provider, e.g. groq or aws', max_length=50, unique=True)),
+                ('failure_count', models.IntegerField(default=0, help_text='Consecutive failures since the last success')),
+                ('opened_until', models.DateTimeField(blank=True, help_text='Requests skip this provider until this time', null=True)),
+                ('last_failure_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Provider Circuit',
+                'verbose_name_plural': 'Provider Circuits',
+            },
+        ),
+    ]
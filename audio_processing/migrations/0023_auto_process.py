@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0022_provider_circuit'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcast',
+            name='auto_enqueued_at',
+            field=models.DateTimeField(blank=True, help_text='When the workflow was started automatically after ingest (see auto_process)', null=True),
+        ),
+        migrations.AddField(
+            model_name='rssfeed',
+            name='auto_process',
+            field=models.BooleanField(default=False, help_text='Run the complete workflow on new episodes as soon as they are ingested'),
+        ),
+        migrations.AddField(
+            model_name='rssfeed',
+            name='auto_process_backlog_limit',
+            field=models.PositiveIntegerField(default=5, help_text='Most back-catalog episodes to process automatically, newest first'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0023_auto_process'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(db_index=True, help_text='Admin action the job runs (see background_jobs)', max_length=50)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], db_index=True, default='queued', max_length=20)),
+                ('requested_by', models.CharField(blank=True, help_text='Username of the admin who started the job', max_length=150)),
+                ('podcast_ids', models.JSONField(default=list, help_text='Podcasts selected when the job was started')),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('done_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('skipped_count', models.PositiveIntegerField(default=0)),
+                ('item_results', models.JSONField(blank=True, default=dict, help_text='Outcome per podcast ID: done, failed or skipped')),
+                ('item_errors', models.JSONField(blank=True, default=dict, help_text='Error or skip reason per podcast ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Background Job',
+                'verbose_name_plural': 'Background Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
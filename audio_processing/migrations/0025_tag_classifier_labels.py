@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:14
+
+from django.db import migrations, models
+
+
+def move_labels_to_table(apps, schema_editor):
+    """Training labels used to be stored in the artifact metadata."""
+    TagClassifierArtifact = apps.get_model('audio_processing', 'TagClassifierArtifact')
+    TagClassifierLabel = apps.get_model('audio_processing', 'TagClassifierLabel')
+    for artifact in TagClassifierArtifact.objects.all():
+        labels = artifact.metadata.pop('labels', {})
+        TagClassifierLabel.objects.bulk_create(
+            (
+                TagClassifierLabel(podcast_id=int(podcast_id), tag_id=tag_id)
+                for podcast_id, tag_ids in labels.items() for tag_id in tag_ids
+            ),
+            batch_size=1000, ignore_conflicts=True,
+        )
+        artifact.save(update_fields=['metadata'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0024_background_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagClassifierUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('podcast_id', models.IntegerField(blank=True, help_text='Episode whose tags changed, if any', null=True)),
+                ('sync_tags', models.BooleanField(default=False, help_text='Whether the tag catalog itself changed')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Tag Classifier Update',
+                'verbose_name_plural': 'Tag Classifier Updates',
+            },
+        ),
+        migrations.AddField(
+            model_name='tagclassifierartifact',
+            name='update_due_at',
+            field=models.DateTimeField(blank=True, help_text='When the queued update_tag_classifier task will run, if one is queued', null=True),
+        ),
+        migrations.AlterField(
+            model_name='tagclassifierartifact',
+            name='metadata',
+            field=models.JSONField(default=dict, help_text='Tag order, example counts and seed texts'),
+        ),
+        migrations.CreateModel(
+            name='TagClassifierLabel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('podcast_id', models.IntegerField(db_index=True, help_text='Episode the tag classifier was trained on')),
+                ('tag_id', models.IntegerField(db_index=True, help_text="Tag the episode's vector was added to")),
+            ],
+            options={
+                'verbose_name': 'Tag Classifier Label',
+                'verbose_name_plural': 'Tag Classifier Labels',
+                'constraints': [models.UniqueConstraint(fields=('podcast_id', 'tag_id'), name='unique_tag_classifier_label')],
+            },
+        ),
+        migrations.RunPython(move_labels_to_table, migrations.RunPython.noop),
+    ]
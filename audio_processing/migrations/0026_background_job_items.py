@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_item_outcomes_to_table(apps, schema_editor):
+    """Per-podcast outcomes used to be stored as JSON on the job."""
+    BackgroundJob = apps.get_model('audio_processing', 'BackgroundJob')
+    BackgroundJobItem = apps.get_model('audio_processing', 'BackgroundJobItem')
+    for job in BackgroundJob.objects.exclude(item_results={}):
+        BackgroundJobItem.objects.bulk_create(
+            (
+                BackgroundJobItem(job=job, podcast_id=int(podcast_id), status=status, message=job.item_errors.get(podcast_id, ''))
+                for podcast_id, status in job.item_results.items()
+            ),
+            batch_size=1000, ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0025_tag_classifier_labels'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJobItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('podcast_id', models.IntegerField(help_text='Podcast the outcome is for')),
+                ('status', models.CharField(choices=[('done', 'Done'), ('failed', 'Failed'), ('skipped', 'Skipped')], max_length=20)),
+                ('message', models.TextField(blank=True, help_text='Error or skip reason')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='audio_processing.backgroundjob')),
+            ],
+            options={
+                'verbose_name': 'Background Job Item',
+                'verbose_name_plural': 'Background Job Items',
+                'constraints': [models.UniqueConstraint(fields=('job', 'podcast_id'), name='unique_background_job_item')],
+            },
+        ),
+        migrations.RunPython(move_item_outcomes_to_table, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='backgroundjob',
+            name='item_errors',
+        ),
+        migrations.RemoveField(
+            model_name='backgroundjob',
+            name='item_results',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0026_background_job_items'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobcheckpoint',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text='Another worker may take the job over after this time', null=True),
+        ),
+        migrations.AddField(
+            model_name='jobcheckpoint',
+            name='owner',
+            field=models.CharField(blank=True, help_text='Token of the worker running the job', max_length=32),
+        ),
+    ]
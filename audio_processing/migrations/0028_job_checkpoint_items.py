@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0027_job_checkpoint_lease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCheckpointItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('podcast_id', models.IntegerField(help_text='Podcast selected when the job started')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='audio_processing.jobcheckpoint')),
+            ],
+            options={
+                'verbose_name': 'Job Checkpoint Item',
+                'verbose_name_plural': 'Job Checkpoint Items',
+                'constraints': [models.UniqueConstraint(fields=('job', 'podcast_id'), name='unique_job_checkpoint_item')],
+            },
+        ),
+    ]
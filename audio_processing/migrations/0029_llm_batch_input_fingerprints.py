@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0028_job_checkpoint_items'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='llmbatchjob',
+            name='input_fingerprints',
+            field=models.JSONField(blank=True, default=dict, help_text='Stage input fingerprint of each podcast when the batch was submitted'),
+        ),
+    ]
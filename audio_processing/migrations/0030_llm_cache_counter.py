@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0029_llm_batch_input_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMCacheCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Counted event: hits, misses, stores or evictions', max_length=20, unique=True)),
+                ('count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'LLM Cache Counter',
+                'verbose_name_plural': 'LLM Cache Counters',
+                'ordering': ['name'],
+            },
+        ),
+    ]
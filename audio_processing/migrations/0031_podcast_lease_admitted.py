@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audio_processing', '0030_llm_cache_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='podcastlease',
+            name='admitted',
+            field=models.BooleanField(default=False, help_text="Whether the holder took one of its provider's in-flight slots"),
+        ),
+    ]
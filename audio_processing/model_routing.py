@@ -0,0 +1,141 @@
+"""
+Tiered model routing for the transcription and LLM stages.
+
+Each stage has a list of model tiers, cheapest and fastest first, with the
+model the stage always used before as the last tier (MODEL_ROUTING_TIERS
+overrides the defaults below). The model for a request is picked from:
+
+- the podcast's priority class: 'high' always gets the last tier, so breaking
+  news keeps full quality; 'backlog' gets the cheapest tier that fits; 'normal'
+  gets the cheapest tier that fits for inputs up to ROUTING_SMALL_INPUT_TOKENS
+  and the last tier above that. Podcasts without an explicit priority are
+  'high' when released within ROUTING_RECENT_HOURS and 'backlog' when released
+  more than ROUTING_BACKLOG_DAYS ago.
+- the prompt length: a tier is only used if the whole prompt, instructions
+  included, and the response fit its context window (see prompt_budget).
+  Callers pass the tokens of the prompt they will send, not of the transcript.
+- the remaining quota: when the picked model has less than
+  ROUTING_MIN_QUOTA_FRACTION of its rate limit left, another fitting tier with
+  more headroom is used instead. High-priority requests are never downgraded.
+
+Every decision is recorded in Podcast.model_routing, keyed by stage.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+HIGH = 'high'
+NORMAL = 'normal'
+BACKLOG = 'backlog'
+
+DEFAULT_TIERS = {
+    'transcription': ['whisper-large-v3-turbo', 'whisper-large-v3'],
+    'tags': ['llama3-8b-8192'],
+    'roster': ['llama3-8b-8192'],
+    'segment_summary': ['llama3-8b-8192', 'llama3-70b-8192'],
+    'summary': ['llama3-8b-8192', 'llama3-70b-8192'],
+    'enrichment': ['llama3-8b-8192', 'llama3-70b-8192'],
+    'script': ['llama3-70b-8192', 'deepseek-r1-distill-llama-70b'],
+}
+
+
+def get_tiers(stage):
+    """Model tiers for a stage, cheapest first."""
+    tiers = getattr(settings, 'MODEL_ROUTING_TIERS', {}) or {}
+    return tiers.get(stage) or DEFAULT_TIERS[stage]
+
+
+def get_priority(podcast):
+    """The podcast's priority class, derived from its release date unless set explicitly."""
+    if getattr(podcast, 'priority', ''):
+        return podcast.priority
+
+    release_date = getattr(podcast, 'release_date', None)
+    if release_date is None:
+        return NORMAL
+    age = timezone.now() - release_date
+    if age <= timedelta(hours=getattr(settings, 'ROUTING_RECENT_HOURS', 48)):
+        return HIGH
+    if age > timedelta(days=getattr(settings, 'ROUTING_BACKLOG_DAYS', 30)):
+        return BACKLOG
+    return NORMAL
+
+
+def _fits(model, input_tokens, max_tokens):
+    from .prompt_budget import available_tokens
+
+    if input_tokens is None:
+        return True
+    return available_tokens(model, max_tokens) >= input_tokens
+
+
+def _quota(model):
+    from .llm_scheduler import remaining_quota
+
+    api_key = getattr(settings, 'GROQ_API_KEY', '')
+    if not api_key:
+        return 1.0
+    try:
+        return remaining_quota(api_key, model)
+    except Exception as e:
+        logger.warning(f"Failed to read remaining quota for {model}: {str(e)}")
+        return 1.0
+
+
+def choose_model(stage, priority, input_tokens=None, max_tokens=0):
+    """
+    Pick the model for one request of a stage.
+    Returns (model, reason), where reason is a short explanation for the record.
+    """
+    tiers = get_tiers(stage)
+    quality = tiers[-1]
+    fitting = [model for model in tiers if _fits(model, input_tokens, max_tokens)]
+
+    if priority == HIGH or not fitting:
+        return quality, 'high priority' if priority == HIGH else 'no smaller tier fits'
+
+    small_limit = getattr(settings, 'ROUTING_SMALL_INPUT_TOKENS', 2000)
+    if priority == BACKLOG:
+        model, reason = fitting[0], 'backlog'
+    elif input_tokens is not None and input_tokens <= small_limit:
+        model, reason = fitting[0], 'short input'
+    else:
+        model, reason = quality if quality in fitting else fitting[-1], 'long input'
+
+    min_quota = getattr(settings, 'ROUTING_MIN_QUOTA_FRACTION', 0.2)
+    if len(fitting) > 1 and _quota(model) < min_quota:
+        quotas = {candidate: _quota(candidate) for candidate in fitting if candidate != model}
+        alternative = max(quotas, key=quotas.get)
+        if quotas[alternative] >= min_quota:
+            return alternative, f"{reason}, {model} quota low"
+    return model, reason
+
+
+def route(podcast, stage, input_tokens=None, max_tokens=0):
+    """
+    Pick the model for a podcast's stage and record the decision on the podcast.
+    input_tokens counts the full prompt that will be sent. Returns the model.
+    """
+    priority = get_priority(podcast)
+    model, reason = choose_model(stage, priority, input_tokens, max_tokens)
+    logger.info(f"Routed {stage} for {getattr(podcast, 'raw_audio_url', podcast)} to {model} ({reason})")
+
+    decision = {
+        'model': model,
+        'priority': priority,
+        'input_tokens': input_tokens,
+        'reason': reason,
+        'at': timezone.now().isoformat(),
+    }
+    if podcast.pk and hasattr(podcast, 'set_json_key'):
+        # Only this stage's key, so concurrent stages don't overwrite each other's decisions
+        podcast.set_json_key('model_routing', stage, decision)
+    else:
+        if getattr(podcast, 'model_routing', None) is None:
+            podcast.model_routing = {}
+        podcast.model_routing[stage] = decision
+    return model
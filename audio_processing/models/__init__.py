@@ -3,5 +3,21 @@ from .podcast import Podcast
 from .tag import Tag
 from .taggable_mixin import TaggableMixin
 from .summarizable_mixin import SummarizableMixin
+from .enrichable_mixin import EnrichableMixin
+from .llm_cache_entry import LLMCacheEntry
+from .llm_cache_counter import LLMCacheCounter
+from .rate_limit_bucket import RateLimitBucket
+from .llm_batch_job import LLMBatchJob
+from .tag_classifier_artifact import TagClassifierArtifact
+from .tag_classifier_label import TagClassifierLabel
+from .tag_classifier_update import TagClassifierUpdate
+from .job_checkpoint import JobCheckpoint
+from .job_checkpoint_item import JobCheckpointItem
+from .workflow_run import WorkflowRun
+from .podcast_stage import PodcastStage
+from .podcast_lease import PodcastLease
+from .provider_circuit import ProviderCircuit
+from .background_job import BackgroundJob
+from .background_job_item import BackgroundJobItem
 
-__all__ = ['RSSFeed', 'Podcast', 'Tag', 'TaggableMixin', 'SummarizableMixin']
+__all__ = ['RSSFeed', 'Podcast', 'Tag', 'TaggableMixin', 'SummarizableMixin', 'EnrichableMixin', 'LLMCacheEntry', 'LLMCacheCounter', 'RateLimitBucket', 'LLMBatchJob', 'TagClassifierArtifact', 'TagClassifierLabel', 'TagClassifierUpdate', 'JobCheckpoint', 'JobCheckpointItem', 'WorkflowRun', 'PodcastStage', 'PodcastLease', 'ProviderCircuit', 'BackgroundJob', 'BackgroundJobItem']
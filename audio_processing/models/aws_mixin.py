@@ -19,6 +19,17 @@ class AwsMixin():
         Ensures the audio file is uploaded to S3 first if needed.
         Returns the transcript text or None if failed.
         """
+        transcript = self.fetch_transcript_from_aws()
+        if transcript:
+            self.store_transcript(transcript)
+        return transcript
+
+    def fetch_transcript_from_aws(self, cancel_event=None):
+        """
+        Transcribe the audio with AWS Transcribe without saving it. Returns the text or None.
+        If cancel_event (a threading.Event) is set while the job runs, the job is
+        deleted and None is returned.
+        """
 
         s3_uri = self.upload_audio_to_s3(self.raw_audio_url)
         logger.info(f"Processing transcript with AWS Transcribe for: {self.raw_audio_url}")
@@ -93,18 +104,8 @@ class AwsMixin():
                     transcript_text = self._download_aws_transcript(transcript_uri)
                     
                     if transcript_text:
-                        self.transcript = transcript_text
-                        self.save()
                         logger.info(f"AWS Transcribe completed for: {self.raw_audio_url}")
-                        
-                        # Cleanup the transcription job
-                        try:
-                            transcribe_client.delete_transcription_job(
-                                TranscriptionJobName=job_name
-                            )
-                        except Exception as e:
-                            logger.warning(f"Failed to cleanup transcription job {job_name}: {str(e)}")
-                        
+                        self._delete_transcription_job(transcribe_client, job_name)
                         return transcript_text
                     else:
                         logger.error(f"Failed to download transcript from AWS for: {self.raw_audio_url}")
@@ -116,7 +117,12 @@ class AwsMixin():
                     return None
                 
                 # Wait before polling again
-                time.sleep(poll_interval)
+                if cancel_event is None:
+                    time.sleep(poll_interval)
+                elif cancel_event.wait(poll_interval):
+                    logger.info(f"Cancelling AWS Transcribe job {job_name} for: {self.raw_audio_url}")
+                    self._delete_transcription_job(transcribe_client, job_name)
+                    return None
                 elapsed_time += poll_interval
                 logger.info(f"AWS Transcribe job {job_name} status: {status} (elapsed: {elapsed_time}s)")
             
@@ -133,6 +139,14 @@ class AwsMixin():
         except Exception as e:
             logger.error(f"Failed to process transcript with AWS Transcribe for {self.raw_audio_url}: {str(e)}")
             return None
+
+    def _delete_transcription_job(self, transcribe_client, job_name):
+        try:
+            transcribe_client.delete_transcription_job(
+                TranscriptionJobName=job_name
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cleanup transcription job {job_name}: {str(e)}")
     
     def _download_aws_transcript(self, transcript_uri):
         """
@@ -0,0 +1,34 @@
+from django.db import models
+
+
+class BackgroundJob(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    action = models.CharField(max_length=50, db_index=True, help_text="Admin action the job runs (see background_jobs)")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', db_index=True)
+    requested_by = models.CharField(max_length=150, blank=True, help_text="Username of the admin who started the job")
+    podcast_ids = models.JSONField(default=list, help_text="Podcasts selected when the job was started")
+    total_count = models.PositiveIntegerField(default=0)
+    done_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Background Job"
+        verbose_name_plural = "Background Jobs"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.action} job {self.pk} ({self.status}, {self.finished_count}/{self.total_count})"
+
+    @property
+    def finished_count(self):
+        return self.done_count + self.failed_count + self.skipped_count
@@ -0,0 +1,25 @@
+from django.db import models
+
+
+class BackgroundJobItem(models.Model):
+    STATUS_CHOICES = [
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),
+    ]
+
+    job = models.ForeignKey('BackgroundJob', on_delete=models.CASCADE, related_name='items')
+    podcast_id = models.IntegerField(help_text="Podcast the outcome is for")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    message = models.TextField(blank=True, help_text="Error or skip reason")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Background Job Item"
+        verbose_name_plural = "Background Job Items"
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'podcast_id'], name='unique_background_job_item'),
+        ]
+
+    def __str__(self):
+        return f"Podcast {self.podcast_id}: {self.status}"
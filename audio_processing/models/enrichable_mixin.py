@@ -0,0 +1,144 @@
+import logging
+import json
+
+from ..llm_scheduler import RateLimitWaitExceeded
+
+logger = logging.getLogger(__name__)
+
+ENRICHMENT_MODEL = "llama3-70b-8192"
+ENRICHMENT_MAX_TOKENS = 1500
+
+
+def validate_enrichment(data, valid_tag_ids):
+    """
+    Validate and normalize a combined enrichment response.
+
+    Args:
+        data: The decoded JSON response
+        valid_tag_ids: Set of tag IDs that exist in the catalog
+
+    Returns:
+        dict: The cleaned result with tag_ids, summary, guest_names and topics,
+        or None if the response is not usable
+    """
+    if not isinstance(data, dict):
+        logger.error(f"Expected enrichment JSON object, got: {type(data)}")
+        return None
+
+    summary = data.get('summary')
+    if not isinstance(summary, str) or not summary.strip():
+        logger.error("Enrichment response is missing a summary")
+        return None
+
+    tag_ids = data.get('tag_ids', [])
+    if not isinstance(tag_ids, list):
+        logger.error(f"Expected list of tag IDs, got: {type(tag_ids)}")
+        return None
+
+    cleaned_tag_ids = []
+    for tag_id in tag_ids:
+        try:
+            tag_id = int(tag_id)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid tag ID in enrichment response: {tag_id}")
+            continue
+        if tag_id not in valid_tag_ids:
+            logger.warning(f"Tag with ID {tag_id} does not exist")
+            continue
+        if tag_id not in cleaned_tag_ids:
+            cleaned_tag_ids.append(tag_id)
+
+    def string_list(key):
+        values = data.get(key, [])
+        if not isinstance(values, list):
+            logger.warning(f"Ignoring non-list '{key}' in enrichment response")
+            return []
+        return [value.strip() for value in values if isinstance(value, str) and value.strip()]
+
+    return {
+        'tag_ids': cleaned_tag_ids,
+        'summary': summary.strip(),
+        'guest_names': string_list('guest_names'),
+        'topics': string_list('topics'),
+    }
+
+
+class EnrichableMixin:
+    """
+    Mixin to generate tags, summary and episode metadata with a single structured LLM request.
+    """
+
+    def enrich_with_llm(self):
+        """
+        Send the transcript to Groq once and apply the returned tags, summary, guest names
+        and topics. Transcripts that don't fit the model's context window are first reduced
+        to segment summaries (see SummarizableMixin), so each transcript token is still sent
+        only once. Tags the local classifier is confident about are applied without the LLM,
+        which is only asked about the uncertain ones (see TaggableMixin._prefilter_tags).
+        Returns the validated enrichment dict with the applied tag IDs, or None if failed.
+
+        Note: This method requires TaggableMixin, SummarizableMixin and GroqMixin.
+        """
+        from ..prompts import get_episode_enrichment_prompt
+
+        if not self._validate_transcript():
+            return None
+
+        tag_list = self._get_available_tags()
+        if tag_list is None:
+            return None
+
+        logger.info(f"Running combined enrichment for: {getattr(self, 'raw_audio_url', str(self))}")
+
+        try:
+            classifier_tag_ids, tag_list = self._prefilter_tags(tag_list)
+            tag_list = self._shortlist_tags(tag_list, self.transcript)
+
+            prompt, model = self._reduce_to_prompt_size(
+                'enrichment', ENRICHMENT_MAX_TOKENS,
+                lambda text, from_segment_summaries: get_episode_enrichment_prompt(tag_list, text, from_segment_summaries)
+            )
+            if prompt is None:
+                return None
+            response = self._call_groq_chat(prompt, model, ENRICHMENT_MAX_TOKENS, json_mode=True)
+            if response is None:
+                logger.error(f"Failed to get enrichment for: {getattr(self, 'raw_audio_url', str(self))}")
+                return None
+
+            enrichment = self._apply_enrichment(response, tag_list)
+            if enrichment is not None:
+                enrichment['tag_ids'] = classifier_tag_ids + [
+                    tag_id for tag_id in enrichment['tag_ids'] if tag_id not in classifier_tag_ids
+                ]
+            return enrichment
+
+        except RateLimitWaitExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to run combined enrichment for {getattr(self, 'raw_audio_url', str(self))}: {str(e)}")
+            return None
+
+    def _apply_enrichment(self, response, tag_list):
+        """
+        Parse and validate a combined enrichment response, then save the summary and
+        metadata and apply the tags. Returns the enrichment dict or None if invalid.
+        """
+        try:
+            data = json.loads(response)
+        except json.JSONDecodeError:
+            logger.error(f"Failed to parse enrichment response as JSON: {response}")
+            return None
+
+        enrichment = validate_enrichment(data, {tag['id'] for tag in tag_list})
+        if enrichment is None:
+            return None
+
+        self.summary = enrichment['summary']
+        self.guest_names = enrichment['guest_names']
+        self.topics = enrichment['topics']
+        # Only these columns, so stages running in parallel don't overwrite each other's results
+        self.save(update_fields=['summary', 'guest_names', 'topics', 'updated_at'])
+        enrichment['tag_ids'] = self._apply_tag_ids(enrichment['tag_ids'])
+
+        logger.info(f"Combined enrichment applied to: {getattr(self, 'raw_audio_url', str(self))}")
+        return enrichment
@@ -1,59 +1,391 @@
+import hashlib
+import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 import requests
 import re
+from ..llm_scheduler import RateLimitWaitExceeded, scheduled_post
 
 logger = logging.getLogger(__name__)
 
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+SCRIPT_MODEL = "deepseek-r1-distill-llama-70b"
+SCRIPT_MAX_TOKENS = 8000
+ROSTER_MODEL = "llama3-8b-8192"
+ROSTER_MAX_TOKENS = 200
+TAG_MODEL = "llama3-8b-8192"
+TAG_MAX_TOKENS = 100
+TRANSCRIPTION_MODEL = "whisper-large-v3"
+
+
+CONTINUE_PROMPT = (
+    "Your previous response was cut off. Continue exactly where it stopped, "
+    "without repeating any text that was already written and without any introduction."
+)
+
+
+def strip_think_blocks(content):
+    """Remove <think></think> reasoning blocks that some models include."""
+    return re.sub(r'<think>.*?</think>', '', content, flags=re.DOTALL).strip()
+
+
+def estimate_request_tokens(messages, max_tokens, model=None):
+    """
+    Estimate how many tokens a chat request counts against the TPM limit: the prompt
+    plus the expected response, at most LLM_OUTPUT_RESERVE_TOKENS. Reserving the full
+    max_tokens would let one large request drain a model's bucket; the remaining-token
+    headers of the response correct the estimate (see llm_scheduler.sync_from_headers).
+    """
+    from ..prompt_budget import count_tokens
+    expected_output = min(max_tokens, getattr(settings, 'LLM_OUTPUT_RESERVE_TOKENS', 500))
+    return sum(count_tokens(message['content'], model) for message in messages) + expected_output
+
+
+def build_chat_request(prompt, max_tokens, temperature=0.3, json_mode=False):
+    """
+    Build the messages and sampling parameters for a single-prompt chat request.
+    The same pair is used for the request body and the LLM cache key.
+    """
+    messages = [
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+    params = {
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
+    if json_mode:
+        params["response_format"] = {"type": "json_object"}
+    return messages, params
+
+
+def parse_speaker_roster(response):
+    """Extract the list of speaker names from a roster response."""
+    if not response:
+        return []
+    match = re.search(r'\[.*\]', response, flags=re.DOTALL)
+    try:
+        names = json.loads(match.group(0)) if match else []
+    except json.JSONDecodeError:
+        logger.warning(f"Failed to parse speaker roster response: {response}")
+        return []
+    if not isinstance(names, list):
+        return []
+    return [name.strip() for name in names if isinstance(name, str) and name.strip()]
+
+
+def merge_rosters(window_rosters):
+    """Merge per-window speaker rosters into one list, in order of first appearance."""
+    roster = []
+    seen = set()
+    for window_roster in window_rosters:
+        for name in window_roster:
+            if name.lower() not in seen:
+                seen.add(name.lower())
+                roster.append(name)
+    return roster
+
+
+def run_concurrently(func, items, max_workers=None):
+    """
+    Call func on each item in a thread pool and return the results in order.
+    Each worker thread closes its database connections when it is done, since
+    the LLM cache and partial-output saves may have opened them.
+    """
+    from django.db import connections
+
+    items = list(items)
+    if not items:
+        return []
+    if max_workers is None:
+        max_workers = getattr(settings, 'LLM_MAX_CONCURRENCY', 8)
+
+    def call(item):
+        try:
+            return func(item)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(items), max_workers))) as executor:
+        return list(executor.map(call, items))
+
+
+class ThinkBlockFilter:
+    """
+    Incrementally remove <think></think> blocks from streamed text.
+    Text that could be the start of a tag split across chunks is held back
+    until the next chunk arrives.
+    """
+
+    OPEN_TAG = '<think>'
+    CLOSE_TAG = '</think>'
+
+    def __init__(self):
+        self.in_think = False
+        self.pending = ''
+
+    def feed(self, text):
+        """Add a chunk of streamed text and return the visible text it completes."""
+        self.pending += text
+        visible = []
+        while self.pending:
+            tag = self.CLOSE_TAG if self.in_think else self.OPEN_TAG
+            index = self.pending.find(tag)
+            if index >= 0:
+                if not self.in_think:
+                    visible.append(self.pending[:index])
+                self.pending = self.pending[index + len(tag):]
+                self.in_think = not self.in_think
+                continue
+
+            # Keep back a suffix that might be the beginning of the tag
+            keep = 0
+            for length in range(min(len(tag) - 1, len(self.pending)), 0, -1):
+                if tag.startswith(self.pending[-length:]):
+                    keep = length
+                    break
+            if not self.in_think:
+                visible.append(self.pending[:len(self.pending) - keep])
+            self.pending = self.pending[len(self.pending) - keep:]
+            break
+        return ''.join(visible)
+
+    def flush(self):
+        """Return any held-back text once the stream has ended."""
+        remaining = '' if self.in_think else self.pending
+        self.pending = ''
+        return remaining
+
+
 class GroqMixin():
 
-    def _call_groq_for_tag_suggestions(self, tag_list):
-        """Call Groq API to get tag suggestions based on transcript."""
-        from django.conf import settings
-        import requests
-        
-        url = "https://api.groq.com/openai/v1/chat/completions"
+    def _stream_groq_chat(self, messages, model, max_tokens, temperature=0.3, on_progress=None):
+        """
+        Send a chat completion request to Groq with server-sent event streaming.
+        <think> blocks are stripped as the stream arrives and on_progress is called
+        with the visible text received so far at STREAM_SAVE_INTERVAL_SECONDS intervals.
+
+        Returns:
+            tuple: (visible text received, True if the stream finished cleanly).
+            The text is None if the request could not be made at all.
+        """
+        api_key = getattr(settings, 'GROQ_API_KEY', '')
+
+        if not api_key:
+            logger.error("GROQ_API_KEY not configured")
+            return None, False
+
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
+        data = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+
+        save_interval = getattr(settings, 'STREAM_SAVE_INTERVAL_SECONDS', 5)
+        read_timeout = getattr(settings, 'STREAM_READ_TIMEOUT_SECONDS', 60)
+        think_filter = ThinkBlockFilter()
+        received = []
+        last_saved = time.monotonic()
+        saved_length = 0
+
+        def report_progress():
+            nonlocal last_saved, saved_length
+            text = ''.join(received)
+            if on_progress and len(text) > saved_length:
+                on_progress(text)
+                saved_length = len(text)
+            last_saved = time.monotonic()
+
+        try:
+            response = scheduled_post(
+                GROQ_CHAT_URL, api_key, model, estimate_request_tokens(messages, max_tokens, model),
+                headers=headers, json=data, stream=True, timeout=(10, read_timeout)
+            )
+            with response:
+                response.raise_for_status()
+
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    payload = line[len('data:'):].strip()
+                    if payload == '[DONE]':
+                        break
+
+                    event = json.loads(payload)
+                    choices = event.get('choices') or [{}]
+                    delta = choices[0].get('delta', {}).get('content')
+                    if delta:
+                        received.append(think_filter.feed(delta))
+
+                    if time.monotonic() - last_saved >= save_interval:
+                        report_progress()
+
+            received.append(think_filter.flush())
+            return ''.join(received), True
+
+        except RateLimitWaitExceeded:
+            raise
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Groq streaming request failed ({model}) after {len(''.join(received))} characters: {str(e)}")
+        except (KeyError, IndexError, ValueError) as e:
+            logger.error(f"Unexpected Groq stream event ({model}): {str(e)}")
+
+        report_progress()
+        return ''.join(received), False
+
+    def _save_partial_output(self, stage, fingerprint, text):
+        """Persist partial LLM output for a stage so a retry can continue from it."""
+        if not hasattr(self, 'partial_outputs') or not self.pk:
+            return
+        self.set_json_key('partial_outputs', stage, None if text is None else {'fingerprint': fingerprint, 'text': text})
+
+    def _call_groq_chat_streaming(self, stage, prompt, model, max_tokens, temperature=0.3, refresh=None):
+        """
+        Streaming, resumable variant of _call_groq_chat.
+        Partial output is saved to partial_outputs[stage] while the response streams in.
+        If a previous attempt with the same prompt left partial output behind, the
+        request asks the model to continue from it instead of starting over.
+        Returns the complete response content, or None if failed.
+        """
+        from .. import llm_cache
+        from ..prompt_budget import count_tokens
+
+        cache_messages, cache_params = build_chat_request(prompt, max_tokens, temperature)
+        cache_key = llm_cache.make_cache_key(model, cache_params, cache_messages)
+        cached = None if self._refresh_llm_cache(refresh) else llm_cache.get_cached_response(cache_key)
+        if cached is not None:
+            logger.info(f"Served Groq {stage} response from cache ({model})")
+            return cached
+
+        fingerprint = hashlib.sha256(f"{model}:{temperature}:{prompt}".encode('utf-8')).hexdigest()
+        previous = (getattr(self, 'partial_outputs', None) or {}).get(stage)
+        partial = ''
+        if previous and previous.get('fingerprint') == fingerprint:
+            partial = previous.get('text', '')
+
+        messages = [{"role": "user", "content": prompt}]
+        if partial:
+            logger.info(f"Resuming {stage} from {len(partial)} saved characters for: {getattr(self, 'raw_audio_url', str(self))}")
+            messages += [
+                {"role": "assistant", "content": partial},
+                {"role": "user", "content": CONTINUE_PROMPT}
+            ]
+            max_tokens = max(256, max_tokens - count_tokens(partial, model))
+
+        def on_progress(text):
+            self._save_partial_output(stage, fingerprint, partial + text)
+
+        text, completed = self._stream_groq_chat(messages, model, max_tokens, temperature, on_progress=on_progress)
+        if not completed:
+            return None
+
+        self._save_partial_output(stage, fingerprint, None)
+        content = (partial + text).strip()
+        llm_cache.store_response(cache_key, model, content)
+        return content
+
+    def _refresh_llm_cache(self, refresh):
+        """Whether to skip cached responses; defaults to the refresh_llm_cache attribute set by workflow.run_stage."""
+        return getattr(self, 'refresh_llm_cache', False) if refresh is None else refresh
+
+    def _call_groq_chat(self, prompt, model, max_tokens, temperature=0.3, json_mode=False, refresh=None):
+        """
+        Send a single-message chat completion request to Groq.
+        Identical requests are served from the LLM response cache (see llm_cache).
+        Returns the response content with <think> blocks removed, or None if failed.
+
+        Args:
+            json_mode (bool): Ask the API to constrain the response to a JSON object
+            refresh (bool): Skip the cached response and store the new one in its place,
+                e.g. when regenerating after a stage version bump
+        """
+        from .. import llm_cache
+
         api_key = getattr(settings, 'GROQ_API_KEY', '')
-        
+
         if not api_key:
             logger.error("GROQ_API_KEY not configured")
             return None
-        
-        # Get the prompt from prompts file
-        from ..prompts import get_tag_suggestion_prompt
-        prompt = get_tag_suggestion_prompt(tag_list, self.transcript[:2000])
-        
+
+        messages, params = build_chat_request(prompt, max_tokens, temperature, json_mode)
+        cache_key = llm_cache.make_cache_key(model, params, messages)
+        cached = None if self._refresh_llm_cache(refresh) else llm_cache.get_cached_response(cache_key)
+        if cached is not None:
+            logger.info(f"Served Groq chat response from cache ({model})")
+            return cached
+
         headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
-        
+
         data = {
-            "model": "llama3-8b-8192",
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "temperature": 0.3,
-            "max_tokens": 100,
+            "model": model,
+            "messages": messages,
+            **params
         }
-        
+
         try:
-            response = requests.post(url, headers=headers, json=data)
+            response = scheduled_post(
+                GROQ_CHAT_URL, api_key, model, estimate_request_tokens(messages, max_tokens, model),
+                headers=headers, json=data
+            )
             response.raise_for_status()
-            
+
             result = response.json()
             content = result['choices'][0]['message']['content'].strip()
+            content = strip_think_blocks(content)
+
+            llm_cache.store_response(cache_key, model, content)
             return content
-            
+
+        except RateLimitWaitExceeded:
+            raise
         except requests.exceptions.RequestException as e:
-            logger.error(f"API request failed for tag suggestion: {str(e)}")
+            logger.error(f"Groq chat request failed ({model}): {str(e)}")
             return None
-        
+        except (KeyError, IndexError, ValueError) as e:
+            logger.error(f"Unexpected Groq chat response ({model}): {str(e)}")
+            return None
+
+    def _call_groq_for_tag_suggestions(self, tag_list):
+        """Call Groq API to get tag suggestions based on transcript."""
+        from ..model_routing import route
+        from ..prompt_budget import count_tokens
+
+        prompt = self._get_tag_suggestion_prompt(tag_list)
+        model = route(self, 'tags', count_tokens(prompt), TAG_MAX_TOKENS)
+        content = self._call_groq_chat(prompt, model, TAG_MAX_TOKENS)
+        if content is None:
+            logger.error(f"API request failed for tag suggestion: {self.raw_audio_url}")
+        return content
     
     def get_transcript_from_groq(self):
+        transcript = self.fetch_transcript_from_groq()
+        if transcript:
+            self.store_transcript(transcript)
+        return transcript
+
+    def fetch_transcript_from_groq(self):
+        """
+        Transcribe the audio with Groq Whisper without saving it. Returns the text or None.
+        Raises RateLimitWaitExceeded when our own quota would delay the request too long,
+        which is not a provider failure.
+        """
+        from ..model_routing import route
+
         try:
             url = "https://api.groq.com/openai/v1/audio/transcriptions"
 
@@ -66,26 +398,28 @@ class GroqMixin():
             
             headers = {"Authorization": f"Bearer {api_key}"}
             clean_url = self.clean_url(self.raw_audio_url)
+            model = route(self, 'transcription')
             files = {
                 "url": (None, clean_url),
-                "model": (None, "whisper-large-v3"),
+                "model": (None, model),
                 "language": (None, "en"),
                 "response_format": (None, "json"),
             }
-            response = requests.post(url, headers=headers, files=files)
+            timeout = getattr(settings, 'GROQ_TRANSCRIPTION_TIMEOUT_SECONDS', 900)
+            response = scheduled_post(url, api_key, model, 0, headers=headers, files=files, timeout=timeout)
             response.raise_for_status()
             
             transcript = response.json().get("text", "")
             
             if transcript:
-                self.transcript = transcript
-                self.save()
-                logger.info(f"Transcript updated for: {self.raw_audio_url}")
+                logger.info(f"Groq transcript received for: {self.raw_audio_url}")
                 return transcript
             else:
                 logger.warning(f"No transcript returned for: {self.raw_audio_url}")
                 return None
          
+        except RateLimitWaitExceeded:
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed for {self.raw_audio_url}: {str(e)}")
             return None
@@ -93,69 +427,139 @@ class GroqMixin():
             logger.error(f"Failed to process transcript for {self.raw_audio_url}: {str(e)}")
             return None
     
-    def generate_speaker_script(self):
+    def generate_speaker_script(self, mode='auto', stream=None):
         """
         Use Groq LLM to convert the raw transcript into a formatted script with speaker identification.
         Returns the script transcript or None if failed.
+
+        Args:
+            mode (str): 'single' to send the whole transcript in one request,
+                'windowed' to format overlapping windows in parallel with a shared
+                speaker roster, or 'auto' to pick windowed only for long transcripts
+            stream (bool): Stream the single-request response and save partial output
+                as it arrives. Defaults to the LLM_STREAMING setting.
         """
+        from ..chunking import estimate_tokens
+        from ..model_routing import route
+        from ..prompt_budget import count_tokens
+
         # Validate transcript
         if not self._validate_transcript():
             return None
-        
-        logger.info(f"Generating speaker script for: {self.raw_audio_url}")
-        
-        try:
-            from django.conf import settings
-            import requests
-            
-            url = "https://api.groq.com/openai/v1/chat/completions"
-            api_key = getattr(settings, 'GROQ_API_KEY', '')
-            
-            if not api_key:
-                logger.error("GROQ_API_KEY not configured")
-                return None
-            
-            # Get the prompt from prompts file
-            from ..prompts import get_speaker_transcript_prompt
-            prompt = get_speaker_transcript_prompt(self.transcript)
-            
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "model": "deepseek-r1-distill-llama-70b",
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "temperature": 0.3,
-                "max_tokens": 8000
-            }
-            
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            
-            result = response.json()
-            script_content = result['choices'][0]['message']['content'].strip()
 
-            script_content = re.sub(r'<think>.*?</think>', '', script_content, flags=re.DOTALL).strip()
-            
-            if script_content:
-                self.script_transcript = script_content
-                self.save()
-                logger.info(f"Speaker script generated for: {self.raw_audio_url}")
-                return script_content
+        window_tokens = getattr(settings, 'SCRIPT_WINDOW_TOKENS', 3000)
+        if mode == 'auto':
+            mode = 'windowed' if estimate_tokens(self.transcript) > window_tokens else 'single'
+
+        logger.info(f"Generating {mode} speaker script for: {self.raw_audio_url}")
+
+        try:
+            if mode == 'single':
+                from ..prompts import get_speaker_transcript_prompt
+                # Route on the whole prompt, so the instructions count against the context window too
+                model = route(self, 'script', count_tokens(get_speaker_transcript_prompt(self.transcript)), SCRIPT_MAX_TOKENS)
+                prompt = get_speaker_transcript_prompt(self.transcript, model=model, max_tokens=SCRIPT_MAX_TOKENS)
+                if stream is None:
+                    stream = getattr(settings, 'LLM_STREAMING', True)
+                if stream:
+                    script_content = self._call_groq_chat_streaming('script', prompt, model, SCRIPT_MAX_TOKENS)
+                else:
+                    script_content = self._call_groq_chat(prompt, model, SCRIPT_MAX_TOKENS)
+            elif mode == 'windowed':
+                script_content = self._generate_windowed_speaker_script()
             else:
-                logger.warning(f"No script content returned for: {self.raw_audio_url}")
+                logger.error(f"Unknown speaker script mode: {mode}")
                 return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API request failed for script generation: {str(e)}")
-            return None
+
+            return self._apply_speaker_script(script_content)
+
+        except RateLimitWaitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Failed to generate speaker script: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def _apply_speaker_script(self, script_content):
+        """Save a generated speaker script. Returns the script, or None if it is empty."""
+        if script_content:
+            self.script_transcript = script_content
+            self.save(update_fields=['script_transcript', 'updated_at'])
+            logger.info(f"Speaker script generated for: {self.raw_audio_url}")
+            return script_content
+        else:
+            logger.warning(f"No script content returned for: {self.raw_audio_url}")
+            return None
+
+    def _get_script_windows(self):
+        """Split the transcript into the overlapping windows used by windowed script generation."""
+        from ..chunking import split_into_chunks
+
+        return split_into_chunks(
+            self.transcript,
+            getattr(settings, 'SCRIPT_WINDOW_TOKENS', 3000),
+            overlap_tokens=getattr(settings, 'SCRIPT_WINDOW_OVERLAP_TOKENS', 200)
+        )
+
+    def _get_speaker_roster(self, windows):
+        """
+        Ask the LLM which speakers appear in each window and merge the answers into
+        one roster, in order of first appearance.
+        """
+        from ..model_routing import route
+        from ..prompt_budget import count_tokens
+        from ..prompts import get_speaker_roster_prompt
+
+        prompt_tokens = max(count_tokens(get_speaker_roster_prompt(window)) for window in windows)
+        model = route(self, 'roster', prompt_tokens, ROSTER_MAX_TOKENS)
+
+        def roster_for_window(window):
+            prompt = get_speaker_roster_prompt(window, model=model, max_tokens=ROSTER_MAX_TOKENS)
+            response = self._call_groq_chat(prompt, model, ROSTER_MAX_TOKENS)
+            return parse_speaker_roster(response)
+
+        return merge_rosters(run_concurrently(roster_for_window, windows))
+
+    def _generate_windowed_speaker_script(self):
+        """
+        Format a long transcript as overlapping windows processed in parallel.
+        A roster of speaker names is collected from every window first and passed
+        to each window's prompt so labels stay consistent, then the window scripts
+        are merged with the duplicated overlap lines removed.
+        Returns the merged script or None if any window failed.
+        """
+        from ..chunking import merge_overlapping_lines
+        from ..model_routing import route
+        from ..prompt_budget import count_tokens
+        from ..prompts import get_speaker_transcript_prompt
+
+        windows = self._get_script_windows()
+        roster = self._get_speaker_roster(windows)
+        logger.info(f"Speaker roster for {self.raw_audio_url}: {roster}")
+        prompt_tokens = max(
+            count_tokens(get_speaker_transcript_prompt(
+                window, speaker_roster=roster, window_number=number, total_windows=len(windows)
+            ))
+            for number, window in enumerate(windows, start=1)
+        )
+        model = route(self, 'script', prompt_tokens, SCRIPT_MAX_TOKENS)
+
+        def script_for_window(numbered):
+            number, window = numbered
+            prompt = get_speaker_transcript_prompt(
+                window,
+                speaker_roster=roster,
+                window_number=number,
+                total_windows=len(windows),
+                model=model,
+                max_tokens=SCRIPT_MAX_TOKENS
+            )
+            return self._call_groq_chat(prompt, model, SCRIPT_MAX_TOKENS)
+
+        window_scripts = run_concurrently(script_for_window, enumerate(windows, start=1))
+
+        if not all(window_scripts):
+            failed = sum(1 for window_script in window_scripts if not window_script)
+            logger.error(f"{failed} of {len(windows)} script windows failed for: {self.raw_audio_url}")
+            return None
+
+        return merge_overlapping_lines(window_scripts)
@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class JobCheckpoint(models.Model):
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=255, unique=True, help_text="Unique name of the job run")
+    kind = models.CharField(max_length=50, db_index=True, help_text="Type of job, e.g. 'retag'")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running', db_index=True)
+    params = models.JSONField(default=dict, blank=True, help_text="Parameters the job was started with")
+    cursor = models.BigIntegerField(default=0, help_text="ID of the last processed row; the job resumes after it")
+    total_count = models.PositiveIntegerField(default=0, help_text="Rows selected when the job started")
+    processed_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    owner = models.CharField(max_length=32, blank=True, help_text="Token of the worker running the job")
+    lease_expires_at = models.DateTimeField(blank=True, null=True, help_text="Another worker may take the job over after this time")
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Job Checkpoint"
+        verbose_name_plural = "Job Checkpoints"
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.status}, {self.processed_count}/{self.total_count})"
@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class JobCheckpointItem(models.Model):
+    job = models.ForeignKey('JobCheckpoint', on_delete=models.CASCADE, related_name='items')
+    podcast_id = models.IntegerField(help_text="Podcast selected when the job started")
+
+    class Meta:
+        verbose_name = "Job Checkpoint Item"
+        verbose_name_plural = "Job Checkpoint Items"
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'podcast_id'], name='unique_job_checkpoint_item'),
+        ]
+
+    def __str__(self):
+        return f"Podcast {self.podcast_id}"
@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class LLMBatchJob(models.Model):
+    STAGE_CHOICES = [
+        ('tags', 'Tags'),
+        ('summary', 'Summary'),
+        ('script', 'Speaker script'),
+        ('enrichment', 'Combined enrichment'),
+    ]
+    STATUS_CHOICES = [
+        ('submitted', 'Submitted'),
+        ('completed', 'Completed'),
+        ('applied', 'Applied'),
+        ('failed', 'Failed'),
+    ]
+
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, help_text="Enrichment stage the batch produces")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='submitted', db_index=True)
+    provider_batch_id = models.CharField(max_length=255, blank=True, help_text="Batch ID returned by the provider")
+    provider_status = models.CharField(max_length=50, blank=True, help_text="Last status reported by the provider")
+    input_file_id = models.CharField(max_length=255, blank=True)
+    output_file_id = models.CharField(max_length=255, blank=True)
+    error_file_id = models.CharField(max_length=255, blank=True)
+    request_count = models.PositiveIntegerField(default=0)
+    applied_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text="Per-request errors from the batch output")
+    input_fingerprints = models.JSONField(default=dict, blank=True, help_text="Stage input fingerprint of each podcast when the batch was submitted")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "LLM Batch Job"
+        verbose_name_plural = "LLM Batch Jobs"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.stage} batch {self.provider_batch_id or self.pk} ({self.status})"
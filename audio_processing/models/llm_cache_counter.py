@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class LLMCacheCounter(models.Model):
+    name = models.CharField(max_length=20, unique=True, help_text="Counted event: hits, misses, stores or evictions")
+    count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "LLM Cache Counter"
+        verbose_name_plural = "LLM Cache Counters"
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name}: {self.count}"
@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class LLMCacheEntry(models.Model):
+    key = models.CharField(max_length=64, unique=True, help_text="SHA-256 of the model, parameters and rendered messages")
+    model = models.CharField(max_length=100, help_text="LLM model that produced the response")
+    response = models.TextField(help_text="Cached response content")
+    hit_count = models.PositiveIntegerField(default=0, help_text="Number of times this response was served from the cache")
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(db_index=True, help_text="Last time this response was stored or served")
+    expires_at = models.DateTimeField(blank=True, null=True, db_index=True, help_text="When this entry stops being served")
+
+    class Meta:
+        verbose_name = "LLM Cache Entry"
+        verbose_name_plural = "LLM Cache Entries"
+        ordering = ['-last_accessed_at']
+
+    def __str__(self):
+        return f"{self.model}: {self.key[:12]}"
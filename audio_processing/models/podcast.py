@@ -11,6 +11,7 @@ from .groq_mixin import GroqMixin
 from .aws_mixin import AwsMixin
 from .taggable_mixin import TaggableMixin
 from .summarizable_mixin import SummarizableMixin
+from .enrichable_mixin import EnrichableMixin
 import boto3
 import time
 import uuid
@@ -18,15 +19,29 @@ import uuid
 logger = logging.getLogger(__name__)
 transcribe_client = boto3.client('transcribe', region_name='us-east-1')
 
-class Podcast(models.Model, GroqMixin, AwsMixin, TaggableMixin, SummarizableMixin):
+class Podcast(models.Model, GroqMixin, AwsMixin, TaggableMixin, SummarizableMixin, EnrichableMixin):
+    PRIORITY_CHOICES = [
+        ('high', 'High (breaking news)'),
+        ('normal', 'Normal'),
+        ('backlog', 'Backlog'),
+    ]
+
     rss_feed = models.ForeignKey('RSSFeed', on_delete=models.CASCADE, related_name='podcasts', blank=True, null=True, help_text="RSS feed this podcast came from")
     raw_audio_url = models.URLField(max_length=2000, help_text="URL of the raw audio file")
     transcript = models.TextField(blank=True, null=True, help_text="Raw transcript from speech-to-text")
     script_transcript = models.TextField(blank=True, null=True, help_text="Formatted transcript with speaker identification")
     summary = models.TextField(blank=True, null=True, help_text="AI-generated summary of the episode")
+    guest_names = models.JSONField(default=list, blank=True, help_text="AI-extracted names of the episode's guests")
+    topics = models.JSONField(default=list, blank=True, help_text="AI-extracted topics discussed in the episode")
+    partial_outputs = models.JSONField(default=dict, blank=True, help_text="Partial streamed LLM output per stage, used to resume interrupted requests")
+    priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, blank=True, default='', help_text="Processing priority; derived from the release date when blank (see model_routing)")
+    model_routing = models.JSONField(default=dict, blank=True, help_text="Model chosen for each stage and why (see model_routing)")
     title = models.CharField(max_length=512, blank=True, null=True, help_text="Title of the podcast episode")
     tags = models.ManyToManyField('Tag', blank=True, related_name='podcasts', help_text="Tags associated with this podcast")
     release_date = models.DateTimeField(blank=True, null=True, help_text="Original release date of the podcast episode")
+    audio_bytes = models.BigIntegerField(blank=True, null=True, help_text="Size of the audio file, from the feed enclosure or a HEAD request")
+    duration_seconds = models.PositiveIntegerField(blank=True, null=True, help_text="Length of the episode, from itunes:duration")
+    auto_enqueued_at = models.DateTimeField(blank=True, null=True, help_text="When the workflow was started automatically after ingest (see auto_process)")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -169,93 +184,81 @@ class Podcast(models.Model, GroqMixin, AwsMixin, TaggableMixin, SummarizableMixi
     def generate_transcript(self, method='groq'):
         """
         Generate transcript using the specified method or auto-detect best available.
+        If the provider fails or is down, the other configured providers are tried
+        (see transcription_failover).
         
         Args:
             method (str): 'groq', 'aws', or 'auto' to choose automatically
             
         Returns:
             str: The transcript text or None if failed
+
+        Raises:
+            RateLimitWaitExceeded: The rate limiter held the request back; retry later
         """
-        logger.info(f"Generating transcript for: {self.raw_audio_url} using method: {method}")
+        from ..transcription_failover import transcribe, PROVIDERS
         
-        if method == 'auto':
-            # Auto-select based on available configuration
-            groq_key = getattr(settings, 'GROQ_API_KEY', None)
-            aws_configured = all([
-                getattr(settings, 'AWS_ACCESS_KEY_ID', None),
-                getattr(settings, 'AWS_SECRET_ACCESS_KEY', None)
-            ])
-            
-            if groq_key:
-                method = 'groq'
-                logger.info("Auto-selected Groq for transcription")
-            elif aws_configured:
-                method = 'aws'
-                logger.info("Auto-selected AWS Transcribe for transcription")
-            else:
-                logger.error("No transcription service configured (GROQ_API_KEY or AWS credentials)")
-                return None
+        logger.info(f"Generating transcript for: {self.raw_audio_url} using method: {method}")
         
-        if method == 'groq':
-            return self.get_transcript_from_groq()
-        elif method == 'aws':
-            return self.get_transcript_from_aws()
-        else:
+        if method != 'auto' and method not in PROVIDERS:
             logger.error(f"Unknown transcription method: {method}")
             return None
+        
+        transcript = transcribe(self, None if method == 'auto' else method)
+        if transcript:
+            self.store_transcript(transcript)
+        return transcript
 
-    def process_complete_workflow(self):
+    def set_json_key(self, field, key, value):
+        """
+        Set one key of a JSON field, or remove it when value is None, without losing
+        keys other workers wrote meanwhile: the column is re-read under a row lock and
+        only this key is changed before it is written back.
+        """
+        from django.db import transaction
+
+        with transaction.atomic():
+            current = type(self).objects.select_for_update().filter(pk=self.pk).values_list(field, flat=True).first()
+            current = dict(current or {})
+            if value is None:
+                current.pop(key, None)
+            else:
+                current[key] = value
+            type(self).objects.filter(pk=self.pk).update(**{field: current})
+        setattr(self, field, current)
+
+    def store_transcript(self, transcript):
+        """Save a transcript returned by a provider."""
+        self.transcript = transcript
+        self.save(update_fields=['transcript', 'updated_at'])
+        logger.info(f"Transcript updated for: {self.raw_audio_url}")
+
+    def process_complete_workflow(self, enrichment=None):
         """
         Complete workflow: generate transcript, apply tags, create speaker script, and generate summary.
+        Stages that are already up to date are skipped (see stage_state), so a rerun
+        resumes at the first incomplete or stale stage.
         Returns a summary of what was accomplished.
+        
+        Args:
+            enrichment (str): 'combined' to get tags, summary and metadata from a single
+                LLM request, or 'separate' for one request per stage. Defaults to the
+                ENRICHMENT_MODE setting.
         """
-        results = {
-            'transcript_generated': False,
-            'tags_applied': 0,
-            'script_generated': False,
-            'summary_generated': False,
-            'errors': []
-        }
+        from ..workflow import run_sequentially
+        
+        if enrichment is None:
+            enrichment = getattr(settings, 'ENRICHMENT_MODE', 'combined')
         
         try:
-            # Step 1: Generate transcript if needed
-            if not self.transcript:
-                transcript = self.generate_transcript()
-                if transcript:
-                    results['transcript_generated'] = True
-                    logger.info(f"Transcript generated for: {self.raw_audio_url}")
-                else:
-                    results['errors'].append("Failed to generate transcript")
-                    return results
-            
-            # Step 2: Apply tags
-            applied_tags = self.suggest_and_apply_tags()
-            if applied_tags:
-                results['tags_applied'] = len(applied_tags)
-                logger.info(f"Applied {len(applied_tags)} tags to: {self.raw_audio_url}")
-            else:
-                results['errors'].append("Failed to apply tags")
-            
-            # Step 3: Generate speaker script
-            script = self.generate_speaker_script()
-            if script:
-                results['script_generated'] = True
-                logger.info(f"Speaker script generated for: {self.raw_audio_url}")
-            else:
-                results['errors'].append("Failed to generate speaker script")
-            
-            # Step 4: Generate episode summary
-            summary = self.generate_summary()
-            if summary:
-                results['summary_generated'] = True
-                logger.info(f"Episode summary generated for: {self.raw_audio_url}")
-            else:
-                results['errors'].append("Failed to generate episode summary")
-            
-            return results
-            
+            return run_sequentially(self, enrichment)
         except Exception as e:
             logger.error(f"Error in complete workflow for {self.raw_audio_url}: {str(e)}")
-            results['errors'].append(f"Workflow error: {str(e)}")
-            return results
-    
\ No newline at end of file
+            return {
+                'transcript_generated': False,
+                'tags_applied': 0,
+                'script_generated': False,
+                'summary_generated': False,
+                'skipped_stages': [],
+                'errors': [f"Workflow error: {str(e)}"]
+            }
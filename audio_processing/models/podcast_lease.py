@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class PodcastLease(models.Model):
+    podcast = models.ForeignKey('Podcast', on_delete=models.CASCADE, related_name='leases')
+    name = models.CharField(max_length=20, help_text="Stage or task the lease guards, e.g. 'transcript' or 'workflow'")
+    owner = models.CharField(max_length=32, blank=True, help_text="Token of the worker holding the lease")
+    expires_at = models.DateTimeField(blank=True, null=True, help_text="The lease is free after this time")
+    enqueued_at = models.DateTimeField(blank=True, null=True, help_text="When a task for this work was last enqueued")
+    admitted = models.BooleanField(default=False, help_text="Whether the holder took one of its provider's in-flight slots")
+    provider = models.CharField(max_length=20, blank=True, db_index=True, help_text="External provider the work is sent to, for per-provider concurrency limits")
+
+    class Meta:
+        verbose_name = "Podcast Lease"
+        verbose_name_plural = "Podcast Leases"
+        constraints = [
+            models.UniqueConstraint(fields=['podcast', 'name'], name='unique_podcast_lease'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} lease for podcast {self.podcast_id}"
@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class PodcastStage(models.Model):
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    podcast = models.ForeignKey('Podcast', on_delete=models.CASCADE, related_name='stage_states')
+    stage = models.CharField(max_length=20, help_text="Workflow stage, e.g. 'transcript' or 'summary'")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    attempts = models.PositiveIntegerField(default=0)
+    input_fingerprint = models.CharField(max_length=64, blank=True, help_text="Hash of the inputs the stage last ran on")
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = "Podcast Stage"
+        verbose_name_plural = "Podcast Stages"
+        constraints = [
+            models.UniqueConstraint(fields=['podcast', 'stage'], name='unique_podcast_stage'),
+        ]
+        indexes = [
+            models.Index(fields=['stage', 'status'], name='podcast_stage_status_idx'),
+            models.Index(fields=['status', 'finished_at'], name='podcast_stage_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.stage} for podcast {self.podcast_id} ({self.status})"
@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class ProviderCircuit(models.Model):
+    provider = models.CharField(max_length=50, unique=True, help_text="External provider, e.g. groq or aws")
+    failure_count = models.IntegerField(default=0, help_text="Consecutive failures since the last success")
+    opened_until = models.DateTimeField(blank=True, null=True, help_text="Requests skip this provider until this time")
+    last_failure_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Provider Circuit"
+        verbose_name_plural = "Provider Circuits"
+
+    def __str__(self):
+        return f"{self.provider}: {self.failure_count} failures"
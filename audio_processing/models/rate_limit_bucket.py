@@ -0,0 +1,30 @@
+from django.db import models
+
+
+class RateLimitBucket(models.Model):
+    REQUESTS = 'requests'
+    TOKENS = 'tokens'
+    KIND_CHOICES = [
+        (REQUESTS, 'Requests per minute'),
+        (TOKENS, 'Tokens per minute'),
+    ]
+
+    provider = models.CharField(max_length=50, help_text="API provider, e.g. groq")
+    api_key_id = models.CharField(max_length=16, help_text="Hash prefix identifying the API key (never the key itself)")
+    model = models.CharField(max_length=100, help_text="Model the limit applies to")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    capacity = models.FloatField(help_text="Maximum units available at once (the per-minute limit)")
+    available = models.FloatField(help_text="Units currently available")
+    refill_per_second = models.FloatField(help_text="Units added back per second")
+    blocked_until = models.DateTimeField(blank=True, null=True, help_text="No requests are sent before this time (set from retry-after)")
+    updated_at = models.DateTimeField(help_text="Last time available was refilled")
+
+    class Meta:
+        verbose_name = "Rate Limit Bucket"
+        verbose_name_plural = "Rate Limit Buckets"
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'api_key_id', 'model', 'kind'], name='unique_rate_limit_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}/{self.model} {self.kind}: {self.available:.0f}/{self.capacity:.0f}"
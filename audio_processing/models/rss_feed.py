@@ -6,6 +6,28 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def parse_duration(value):
+    """Seconds in an itunes:duration value ('5400', '90:00' or '1:30:00'), or None if it can't be parsed."""
+    if not value:
+        return None
+    try:
+        seconds = 0
+        for part in str(value).strip().split(':'):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+    return int(seconds) if seconds > 0 else None
+
+
+def parse_length(value):
+    """Bytes in an enclosure length attribute, or None; feeds often put 0 or junk there."""
+    try:
+        length = int(value)
+    except (TypeError, ValueError):
+        return None
+    return length if length > 0 else None
+
+
 class RSSFeed(models.Model):
     name = models.CharField(max_length=1000, help_text="Friendly name for the RSS feed")
     url = models.URLField(unique=True, help_text="RSS feed URL")
@@ -13,6 +35,8 @@ class RSSFeed(models.Model):
     is_active = models.BooleanField(default=True, help_text="Whether to actively process this feed")
     last_processed = models.DateTimeField(blank=True, null=True, help_text="Last time this feed was processed")
     tags = models.ManyToManyField('Tag', blank=True, related_name='rss_feeds', help_text="Tags associated with this RSS feed")
+    auto_process = models.BooleanField(default=False, help_text="Run the complete workflow on new episodes as soon as they are ingested")
+    auto_process_backlog_limit = models.PositiveIntegerField(default=5, help_text="Most back-catalog episodes to process automatically, newest first")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -62,10 +86,12 @@ class RSSFeed(models.Model):
         
         # Extract audio URL from enclosures
         audio_url = None
+        audio_bytes = None
         if hasattr(entry, 'enclosures') and entry.enclosures:
             for enclosure in entry.enclosures:
                 if enclosure.get('type', '').startswith('audio/'):
                     audio_url = enclosure.get('href')
+                    audio_bytes = parse_length(enclosure.get('length'))
                     break
         
         # Fallback: check for links that might be audio files
@@ -101,6 +127,9 @@ class RSSFeed(models.Model):
             except Exception as e:
                 logger.warning(f"Failed to parse updated date for entry '{title}': {str(e)}")
         
+        # Episode length, used to schedule transcription (see transcription_scheduler)
+        duration_seconds = parse_duration(entry.get('itunes_duration'))
+        
         # Check if podcast already exists
         existing_podcast = Podcast.objects.filter(raw_audio_url=audio_url).first()
         if existing_podcast:
@@ -112,6 +141,12 @@ class RSSFeed(models.Model):
             if not existing_podcast.title and title:
                 existing_podcast.title = title
                 updated = True
+            if not existing_podcast.audio_bytes and audio_bytes:
+                existing_podcast.audio_bytes = audio_bytes
+                updated = True
+            if not existing_podcast.duration_seconds and duration_seconds:
+                existing_podcast.duration_seconds = duration_seconds
+                updated = True
             
             if updated:
                 existing_podcast.save()
@@ -126,7 +161,9 @@ class RSSFeed(models.Model):
                 raw_audio_url=audio_url,
                 rss_feed=self,
                 title=title,
-                release_date=release_date
+                release_date=release_date,
+                audio_bytes=audio_bytes,
+                duration_seconds=duration_seconds
             )
             logger.info(f"Created podcast: {title} - {audio_url} (released: {release_date})")
             return podcast
@@ -151,9 +188,13 @@ class RSSFeed(models.Model):
             logger.warning(f"No entries found in feed: {self.url}")
             return {'error': "No entries found in feed"}
         
+        from ..auto_process import on_podcasts_created
+        
         created_count = 0
         existing_count = 0
         failed_count = 0
+        created_podcasts = []
+        started_at = timezone.now()
         
         for entry in feed.entries:
             result = self.create_podcast_from_entry(entry)
@@ -161,11 +202,14 @@ class RSSFeed(models.Model):
                 failed_count += 1
             elif result:
                 # Check if this was a new creation
-                if result.created_at >= timezone.now() - timezone.timedelta(seconds=1):
+                if result.created_at >= started_at:
                     created_count += 1
+                    created_podcasts.append(result)
                 else:
                     existing_count += 1
         
+        on_podcasts_created(self, created_podcasts)
+        
         # Update last_processed timestamp
         self.last_processed = timezone.now()
         self.save()
@@ -1,85 +1,189 @@
 import logging
 
+from ..llm_scheduler import RateLimitWaitExceeded
+
 logger = logging.getLogger(__name__)
 
+SUMMARY_MODEL = "llama3-70b-8192"
+SUMMARY_MAX_TOKENS = 1000
+SEGMENT_SUMMARY_MAX_TOKENS = 400
+
+
+def format_segment_summaries(segment_summaries):
+    """Join segment summaries, in order, into the text used by the reduce prompt."""
+    return "\n\n".join(
+        f"Segment {number}:\n{segment_summary}"
+        for number, segment_summary in enumerate(segment_summaries, start=1)
+    )
+
 
 class SummarizableMixin:
     """
     Mixin to provide summarization functionality using Groq LLM for content summarization.
     """
-    
-    def generate_summary(self):
+
+    def generate_summary(self, mode='auto', stream=None):
         """
         Generate a summary of the content using Groq LLM based on the transcript.
         Returns the summary text or None if failed.
-        
+
+        Args:
+            mode (str): 'single' to send the whole transcript in one prompt,
+                'hierarchical' to summarize token-budgeted segments concurrently and
+                reduce them into the final summary, or 'auto' to pick hierarchical
+                only when the transcript does not fit in the summary model's context window
+            stream (bool): Stream the final summary request and save partial output
+                as it arrives. Defaults to the LLM_STREAMING setting.
+
         Note: This method requires the model to have a 'transcript' field and 'summary' field,
         and access to Groq API (usually from GroqMixin).
         """
+        from django.conf import settings
+        from ..model_routing import route
+        from ..prompt_budget import count_tokens, fits
+        from ..prompts import get_episode_summary_prompt
+
         # Validate transcript
         if not hasattr(self, 'transcript') or not self.transcript or not self.transcript.strip():
             logger.warning(f"No transcript available for summary generation: {getattr(self, 'raw_audio_url', str(self))}")
             return None
-        
-        logger.info(f"Generating summary for {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
-        
+
+        if not hasattr(self, '_call_groq_chat'):
+            logger.error(f"Model {self.__class__.__name__} must include GroqMixin to use generate_summary")
+            return None
+
+        if stream is None:
+            stream = getattr(settings, 'LLM_STREAMING', True)
+
+        prompt = get_episode_summary_prompt(self.transcript)
+        model = route(self, 'summary', count_tokens(prompt), SUMMARY_MAX_TOKENS)
+        if mode == 'auto':
+            mode = 'single' if fits(prompt, model, SUMMARY_MAX_TOKENS) else 'hierarchical'
+
+        logger.info(f"Generating {mode} summary for {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
+
         try:
-            from django.conf import settings
-            import requests
-            
-            url = "https://api.groq.com/openai/v1/chat/completions"
-            api_key = getattr(settings, 'GROQ_API_KEY', '')
-            
-            if not api_key:
-                logger.error("GROQ_API_KEY not configured")
-                return None
-            
-            # Get the prompt from prompts file
-            from ..prompts import get_episode_summary_prompt
-            prompt = get_episode_summary_prompt(self.transcript)
-            
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "model": "llama3-70b-8192",
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "temperature": 0.3,
-                "max_tokens": 1000
-            }
-            
-            response = requests.post(url, headers=headers, json=data)
-            response.raise_for_status()
-            
-            result = response.json()
-            summary_content = result['choices'][0]['message']['content'].strip()
-            
-            # Remove <think></think> blocks that some models include
-            import re
-            summary_content = re.sub(r'<think>.*?</think>', '', summary_content, flags=re.DOTALL).strip()
-            
-            if summary_content:
-                if hasattr(self, 'summary'):
-                    self.summary = summary_content
-                    self.save()
-                    logger.info(f"Summary generated for {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
-                else:
-                    logger.warning(f"Model {self.__class__.__name__} does not have a 'summary' field")
-                return summary_content
+            if mode == 'single':
+                if not fits(prompt, model, SUMMARY_MAX_TOKENS):
+                    prompt = get_episode_summary_prompt(self.transcript, model=model, max_tokens=SUMMARY_MAX_TOKENS)
+                summary_content = self._request_summary(prompt, stream, model)
+            elif mode == 'hierarchical':
+                summary_content = self._generate_hierarchical_summary(stream=stream, prompt=prompt, model=model)
             else:
-                logger.warning(f"No summary content returned for {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
+                logger.error(f"Unknown summary mode: {mode}")
                 return None
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API request failed for summary generation: {str(e)}")
-            return None
+
+            return self._apply_summary(summary_content)
+
+        except RateLimitWaitExceeded:
+            raise
         except Exception as e:
             logger.error(f"Failed to generate summary for {self.__class__.__name__}: {str(e)}")
             return None
+
+    def _apply_summary(self, summary_content):
+        """Save a generated summary. Returns the summary, or None if it is empty."""
+        if summary_content:
+            if hasattr(self, 'summary'):
+                self.summary = summary_content
+                self.save(update_fields=['summary', 'updated_at'])
+                logger.info(f"Summary generated for {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
+            else:
+                logger.warning(f"Model {self.__class__.__name__} does not have a 'summary' field")
+            return summary_content
+        else:
+            logger.warning(f"No summary content returned for {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
+            return None
+
+    def _request_summary(self, prompt, stream, model=SUMMARY_MODEL):
+        """Send the final summary prompt, streaming it if requested."""
+        if stream:
+            return self._call_groq_chat_streaming('summary', prompt, model, SUMMARY_MAX_TOKENS)
+        return self._call_groq_chat(prompt, model, SUMMARY_MAX_TOKENS)
+
+    def _summarize_segment(self, segment, segment_number, total_segments, model=SUMMARY_MODEL):
+        """
+        Summarize one transcript segment. Identical segments are served from the
+        LLM response cache, so repeated runs reuse earlier segment summaries.
+        Returns the segment summary or None if failed.
+        """
+        from ..prompts import get_segment_summary_prompt
+
+        prompt = get_segment_summary_prompt(
+            segment, segment_number, total_segments, model=model, max_tokens=SEGMENT_SUMMARY_MAX_TOKENS
+        )
+        return self._call_groq_chat(prompt, model, SEGMENT_SUMMARY_MAX_TOKENS)
+
+    def _summarize_segments(self, text, chunk_tokens):
+        """
+        Split text into token-budgeted segments and summarize them concurrently.
+        Returns the segment summaries in order, or None if any segment failed.
+        """
+        from ..chunking import split_into_chunks
+        from ..model_routing import route
+        from ..prompt_budget import count_tokens
+        from ..prompts import get_segment_summary_prompt
+        from .groq_mixin import run_concurrently
+
+        segments = split_into_chunks(text, chunk_tokens)
+        prompt_tokens = max(
+            count_tokens(get_segment_summary_prompt(segment, number, len(segments)))
+            for number, segment in enumerate(segments, start=1)
+        )
+        model = route(self, 'segment_summary', prompt_tokens, SEGMENT_SUMMARY_MAX_TOKENS)
+        segment_summaries = run_concurrently(
+            lambda numbered: self._summarize_segment(numbered[1], numbered[0], len(segments), model),
+            enumerate(segments, start=1)
+        )
+
+        if not all(segment_summaries):
+            failed = sum(1 for segment_summary in segment_summaries if not segment_summary)
+            logger.error(f"{failed} of {len(segments)} segment summaries failed for: {getattr(self, 'raw_audio_url', str(self))}")
+            return None
+
+        return segment_summaries
+
+    def _reduce_to_prompt_size(self, stage, max_tokens, build_prompt, prompt=None, model=None):
+        """
+        Build a stage's prompt with build_prompt(text, from_segment_summaries) and route it,
+        replacing the transcript with segment summaries until the prompt fits the model it
+        is routed to. prompt and model are the transcript's prompt and routed model, if the
+        caller already has them.
+        Returns (prompt, model), or (None, None) if a segment failed.
+        """
+        from django.conf import settings
+        from ..model_routing import route
+        from ..prompt_budget import count_tokens, fits
+
+        chunk_tokens = getattr(settings, 'SUMMARY_CHUNK_TOKENS', 5000)
+
+        text = self.transcript
+        if prompt is None:
+            prompt = build_prompt(text, False)
+            model = route(self, stage, count_tokens(prompt), max_tokens)
+        while not fits(prompt, model, max_tokens):
+            segment_summaries = self._summarize_segments(text, chunk_tokens)
+            if segment_summaries is None:
+                return None, None
+            logger.info(f"Summarized {len(segment_summaries)} segments for: {getattr(self, 'raw_audio_url', str(self))}")
+            text = format_segment_summaries(segment_summaries)
+            prompt = build_prompt(text, True)
+            model = route(self, stage, count_tokens(prompt), max_tokens)
+        return prompt, model
+
+    def _generate_hierarchical_summary(self, stream=False, prompt=None, model=None):
+        """
+        Map-reduce summarization: summarize segments of the transcript in parallel, then
+        reduce the segment summaries into the final episode summary. Segment summaries
+        that are still too long for one prompt are summarized again before the reduce.
+        prompt and model are the transcript's summary prompt and routed model, if the caller has them.
+        Returns the summary text or None if failed.
+        """
+        from ..prompts import get_episode_summary_prompt
+
+        prompt, model = self._reduce_to_prompt_size(
+            'summary', SUMMARY_MAX_TOKENS, get_episode_summary_prompt, prompt, model
+        )
+        if prompt is None:
+            return None
+        return self._request_summary(prompt, stream, model)
@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class TagClassifierArtifact(models.Model):
+    version = models.PositiveIntegerField(default=0, help_text="Incremented on every update so workers reload the model")
+    data = models.BinaryField(help_text="Compressed NumPy arrays of the hashed TF-IDF tag classifier")
+    metadata = models.JSONField(default=dict, help_text="Tag order, example counts and seed texts")
+    labeled_documents = models.PositiveIntegerField(default=0, help_text="Tagged episodes the model was trained on")
+    update_due_at = models.DateTimeField(blank=True, null=True, help_text="When the queued update_tag_classifier task will run, if one is queued")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Tag Classifier Artifact"
+        verbose_name_plural = "Tag Classifier Artifacts"
+
+    def __str__(self):
+        return f"Tag classifier v{self.version} ({self.labeled_documents} documents)"
@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class TagClassifierLabel(models.Model):
+    podcast_id = models.IntegerField(db_index=True, help_text="Episode the tag classifier was trained on")
+    tag_id = models.IntegerField(db_index=True, help_text="Tag the episode's vector was added to")
+
+    class Meta:
+        verbose_name = "Tag Classifier Label"
+        verbose_name_plural = "Tag Classifier Labels"
+        constraints = [
+            models.UniqueConstraint(fields=['podcast_id', 'tag_id'], name='unique_tag_classifier_label'),
+        ]
+
+    def __str__(self):
+        return f"Podcast {self.podcast_id} trained with tag {self.tag_id}"
@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class TagClassifierUpdate(models.Model):
+    podcast_id = models.IntegerField(blank=True, null=True, help_text="Episode whose tags changed, if any")
+    sync_tags = models.BooleanField(default=False, help_text="Whether the tag catalog itself changed")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Tag Classifier Update"
+        verbose_name_plural = "Tag Classifier Updates"
+
+    def __str__(self):
+        if self.podcast_id is None:
+            return "Pending tag catalog sync"
+        return f"Pending tag classifier update for podcast {self.podcast_id}"
@@ -17,61 +17,115 @@ class TaggableMixin:
         return True
     
     def _get_available_tags(self):
-        """Get all available tags formatted for LLM processing."""
-        from .tag import Tag
-        all_tags = Tag.objects.all()
+        """Get all available tags formatted for LLM processing (cached, see tag_catalog)."""
+        from ..tag_catalog import get_tag_catalog
+        tag_list = get_tag_catalog()
         
-        if not all_tags.exists():
+        if not tag_list:
             logger.warning("No tags available in the database")
             return None
         
-        tag_list = []
-        for tag in all_tags:
-            tag_info = {
-                "id": tag.id,
-                "name": tag.name,
-                "description": tag.description or tag.name
-            }
-            tag_list.append(tag_info)
-        
         return tag_list
     
-    def _parse_and_apply_tags(self, llm_response):
-        """Parse LLM response and apply valid tags to the model."""
+    def _shortlist_tags(self, tag_list, text):
+        """Narrow tag_list to the candidate tags for text, favoring the RSS feed's tags."""
+        from ..tag_catalog import shortlist_tags
+        
+        feed_tag_ids = []
+        if getattr(self, 'rss_feed_id', None):
+            feed_tag_ids = self.rss_feed.tags.values_list('id', flat=True)
+        return shortlist_tags(tag_list, text, feed_tag_ids)
+    
+    def _prefilter_tags(self, tag_list):
+        """
+        Run the local classifier (see tag_classifier) over the transcript and apply the
+        tags it is confident about. Returns (applied tag IDs, the tags of tag_list the LLM
+        should still decide on). With no confident tag, or no trained classifier, nothing
+        is applied and the LLM gets the whole tag_list.
+        """
+        from ..tag_classifier import classify
+        from ..tag_batching import bulk_apply_tags
+        
+        result = classify(self.transcript)
+        if result is None or not result[0]:
+            return [], tag_list
+        
+        # Applied without m2m signals, so the classifier isn't retrained on its own predictions
+        tag_ids, uncertain_ids = result
+        bulk_apply_tags({self.id: tag_ids})
+        logger.info(f"Classifier applied {len(tag_ids)} tags to {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
+        uncertain_ids = set(uncertain_ids)
+        return tag_ids, [tag for tag in tag_list if tag['id'] in uncertain_ids]
+    
+    def _get_tag_suggestion_prompt(self, tag_list):
+        """Render the tag suggestion prompt for this model's transcript; the prompt builder compresses it."""
+        from ..prompts import get_tag_suggestion_prompt
+        from .groq_mixin import TAG_MODEL, TAG_MAX_TOKENS
+        return get_tag_suggestion_prompt(
+            self._shortlist_tags(tag_list, self.transcript), self.transcript, model=TAG_MODEL, max_tokens=TAG_MAX_TOKENS
+        )
+    
+    def _apply_tag_ids(self, tag_ids):
+        """
+        Apply the tags with the given IDs to the model with one lookup and one bulk insert.
+        Returns the list of applied tag IDs.
+        """
         from .tag import Tag
+        from ..tag_classifier import schedule_update
+        
+        valid_ids = []
+        for tag_id in tag_ids:
+            try:
+                valid_ids.append(int(tag_id))
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring invalid tag ID: {tag_id}")
         
+        tags = Tag.objects.in_bulk(valid_ids)
+        applied_tags = []
+        for tag_id in valid_ids:
+            if tag_id not in tags:
+                logger.warning(f"Tag with ID {tag_id} does not exist")
+            elif tag_id not in applied_tags:
+                applied_tags.append(tag_id)
+        
+        if applied_tags:
+            through = self.tags.through
+            through.objects.bulk_create(
+                [
+                    through(**{self.tags.source_field_name: self, self.tags.target_field_name: tags[tag_id]})
+                    for tag_id in applied_tags
+                ],
+                ignore_conflicts=True
+            )
+            # The bulk insert bypasses the m2m signals that keep the tag classifier trained
+            schedule_update(podcast_ids=[self.pk])
+            logger.info(f"Successfully applied {len(applied_tags)} tags ({', '.join(tags[tag_id].name for tag_id in applied_tags)}) to {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
+        else:
+            logger.warning(f"No valid tags were applied to {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
+        return applied_tags
+    
+    def _parse_and_apply_tags(self, llm_response):
+        """Parse LLM response and apply valid tags to the model."""
         try:
             suggested_tag_ids = json.loads(llm_response)
             if not isinstance(suggested_tag_ids, list):
                 logger.error(f"Expected list of tag IDs, got: {type(suggested_tag_ids)}")
                 return None
             
-            applied_tags = []
-            for tag_id in suggested_tag_ids:
-                try:
-                    tag = Tag.objects.get(id=tag_id)
-                    self.tags.add(tag)
-                    applied_tags.append(tag_id)
-                    logger.info(f"Applied tag '{tag.name}' to {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
-                except Tag.DoesNotExist:
-                    logger.warning(f"Tag with ID {tag_id} does not exist")
-            
-            if applied_tags:
-                logger.info(f"Successfully applied {len(applied_tags)} tags to {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
-                return applied_tags
-            else:
-                logger.warning(f"No valid tags were applied to {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
-                return []
+            return self._apply_tag_ids(suggested_tag_ids)
                 
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse LLM response as JSON: {llm_response}")
             return None
     
-    def suggest_and_apply_tags(self):
+    def suggest_and_apply_tags(self, tag_ids=None):
         """
         Use Groq LLM to analyze the transcript and suggest relevant tags.
         Returns a list of applied tag IDs or None if failed.
         
+        Args:
+            tag_ids: Only offer the tags with these IDs instead of the whole catalog
+        
         Note: This method requires the model to have a 'tags' ManyToManyField 
         and access to _call_groq_for_tag_suggestions method (usually from GroqMixin).
         """
@@ -83,6 +137,9 @@ class TaggableMixin:
         tag_list = self._get_available_tags()
         if tag_list is None:
             return None
+        if tag_ids is not None:
+            tag_ids = set(tag_ids)
+            tag_list = [tag for tag in tag_list if tag['id'] in tag_ids]
         
         logger.info(f"Analyzing transcript for tag suggestions: {getattr(self, 'raw_audio_url', str(self))}")
         
@@ -99,3 +156,30 @@ class TaggableMixin:
         # Parse and apply tags
         applied_tags = self._parse_and_apply_tags(llm_response)
         return applied_tags
+    
+    def classify_and_apply_tags(self):
+        """
+        Tag the transcript with the local classifier (see tag_classifier): apply the
+        tags it is confident about and ask the LLM only about the uncertain ones. Falls
+        back to suggest_and_apply_tags with the whole catalog when no tag is confident
+        or no classifier has been trained yet.
+        Returns a list of applied tag IDs or None if failed.
+        """
+        if not self._validate_transcript():
+            return None
+        
+        tag_list = self._get_available_tags()
+        if tag_list is None:
+            return None
+        
+        tag_ids, uncertain = self._prefilter_tags(tag_list)
+        if not tag_ids:
+            return self.suggest_and_apply_tags()
+        if not uncertain:
+            return tag_ids
+        
+        llm_tag_ids = self.suggest_and_apply_tags(tag_ids=[tag['id'] for tag in uncertain])
+        if llm_tag_ids is None:
+            logger.warning(f"LLM could not decide on {len(uncertain)} uncertain tags for {self.__class__.__name__}: {getattr(self, 'raw_audio_url', str(self))}")
+            return tag_ids
+        return tag_ids + [tag_id for tag_id in llm_tag_ids if tag_id not in tag_ids]
@@ -0,0 +1,66 @@
+import re
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from audio_processing.models import Podcast
+from audio_processing.models.groq_mixin import ROSTER_MAX_TOKENS
+
+
+def transcript(sentences):
+    return " ".join(f"Sentence number {number} covers topic {number}." for number in range(sentences))
+
+
+def fake_chat(prompt, model, max_tokens, *args, **kwargs):
+    """Rosters name Alice in the first window only; each window's script repeats the previous window's last line."""
+    if max_tokens == ROSTER_MAX_TOKENS:
+        return '["Alice"]' if "Sentence number 0 " in prompt else '["Bob", "alice"]'
+    number = int(re.search(r"This is part (\d+) of \d+", prompt).group(1))
+    overlap = f"Bob: Closing{number - 1} words{number - 1}.\n" if number > 1 else ""
+    return f"{overlap}Alice: Opening{number} words{number}.\nBob: Closing{number} words{number}."
+
+
+@override_settings(
+    COMPRESSION_ENABLED=False, LLM_CACHE_BACKEND='none', LLM_STREAMING=False, TAG_CLASSIFIER_ENABLED=False,
+    MODEL_ROUTING_TIERS={'script': ['script-model'], 'roster': ['roster-model']},
+    LLM_CONTEXT_TOKENS={'script-model': 100000, 'roster-model': 8192},
+    SCRIPT_WINDOW_TOKENS=300, SCRIPT_WINDOW_OVERLAP_TOKENS=50,
+)
+class WindowedScriptTests(TestCase):
+    def setUp(self):
+        self.podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3', transcript=transcript(150))
+
+    def test_windows_share_one_roster_and_are_merged(self):
+        with mock.patch.object(Podcast, '_call_groq_chat', side_effect=fake_chat) as chat:
+            script = self.podcast.generate_speaker_script()
+
+        script_prompts = [call.args[0] for call in chat.call_args_list if call.args[2] != ROSTER_MAX_TOKENS]
+        windows = len(script_prompts)
+        self.assertGreater(windows, 1)
+        for prompt in script_prompts:
+            self.assertIn('["Alice", "Bob"]', prompt)
+            self.assertIn(f"of {windows} of a longer transcript", prompt)
+
+        # The repeated overlap line is kept once
+        self.assertEqual(script.count("Closing1 words1."), 1)
+        self.assertEqual(script.splitlines(), [
+            line for number in range(1, windows + 1)
+            for line in (f"Alice: Opening{number} words{number}.", f"Bob: Closing{number} words{number}.")
+        ])
+        self.podcast.refresh_from_db()
+        self.assertEqual(self.podcast.script_transcript, script)
+
+    def test_failed_window_fails_the_script(self):
+        def chat(prompt, model, max_tokens, *args, **kwargs):
+            return None if "This is part 2 of" in prompt else fake_chat(prompt, model, max_tokens)
+
+        with mock.patch.object(Podcast, '_call_groq_chat', side_effect=chat):
+            self.assertIsNone(self.podcast.generate_speaker_script())
+        self.podcast.refresh_from_db()
+        self.assertFalse(self.podcast.script_transcript)
+
+    def test_short_transcript_is_sent_in_one_request(self):
+        self.podcast.transcript = transcript(10)
+        with mock.patch.object(Podcast, '_call_groq_chat', return_value="Alice: Hello.") as chat:
+            self.assertEqual(self.podcast.generate_speaker_script(), "Alice: Hello.")
+        chat.assert_called_once()
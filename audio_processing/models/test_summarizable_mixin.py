@@ -0,0 +1,48 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from audio_processing.models import Podcast
+from audio_processing.models.summarizable_mixin import SEGMENT_SUMMARY_MAX_TOKENS
+
+
+def transcript(sentences):
+    return " ".join(f"Sentence number {number} covers topic {number}." for number in range(sentences))
+
+
+@override_settings(
+    COMPRESSION_ENABLED=False, LLM_CACHE_BACKEND='none', LLM_STREAMING=False, TAG_CLASSIFIER_ENABLED=False,
+    MODEL_ROUTING_TIERS={'summary': ['small-model', 'large-model'], 'segment_summary': ['small-model']},
+    LLM_CONTEXT_TOKENS={'small-model': 2000, 'large-model': 20000},
+    SUMMARY_CHUNK_TOKENS=1000,
+)
+class HierarchicalSummaryTests(TestCase):
+    def summarize(self, text, mode='auto'):
+        podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3', transcript=text)
+
+        def chat(prompt, model, max_tokens, *args, **kwargs):
+            return "A segment summary." if max_tokens == SEGMENT_SUMMARY_MAX_TOKENS else "The final summary."
+
+        with mock.patch.object(Podcast, '_call_groq_chat', side_effect=chat) as call:
+            summary = podcast.generate_summary(mode=mode)
+        return podcast, summary, call.call_args_list
+
+    def test_long_transcript_is_reduced_from_segment_summaries(self):
+        podcast, summary, calls = self.summarize(transcript(3000))
+
+        self.assertEqual(summary, "The final summary.")
+        podcast.refresh_from_db()
+        self.assertEqual(podcast.summary, "The final summary.")
+        *segment_calls, final_call = calls
+        self.assertGreater(len(segment_calls), 1)
+        self.assertTrue(all(call.args[1] == 'small-model' for call in segment_calls))
+        self.assertIn("Segment 1:\nA segment summary.", final_call.args[0])
+
+    def test_budget_follows_the_routed_model(self):
+        # Too long for the small model, but the summary is routed to the large one, where it fits
+        podcast, summary, calls = self.summarize(transcript(800), mode='hierarchical')
+
+        self.assertEqual(summary, "The final summary.")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0].args[1], 'large-model')
+        self.assertIn("Sentence number 799", calls[0].args[0])
@@ -0,0 +1,31 @@
+from django.db import models
+
+
+class WorkflowRun(models.Model):
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    podcast = models.ForeignKey('Podcast', on_delete=models.CASCADE, related_name='workflow_runs')
+    enrichment = models.CharField(max_length=20, help_text="'combined' or 'separate' enrichment stages")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running', db_index=True)
+    stages = models.JSONField(default=list, help_text="Stages that run in parallel after the transcript")
+    stage_results = models.JSONField(default=dict, blank=True, help_text="Result of each finished stage")
+    results = models.JSONField(default=dict, blank=True, help_text="Joined workflow results")
+    started_at = models.DateTimeField(auto_now_add=True)
+    transcribed_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Workflow Run"
+        verbose_name_plural = "Workflow Runs"
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Workflow {self.pk} for podcast {self.podcast_id} ({self.status})"
+
+    @property
+    def pending_stages(self):
+        return [stage for stage in self.stages if stage not in self.stage_results]
@@ -0,0 +1,124 @@
+"""
+Token-accurate prompt budgeting.
+
+Prompts used to be sized by character slicing or not at all, so some requests
+overflowed the model's context window and others left most of it unused. Here
+tokens are counted with the model's tokenizer (tiktoken, loaded once per
+encoding and cached), and the variable section of a prompt (the transcript or
+excerpt) is fitted into whatever the context window has left after the fixed
+instructions and the response's max_tokens.
+
+When tiktoken or its encoding files are unavailable, counts fall back to the
+character heuristic in chunking with HEURISTIC_MARGIN of headroom, so budgets
+stay on the safe side.
+"""
+import functools
+import logging
+import math
+
+from django.conf import settings
+
+from .chunking import CHARS_PER_TOKEN, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# For models missing from settings.LLM_CONTEXT_TOKENS
+DEFAULT_CONTEXT_TOKENS = 8192
+
+# The Llama 3 tokenizer is a tiktoken BPE that extends cl100k_base; counting with
+# cl100k_base is exact for most text and slightly over-counts the rest
+MODEL_ENCODINGS = {}
+DEFAULT_ENCODING = "cl100k_base"
+
+# Chat template tokens around each message
+MESSAGE_OVERHEAD_TOKENS = 16
+HEURISTIC_MARGIN = 1.15
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(name):
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except ImportError:
+        logger.info("tiktoken is not installed; estimating prompt tokens from character counts")
+    except Exception as e:
+        logger.warning(f"Failed to load tokenizer {name}, estimating prompt tokens from character counts: {str(e)}")
+    return None
+
+
+def get_tokenizer(model):
+    """The tiktoken encoding for model, or None if it can't be loaded. Encodings are loaded once per process."""
+    return _get_encoding(MODEL_ENCODINGS.get(model, DEFAULT_ENCODING))
+
+
+def count_tokens(text, model=None):
+    """Count the tokens text takes for model."""
+    if not text:
+        return 0
+    tokenizer = get_tokenizer(model)
+    if tokenizer is None:
+        return math.ceil(estimate_tokens(text) * HEURISTIC_MARGIN)
+    return len(tokenizer.encode(text, disallowed_special=()))
+
+
+def context_tokens(model):
+    """Context window of model, from the LLM_CONTEXT_TOKENS setting."""
+    return (getattr(settings, 'LLM_CONTEXT_TOKENS', {}) or {}).get(model) or DEFAULT_CONTEXT_TOKENS
+
+
+def available_tokens(model, max_tokens, fixed_text=''):
+    """Tokens left for the variable part of a prompt after fixed_text and the response."""
+    return context_tokens(model) - max_tokens - MESSAGE_OVERHEAD_TOKENS - count_tokens(fixed_text, model)
+
+
+def fits(prompt, model, max_tokens):
+    """Whether a single-message request with this prompt fits the model's context window."""
+    return available_tokens(model, max_tokens, prompt) >= 0
+
+
+def truncate_to_tokens(text, budget, model=None):
+    """Cut text to at most budget tokens."""
+    if budget <= 0:
+        return ''
+    tokenizer = get_tokenizer(model)
+    if tokenizer is None:
+        return text[:int(budget * CHARS_PER_TOKEN / HEURISTIC_MARGIN)]
+    tokens = tokenizer.encode(text, disallowed_special=())
+    return tokenizer.decode(tokens[:budget]) if len(tokens) > budget else text
+
+
+def fit_text(text, budget, model=None, extractive=False):
+    """
+    Fit text into budget tokens. With extractive=True the most central sentences
+    are kept (see compression); otherwise, or if that is still too long, the end
+    of the text is cut off.
+    """
+    if not text or count_tokens(text, model) <= budget:
+        return text
+    if budget <= 0:
+        # Sending an empty transcript would only hide the problem; let the API reject the request
+        logger.error(f"Prompt instructions and max_tokens alone exceed the context window of {model}")
+        return text
+
+    if extractive:
+        from .compression import compress_transcript
+        # compress_transcript budgets with the plain character heuristic
+        text = compress_transcript(text, int(budget / HEURISTIC_MARGIN))
+        if count_tokens(text, model) <= budget:
+            return text
+
+    logger.warning(f"Truncating prompt text to {budget} tokens for {model}")
+    return truncate_to_tokens(text, budget, model)
+
+
+def fit_prompt(prefix, text, suffix='', model=None, max_tokens=None, extractive=False):
+    """
+    Assemble prefix + text + suffix, fitting text into the context window of model
+    that is left after the prefix, the suffix and max_tokens of response.
+    Without a model the prompt is assembled unchanged.
+    """
+    if model is not None:
+        budget = available_tokens(model, max_tokens or 0, prefix + suffix)
+        text = fit_text(text, budget, model, extractive=extractive)
+    return f"{prefix}{text}{suffix}"
@@ -1,41 +1,63 @@
+import json
 
+from .compression import compress_for_tagging, compress_for_summary, compress_for_script
+from .prompt_budget import fit_prompt
 
-def get_tag_suggestion_prompt(tag_list, transcript_excerpt):
-    import json
-    
-    return f"""You are an AI assistant that analyzes podcast transcripts and suggests relevant tags.
+# Each prompt starts with its static instructions and ends with the per-episode
+# data, so requests of the same kind share a prefix the provider can cache.
+# Passing model and max_tokens fits the variable section into the model's
+# context window (see prompt_budget).
 
-Available tags:
-{json.dumps(tag_list, indent=2)}
 
-Podcast transcript (first 2000 characters):
-{transcript_excerpt}
+def get_tag_suggestion_prompt(tag_list, transcript, model=None, max_tokens=None):
+    # The shortlist differs per episode, so it goes after all of the instructions
+    prefix = f"""You are an AI assistant that analyzes podcast transcripts and suggests relevant tags.
 
-Based on the transcript content, please suggest which tags are most relevant.
+Based on the transcript content, please suggest which of the available tags are most relevant.
 Return ONLY a JSON array of tag IDs (numbers) that apply to this podcast.
 Example: [1, 3, 7]
 
 Consider the topic, genre, subject matter, and themes discussed in the podcast.
+Respond only with a JSON array of tag IDs. Do not include any additional text or explanations.
 
-Again, you should respond only with a JSON array of tag IDs.
-Do not include any additional text or explanations."""
+Available tags:
+{json.dumps(tag_list, indent=2)}
 
-def get_speaker_transcript_prompt(transcript_excerpt):
+Representative sentences from the podcast transcript:
+"""
+    return fit_prompt(prefix, compress_for_tagging(transcript), '', model, max_tokens, extractive=True)
+
+def get_speaker_transcript_prompt(transcript_excerpt, speaker_roster=None, window_number=None, total_windows=None,
+                                  model=None, max_tokens=None):
     """
     Generate a prompt for converting a transcript into a speaker-formatted script.
-    
+
     Args:
         transcript_excerpt: The podcast transcript to format
-    
+        speaker_roster: Optional list of speaker names to use consistently
+        window_number: 1-based position of the excerpt when the transcript is
+            processed in windows
+        total_windows: Total number of windows in the transcript
+        model, max_tokens: Fit the transcript into this model's context window
+
     Returns:
         str: Formatted prompt for speaker identification and script formatting
     """
-    return f"""You are an AI assistant that converts podcast transcripts into properly formatted scripts with speaker identification.
+    context = ""
+    if window_number is not None and total_windows is not None:
+        context += f"""
+This is part {window_number} of {total_windows} of a longer transcript. It may start or end mid-sentence; format only the text shown and do not add an introduction or closing.
+"""
+    if speaker_roster:
+        context += f"""
+Speakers identified across the whole episode:
+{json.dumps(speaker_roster)}
+Use exactly these names for these speakers so labels stay consistent with the rest of the episode.
+"""
 
-Original transcript:
-{transcript_excerpt}
+    prefix = f"""You are an AI assistant that converts podcast transcripts into properly formatted scripts with speaker identification.
 
-Please rewrite this transcript as a script format with identified speakers. Follow these guidelines:
+Please rewrite the transcript below as a script format with identified speakers. Follow these guidelines:
 
 1. Identify different speakers as best as you can from context clues, speaking patterns, and content
 2. Label speakers as "Host" or"Guest" if you cannot identify specific names, however you should use clues to try and identify them by name.
@@ -53,24 +75,34 @@ Example format:
 Ezra Klein: Welcome to today's show. I'm Ezra Klein here with my guest John Doe.
 John Doe: Thanks for having me on the show.
 Ezra Klein: Here's my first question for you...
-[Discussion continues...]"""
+[Discussion continues...]
+{context}
+Original transcript:
+"""
+    return fit_prompt(prefix, compress_for_script(transcript_excerpt), '', model, max_tokens)
 
-def get_episode_summary_prompt(transcript):
+def get_episode_summary_prompt(transcript, from_segment_summaries=False, model=None, max_tokens=None):
     """
     Generate a prompt for creating an episode summary from a transcript.
-    
+
     Args:
         transcript: The full podcast transcript to summarize
-    
+        from_segment_summaries: True when transcript is a list of summaries of
+            consecutive segments rather than the raw transcript
+        model, max_tokens: Fit the transcript into this model's context window
+
     Returns:
         str: Formatted prompt for episode summary generation
     """
-    return f"""You are an AI assistant that creates concise, informative summaries of podcast episodes.
+    if from_segment_summaries:
+        source_label = "Summaries of consecutive segments of the podcast, in order:"
+    else:
+        source_label = "Podcast transcript:"
+        transcript = compress_for_summary(transcript)
 
-Podcast transcript:
-{transcript}
+    prefix = f"""You are an AI assistant that creates concise, informative summaries of podcast episodes.
 
-Please create a comprehensive summary of this podcast episode. Your summary should include:
+Please create a comprehensive summary of the podcast episode below. Your summary should include:
 
 1. **Main Topic/Theme**: What is the primary subject or focus of the episode?
 
@@ -84,4 +116,144 @@ Please create a comprehensive summary of this podcast episode. Your summary shou
 
 Format your response as a well-structured summary that would help someone decide if they want to listen to the full episode. Be concise but comprehensive, aiming for 200-400 words.
 
-Do not include any meta-commentary about the task or introductory phrases like "This podcast discusses..." - just provide the summary content directly."""
\ No newline at end of file
+Do not include any meta-commentary about the task or introductory phrases like "This podcast discusses..." - just provide the summary content directly.
+
+{source_label}
+"""
+    return fit_prompt(prefix, transcript, '', model, max_tokens, extractive=not from_segment_summaries)
+
+def get_segment_summary_prompt(segment, segment_number, total_segments, model=None, max_tokens=None):
+    """
+    Generate a prompt for summarizing one segment of a long podcast transcript.
+
+    Args:
+        segment: The portion of the transcript to summarize
+        segment_number: 1-based position of the segment in the episode
+        total_segments: Total number of segments in the episode
+        model, max_tokens: Fit the segment into this model's context window
+
+    Returns:
+        str: Formatted prompt for segment summary generation
+    """
+    prefix = f"""You are an AI assistant that summarizes one part of a longer podcast episode.
+
+Write a dense summary of the segment below in 100-200 words. Include:
+- The topics and arguments discussed
+- Any speakers or guests who are named, and their roles
+- Notable quotes, facts or figures
+
+Your summary will be combined with summaries of the other segments, so do not add an introduction or conclusion and do not speculate about the rest of the episode.
+Respond only with the summary text.
+
+This is segment {segment_number} of {total_segments} of the episode transcript:
+"""
+    # Only compressed when the segment doesn't fit the model's window
+    return fit_prompt(prefix, segment, '', model, max_tokens, extractive=True)
+
+
+def get_speaker_roster_prompt(transcript_excerpt, model=None, max_tokens=None):
+    """
+    Generate a prompt for listing the speakers who appear in part of a transcript.
+
+    Args:
+        transcript_excerpt: The portion of the podcast transcript to inspect
+        model, max_tokens: Fit the excerpt into this model's context window
+
+    Returns:
+        str: Formatted prompt for speaker name extraction
+    """
+    prefix = """You are an AI assistant that identifies the speakers in podcast transcripts.
+
+List the people who speak in the excerpt below. Use their full names when the transcript mentions them (for example in introductions or when they address each other).
+Use "Host" or "Guest" only when a speaker's name cannot be determined.
+Do not include people who are only mentioned but do not speak.
+
+Respond only with a JSON array of speaker names.
+Example: ["Ezra Klein", "John Doe"]
+
+Podcast transcript excerpt:
+"""
+    return fit_prompt(prefix, compress_for_script(transcript_excerpt), '', model, max_tokens)
+
+def get_episode_enrichment_prompt(tag_list, transcript, from_segment_summaries=False, model=None, max_tokens=None):
+    """
+    Generate a prompt that returns tags, a summary and episode metadata in one JSON response.
+
+    Args:
+        tag_list: Available tags as a list of dicts with id, name and description
+        transcript: The podcast transcript to analyze
+        from_segment_summaries: True when transcript is a list of summaries of
+            consecutive segments rather than the raw transcript
+        model, max_tokens: Fit the transcript into this model's context window
+
+    Returns:
+        str: Formatted prompt for combined episode enrichment
+    """
+    if from_segment_summaries:
+        source_label = "Summaries of consecutive segments of the podcast, in order:"
+    else:
+        source_label = "Podcast transcript:"
+        transcript = compress_for_summary(transcript)
+
+    prefix = f"""You are an AI assistant that analyzes podcast episodes for a podcast catalog.
+
+Analyze the episode below and respond with a single JSON object with exactly these keys:
+
+- "tag_ids": array of the IDs (numbers) of the available tags that apply to this episode. Consider the topic, genre, subject matter, and themes discussed.
+- "summary": a summary of the episode in 200-400 words covering the main topic, key points discussed, notable quotes or highlights, the guests or participants and their roles, and the main conclusions or takeaways. Write it so it would help someone decide if they want to listen to the full episode, without meta-commentary or introductory phrases like "This podcast discusses...".
+- "guest_names": array of the full names of the guests who appear in the episode (not the hosts). Use an empty array if there are none or they cannot be identified.
+- "topics": array of 3-8 short phrases naming the specific topics discussed.
+
+Example:
+{{"tag_ids": [1, 3], "summary": "...", "guest_names": ["John Doe"], "topics": ["housing policy", "interest rates"]}}
+
+Respond only with the JSON object. Do not include any additional text or explanations.
+
+Available tags:
+{json.dumps(tag_list, indent=2)}
+
+{source_label}
+"""
+    return fit_prompt(prefix, transcript, '', model, max_tokens, extractive=not from_segment_summaries)
+
+def format_tag_candidates(tag_ids):
+    """The note after an episode's heading restricting it to candidate tag IDs, if it has any."""
+    return f" (candidate tag IDs: {json.dumps(tag_ids)})" if tag_ids else ""
+
+def get_batch_tag_suggestion_prompt(tag_list, excerpts, candidates=None):
+    """
+    Generate a prompt for tagging several episodes at once, sending the tag catalog only once.
+    Callers size the batch to fit the context window (see tag_batching.group_for_prompt).
+
+    Args:
+        tag_list: Available tags as a list of dicts with id, name and description
+        excerpts: Dict mapping episode ID to its transcript excerpt, already
+            compressed with compress_for_tagging so callers can size the batch
+        candidates: Optional dict mapping episode ID to the only tag IDs the
+            model may choose from for that episode
+
+    Returns:
+        str: Formatted prompt whose response maps each episode ID to its tag IDs
+    """
+    candidates = candidates or {}
+    episodes = "\n\n".join(
+        f"Episode {episode_id}{format_tag_candidates(candidates.get(episode_id))}:\n{excerpt}"
+        for episode_id, excerpt in excerpts.items()
+    )
+
+    return f"""You are an AI assistant that analyzes podcast transcripts and suggests relevant tags.
+
+For each episode below, suggest which tags are most relevant, considering the topic, genre, subject matter, and themes discussed in that episode only.
+
+Respond with a single JSON object that has one key per episode ID (as a string) and, as its value, an array of the tag IDs (numbers) that apply to that episode. Include every episode, using an empty array if no tag applies.
+When an episode lists candidate tag IDs, choose its tags only from those candidates.
+Example: {{"101": [1, 3, 7], "102": []}}
+
+Respond only with the JSON object. Do not include any additional text or explanations.
+
+Available tags:
+{json.dumps(tag_list, separators=(',', ':'))}
+
+Representative sentences from the transcripts of {len(excerpts)} podcast episodes:
+
+{episodes}"""
@@ -0,0 +1,184 @@
+"""
+Incremental re-tagging after tag catalog changes.
+
+Adding or editing a tag only matters for episodes that could plausibly carry
+it, so instead of re-running tagging over the whole corpus a re-tag job:
+
+- selects the tags created or edited since the last completed job
+- selects candidate episodes once, when the job starts: those whose RSS feed
+  has one of the tags, or whose summary or transcript mentions a word of a
+  tag's name, stored as JobCheckpointItem rows
+- asks the LLM, several episodes per request (see tag_batching), which of
+  only those tags apply, and adds them with bulk inserts
+
+Existing tags are never removed. Progress is checkpointed in a JobCheckpoint
+row after every batch of episodes, and batches are read from the stored
+selection in podcast ID order after the job's cursor, so an interrupted job
+resumes where it stopped instead of starting over, and no batch repeats the
+text search. Callers run a job under its lease (see
+locking.job_lease), so the same job is never run by two workers at once.
+"""
+import logging
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import locking
+from .tag_catalog import content_words
+
+logger = logging.getLogger(__name__)
+
+KIND = 'retag'
+
+
+def _last_completed_job():
+    from .models import JobCheckpoint
+    return JobCheckpoint.objects.filter(kind=KIND, status='completed').order_by('-started_at').first()
+
+
+def changed_tags(since):
+    """Tags created or edited after `since`."""
+    from .models import Tag
+    return list(Tag.objects.filter(updated_at__gt=since))
+
+
+def candidate_podcasts(tags):
+    """Episodes with a transcript that are plausibly affected by the given tags, ordered by ID."""
+    from .models import Podcast
+
+    query = Q(rss_feed__tags__in=tags)
+    for tag in tags:
+        for word in sorted(content_words(tag.name)):
+            # 'policy' should also match 'policies'
+            stem = word[:-1] if word.endswith('y') else word
+            query |= Q(summary__icontains=stem) | Q(transcript__icontains=stem)
+
+    return (
+        Podcast.objects
+        .exclude(Q(transcript__isnull=True) | Q(transcript=''))
+        .filter(query)
+        .distinct()
+        .order_by('id')
+    )
+
+
+def _select_candidates(job, tags):
+    """Store the job's candidate podcasts after its cursor. Returns how many were stored."""
+    from .models import JobCheckpointItem
+
+    chunk_size = getattr(settings, 'RETAG_BATCH_SIZE', 100) * 10
+    podcast_ids = candidate_podcasts(tags).filter(pk__gt=job.cursor).values_list('id', flat=True)
+    items = []
+    stored = 0
+    for podcast_id in podcast_ids.iterator(chunk_size=chunk_size):
+        items.append(JobCheckpointItem(job=job, podcast_id=podcast_id))
+        if len(items) >= chunk_size:
+            JobCheckpointItem.objects.bulk_create(items, ignore_conflicts=True)
+            stored += len(items)
+            items = []
+    JobCheckpointItem.objects.bulk_create(items, ignore_conflicts=True)
+    return stored + len(items)
+
+
+def start_job(tag_ids=None, since=None):
+    """
+    Create a re-tag job for the given tags, or for the tags changed since `since`
+    (default: since the last completed job started).
+    Returns the JobCheckpoint, or None if there is nothing to re-tag.
+
+    The first run without tag IDs or `since` only records a completed baseline job,
+    so catalog changes are tracked from then on without re-tagging the whole corpus.
+    """
+    from .models import JobCheckpoint, Tag
+
+    now = timezone.now()
+    name = f"{KIND}-{now:%Y%m%dT%H%M%S%f}"
+
+    if tag_ids:
+        tags = list(Tag.objects.filter(pk__in=tag_ids))
+    else:
+        if since is None:
+            last_job = _last_completed_job()
+            if last_job is None:
+                JobCheckpoint.objects.create(name=name, kind=KIND, status='completed', finished_at=now)
+                logger.info("Recorded baseline re-tag job; later tag changes will be re-tagged incrementally")
+                return None
+            since = last_job.started_at
+        tags = changed_tags(since)
+
+    if not tags:
+        logger.info("No changed tags to re-tag")
+        return None
+
+    job = JobCheckpoint.objects.create(
+        name=name,
+        kind=KIND,
+        params={'tag_ids': [tag.id for tag in tags]},
+    )
+    job.total_count = _select_candidates(job, tags)
+    job.save(update_fields=['total_count'])
+    logger.info(f"Started re-tag job {job.name}: {len(tags)} tags, {job.total_count} candidate podcasts")
+    return job
+
+
+def run_job(job, batch_size=None):
+    """
+    Process a re-tag job from its checkpoint to the end. Returns the job.
+    If the job was claimed and its lease is lost, stops without touching the job row.
+    """
+    from .models import Podcast, Tag
+    from .tag_batching import suggest_and_apply_tags_batched
+
+    if batch_size is None:
+        batch_size = getattr(settings, 'RETAG_BATCH_SIZE', 100)
+
+    tags = list(Tag.objects.filter(pk__in=job.params.get('tag_ids', [])))
+    tag_list = [
+        {"id": tag.id, "name": tag.name, "description": tag.description or tag.name}
+        for tag in tags
+    ]
+    if not tags:
+        job.status = 'completed'
+        job.finished_at = timezone.now()
+        job.save()
+        job.items.all().delete()
+        return job
+
+    if not job.items.exists() and job.processed_count < job.total_count:
+        # Started before candidates were stored with the job
+        _select_candidates(job, tags)
+
+    try:
+        while True:
+            if job.owner and not locking.renew_job(job):
+                job.last_error = "Lost the job lease to another worker"
+                return job
+            podcast_ids = list(
+                job.items.filter(podcast_id__gt=job.cursor).order_by('podcast_id')
+                .values_list('podcast_id', flat=True)[:batch_size]
+            )
+            if not podcast_ids:
+                break
+
+            batch = list(Podcast.objects.filter(pk__in=podcast_ids).order_by('id'))
+            results = suggest_and_apply_tags_batched(batch, tag_list=tag_list) if batch else {}
+            job.failed_count += sum(1 for tag_ids in results.values() if tag_ids is None)
+            job.processed_count += len(podcast_ids)
+            job.cursor = podcast_ids[-1]
+            job.save()
+            logger.info(f"Re-tag job {job.name}: {job.processed_count}/{job.total_count} podcasts processed")
+
+    except Exception as e:
+        job.status = 'failed'
+        job.last_error = str(e)
+        job.save()
+        logger.error(f"Re-tag job {job.name} failed at podcast {job.cursor}: {str(e)}")
+        return job
+
+    job.status = 'completed'
+    job.finished_at = timezone.now()
+    job.save()
+    job.items.all().delete()
+    logger.info(f"Re-tag job {job.name} completed: {job.processed_count} podcasts, {job.failed_count} failed")
+    return job
@@ -153,4 +153,121 @@ AWS_TRANSCRIBE_OUTPUT_BUCKET = os.environ.get("AWS_TRANSCRIBE_OUTPUT_BUCKET", No
 
 CELERY_BROKER_URL = "sqs://{aws_access_key}:{aws_secret_key}@".format(
     aws_access_key=AWS_ACCESS_KEY_ID, aws_secret_key=AWS_SECRET_ACCESS_KEY,
-)
\ No newline at end of file
+)
+
+# LLM settings
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+SUMMARY_CHUNK_TOKENS = int(os.environ.get("SUMMARY_CHUNK_TOKENS", "5000"))
+SCRIPT_WINDOW_TOKENS = int(os.environ.get("SCRIPT_WINDOW_TOKENS", "3000"))
+SCRIPT_WINDOW_OVERLAP_TOKENS = int(os.environ.get("SCRIPT_WINDOW_OVERLAP_TOKENS", "200"))
+# Micro-batched tagging (see tag_batching): episodes and prompt tokens per request
+TAG_BATCH_SIZE = int(os.environ.get("TAG_BATCH_SIZE", "10"))
+TAG_BATCH_PROMPT_TOKENS = int(os.environ.get("TAG_BATCH_PROMPT_TOKENS", "6000"))
+# Podcasts per checkpoint in incremental re-tag jobs (see retagging)
+RETAG_BATCH_SIZE = int(os.environ.get("RETAG_BATCH_SIZE", "100"))
+# Corpus-wide stage reprocessing (see backfill)
+BACKFILL_CHUNK_SIZE = int(os.environ.get("BACKFILL_CHUNK_SIZE", "500"))
+BACKFILL_RATE_PER_SECOND = float(os.environ.get("BACKFILL_RATE_PER_SECOND", "1"))
+# Admin background jobs with no progress for this long are failed by sweep_background_jobs
+BACKGROUND_JOB_TIMEOUT_SECONDS = int(os.environ.get("BACKGROUND_JOB_TIMEOUT_SECONDS", "7200"))
+# Tag catalog cache and per-episode shortlist (see tag_catalog)
+TAG_SHORTLIST_SIZE = int(os.environ.get("TAG_SHORTLIST_SIZE", "40"))
+TAG_CATALOG_CACHE_ALIAS = os.environ.get("TAG_CATALOG_CACHE_ALIAS", "default")
+TAG_CATALOG_MAX_AGE_SECONDS = float(os.environ.get("TAG_CATALOG_MAX_AGE_SECONDS", "300"))
+# Local tag classifier (see tag_classifier): applies confident tags without an LLM request
+TAG_CLASSIFIER_ENABLED = os.environ.get("TAG_CLASSIFIER_ENABLED", "True").lower() == "true"
+TAG_CLASSIFIER_APPLY_THRESHOLD = float(os.environ.get("TAG_CLASSIFIER_APPLY_THRESHOLD", "0.3"))
+TAG_CLASSIFIER_REJECT_THRESHOLD = float(os.environ.get("TAG_CLASSIFIER_REJECT_THRESHOLD", "0.1"))
+TAG_CLASSIFIER_MIN_EXAMPLES = int(os.environ.get("TAG_CLASSIFIER_MIN_EXAMPLES", "5"))
+# Label changes are batched into one classifier update per this many seconds
+TAG_CLASSIFIER_UPDATE_DELAY_SECONDS = int(os.environ.get("TAG_CLASSIFIER_UPDATE_DELAY_SECONDS", "30"))
+# Local transcript compression before LLM calls (see compression)
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "True").lower() == "true"
+TAG_EXCERPT_TOKENS = int(os.environ.get("TAG_EXCERPT_TOKENS", "500"))
+COMPRESSION_SUMMARY_RATIO = float(os.environ.get("COMPRESSION_SUMMARY_RATIO", "0.6"))
+COMPRESSION_MIN_TOKENS = int(os.environ.get("COMPRESSION_MIN_TOKENS", "1000"))
+# 'combined' sends the transcript once for tags, summary and metadata; 'separate' makes one request per stage
+ENRICHMENT_MODE = os.environ.get("ENRICHMENT_MODE", "combined")
+LLM_STREAMING = os.environ.get("LLM_STREAMING", "True").lower() == "true"
+STREAM_SAVE_INTERVAL_SECONDS = float(os.environ.get("STREAM_SAVE_INTERVAL_SECONDS", "5"))
+STREAM_READ_TIMEOUT_SECONDS = float(os.environ.get("STREAM_READ_TIMEOUT_SECONDS", "60"))
+# LLM response cache: 'database', 'django' (uses LLM_CACHE_ALIAS) or 'none'
+LLM_CACHE_BACKEND = os.environ.get("LLM_CACHE_BACKEND", "database")
+LLM_CACHE_ALIAS = os.environ.get("LLM_CACHE_ALIAS", "default")
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "50000"))
+LLM_CACHE_CULL_FREQUENCY = int(os.environ.get("LLM_CACHE_CULL_FREQUENCY", "10"))
+# Cull the database cache on about one store in this many
+LLM_CACHE_CULL_EVERY = int(os.environ.get("LLM_CACHE_CULL_EVERY", "100"))
+
+# Per-model Groq quota shared by all workers (see llm_scheduler)
+GROQ_RATE_LIMITS = {
+    "default": {"rpm": 30, "tpm": 6000},
+    "llama3-8b-8192": {"rpm": 30, "tpm": 6000},
+    "llama3-70b-8192": {"rpm": 30, "tpm": 6000},
+    "deepseek-r1-distill-llama-70b": {"rpm": 30, "tpm": 6000},
+    "whisper-large-v3": {"rpm": 20, "tpm": None},
+    "whisper-large-v3-turbo": {"rpm": 20, "tpm": None},
+}
+# Context window per model for prompt budgeting (see prompt_budget)
+LLM_CONTEXT_TOKENS = {
+    "llama3-8b-8192": 8192,
+    "llama3-70b-8192": 8192,
+    "deepseek-r1-distill-llama-70b": 131072,
+}
+# Model tiers per stage, cheapest first (see model_routing); stages not listed use the defaults there
+MODEL_ROUTING_TIERS = {}
+ROUTING_SMALL_INPUT_TOKENS = int(os.environ.get("ROUTING_SMALL_INPUT_TOKENS", "2000"))
+ROUTING_MIN_QUOTA_FRACTION = float(os.environ.get("ROUTING_MIN_QUOTA_FRACTION", "0.2"))
+ROUTING_RECENT_HOURS = float(os.environ.get("ROUTING_RECENT_HOURS", "48"))
+ROUTING_BACKLOG_DAYS = float(os.environ.get("ROUTING_BACKLOG_DAYS", "30"))
+LLM_SCHEDULER_MAX_WAIT_SECONDS = float(os.environ.get("LLM_SCHEDULER_MAX_WAIT_SECONDS", "300"))
+# Response tokens reserved per request against the TPM quota, at most the request's max_tokens
+LLM_OUTPUT_RESERVE_TOKENS = int(os.environ.get("LLM_OUTPUT_RESERVE_TOKENS", "500"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE_SECONDS = float(os.environ.get("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = float(os.environ.get("LLM_BACKOFF_MAX_SECONDS", "60"))
+
+# Retry and time limit overrides per workflow stage, e.g. {"script": {"max_retries": 1, "soft_time_limit": 600}}
+# (see workflow for the stages and defaults)
+WORKFLOW_STAGE_POLICIES = {}
+# Per-podcast leases and enqueue dedup (see locking)
+PODCAST_LEASE_SECONDS = int(os.environ.get("PODCAST_LEASE_SECONDS", "3600"))
+# Re-tag and backfill jobs are leased to one worker; renewed as they make progress
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", "900"))
+ENQUEUE_DEDUP_SECONDS = int(os.environ.get("ENQUEUE_DEDUP_SECONDS", "3600"))
+# Start the workflow for newly ingested episodes of feeds with auto_process on (see auto_process)
+AUTO_PROCESS_ENABLED = os.environ.get("AUTO_PROCESS_ENABLED", "True").lower() == "true"
+# Admission control: work in flight per external provider (see admission)
+PROVIDER_IN_FLIGHT_LIMITS = {
+    "groq": int(os.environ.get("GROQ_TRANSCRIPTION_IN_FLIGHT", "4")),
+    "aws": int(os.environ.get("AWS_TRANSCRIBE_IN_FLIGHT", "10")),
+    "groq-llm": int(os.environ.get("GROQ_LLM_IN_FLIGHT", "8")),
+}
+ADMISSION_REQUEUE_SECONDS = float(os.environ.get("ADMISSION_REQUEUE_SECONDS", "30"))
+# How long /admission/ reuses queue depths before asking the broker again
+ADMISSION_QUEUE_DEPTHS_CACHE_SECONDS = int(os.environ.get("ADMISSION_QUEUE_DEPTHS_CACHE_SECONDS", "15"))
+# Transcription backlog scheduling (see transcription_scheduler)
+TRANSCRIPTION_AGING_WEIGHT = float(os.environ.get("TRANSCRIPTION_AGING_WEIGHT", "1.0"))
+TRANSCRIPTION_DEFAULT_DURATION_SECONDS = int(os.environ.get("TRANSCRIPTION_DEFAULT_DURATION_SECONDS", "3600"))
+TRANSCRIPTION_AUDIO_BYTES_PER_SECOND = int(os.environ.get("TRANSCRIPTION_AUDIO_BYTES_PER_SECOND", "16000"))
+TRANSCRIPTION_MAX_ATTEMPTS = int(os.environ.get("TRANSCRIPTION_MAX_ATTEMPTS", "3"))
+TRANSCRIPTION_PROBE_LIMIT = int(os.environ.get("TRANSCRIPTION_PROBE_LIMIT", "20"))
+# Transcription failover and hedging (see transcription_failover)
+TRANSCRIPTION_PROVIDERS = [p.strip() for p in os.environ.get("TRANSCRIPTION_PROVIDERS", "groq,aws").split(",") if p.strip()]
+TRANSCRIPTION_FAILOVER = os.environ.get("TRANSCRIPTION_FAILOVER", "True").lower() == "true"
+# Start the next provider if the first hasn't answered after this many seconds; 0 disables hedging
+TRANSCRIPTION_HEDGE_SECONDS = float(os.environ.get("TRANSCRIPTION_HEDGE_SECONDS", "0"))
+GROQ_TRANSCRIPTION_TIMEOUT_SECONDS = float(os.environ.get("GROQ_TRANSCRIPTION_TIMEOUT_SECONDS", "900"))
+# Circuit breakers per provider (see circuit_breaker)
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_OPEN_SECONDS = int(os.environ.get("CIRCUIT_OPEN_SECONDS", "300"))
+
+# Async enrichment worker (see async_enrichment)
+ASYNC_ENRICHMENT_CONCURRENCY = int(os.environ.get("ASYNC_ENRICHMENT_CONCURRENCY", "200"))
+ASYNC_MAX_CONCURRENT_REQUESTS = int(os.environ.get("ASYNC_MAX_CONCURRENT_REQUESTS", "100"))
+ASYNC_REQUEST_TIMEOUT_SECONDS = float(os.environ.get("ASYNC_REQUEST_TIMEOUT_SECONDS", "300"))
+
+# Offline batch LLM mode (see llm_batch); point GROQ_BATCH_API_BASE at `manage.py batch_standin_server` to test locally
+GROQ_BATCH_API_BASE = os.environ.get("GROQ_BATCH_API_BASE", "https://api.groq.com/openai/v1")
+LLM_BATCH_COMPLETION_WINDOW = os.environ.get("LLM_BATCH_COMPLETION_WINDOW", "24h")
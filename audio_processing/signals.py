@@ -0,0 +1,29 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Podcast, Tag
+from .tag_catalog import schedule_invalidate
+from .tag_classifier import schedule_update
+
+
+@receiver(m2m_changed, sender=Podcast.tags.through)
+def podcast_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Retrain the tag classifier on episodes whose tags were added, removed or cleared."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            schedule_update(podcast_ids=[instance.pk])
+    elif action == 'pre_clear':
+        # tag.podcasts.clear() doesn't say which podcasts were affected, so record them first
+        instance._cleared_podcast_ids = list(instance.podcasts.values_list('id', flat=True))
+    elif action == 'post_clear':
+        schedule_update(podcast_ids=getattr(instance, '_cleared_podcast_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        schedule_update(podcast_ids=pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_catalog_changed(sender, instance, **kwargs):
+    """Reload the cached tag catalog, and add, reseed or drop the tag in the tag classifier."""
+    schedule_invalidate()
+    schedule_update(sync_tags=True)
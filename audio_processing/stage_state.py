@@ -0,0 +1,168 @@
+"""
+Per-stage processing state for podcasts.
+
+Every workflow stage a podcast goes through has a PodcastStage row recording
+its status, attempt count, timestamps, last error and a fingerprint of the
+inputs it last ran on. A stage whose last run completed on the same inputs is
+up to date and is skipped, so rerunning the workflow resumes at the first
+stage that is incomplete, failed or stale and costs nothing on finished
+episodes. Stage inputs:
+
+- transcript: the audio URL
+- script, summary, tags, enrichment: the transcript
+
+The tag catalog is deliberately not an input: adding or editing a tag would
+make the tags stage of every episode stale. Catalog changes are handled by
+re-tagging only the affected episodes (see retagging). Bumping a stage in STAGE_VERSIONS (e.g. after a prompt change) makes it stale
+for every podcast.
+
+Podcasts processed before stage state existed have no rows; a stage whose
+output is already present is adopted as completed on its current inputs
+instead of being regenerated.
+"""
+import hashlib
+import json
+import logging
+
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+STAGE_VERSIONS = {
+    'transcript': 1,
+    'tags': 1,
+    'script': 1,
+    'summary': 1,
+    'enrichment': 1,
+}
+
+
+def _stage_inputs(podcast, stage):
+    if stage == 'transcript':
+        return [podcast.raw_audio_url]
+    return [podcast.transcript]
+
+
+def fingerprint(podcast, stage):
+    """Hash of the inputs a stage would run on for this podcast."""
+    payload = json.dumps([stage, STAGE_VERSIONS[stage]] + _stage_inputs(podcast, stage), sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _has_output(podcast, stage):
+    if stage == 'transcript':
+        return bool(podcast.transcript)
+    if stage == 'script':
+        return bool(podcast.script_transcript)
+    if stage == 'summary':
+        return bool(podcast.summary)
+    if stage == 'tags':
+        return podcast.tags.exists()
+    if stage == 'enrichment':
+        return bool(podcast.summary and podcast.topics)
+    return False
+
+
+def get_state(podcast, stage):
+    """The PodcastStage row for a podcast's stage, or None if the stage never ran."""
+    from .models import PodcastStage
+
+    return PodcastStage.objects.filter(podcast=podcast, stage=stage).first()
+
+
+def is_current(podcast, stage, input_fingerprint=None):
+    """Whether the stage completed on the podcast's current inputs."""
+    from .models import PodcastStage
+
+    if input_fingerprint is None:
+        input_fingerprint = fingerprint(podcast, stage)
+
+    state = get_state(podcast, stage)
+    if state is not None:
+        if stage == 'transcript' and not podcast.transcript:
+            # Cleared since it was generated
+            return False
+        return state.status == 'completed' and state.input_fingerprint == input_fingerprint
+
+    if not _has_output(podcast, stage):
+        return False
+    now = timezone.now()
+    PodcastStage.objects.get_or_create(podcast=podcast, stage=stage, defaults={
+        'status': 'completed',
+        'input_fingerprint': input_fingerprint,
+        'started_at': now,
+        'finished_at': now,
+    })
+    logger.info(f"Adopted existing {stage} output for: {podcast.raw_audio_url}")
+    return True
+
+
+def pending_stages(podcast, stages):
+    """The stages, in order, that are incomplete or stale for the podcast."""
+    if 'transcript' in stages and not is_current(podcast, 'transcript'):
+        # Every later stage depends on the transcript
+        return list(stages)
+    return [stage for stage in stages if not is_current(podcast, stage)]
+
+
+def begin(podcast, stage, input_fingerprint):
+    """Mark a stage as running on the given inputs and count the attempt."""
+    from .models import PodcastStage
+
+    PodcastStage.objects.get_or_create(podcast=podcast, stage=stage)
+    PodcastStage.objects.filter(podcast=podcast, stage=stage).update(
+        status='running',
+        attempts=F('attempts') + 1,
+        input_fingerprint=input_fingerprint,
+        started_at=timezone.now(),
+        finished_at=None,
+        error='',
+    )
+
+
+def finish(podcast, stage, errors=None):
+    """Mark a running stage as completed, or failed with errors."""
+    from .models import PodcastStage
+
+    PodcastStage.objects.filter(podcast=podcast, stage=stage).update(
+        status='failed' if errors else 'completed',
+        finished_at=timezone.now(),
+        error='\n'.join(errors or []),
+    )
+
+
+def complete_many(stage, input_fingerprints):
+    """
+    Record a stage as completed for many podcasts at once, e.g. for applied batch results.
+    input_fingerprints maps podcast IDs to the inputs each result was produced from.
+    """
+    from .models import PodcastStage
+
+    if not input_fingerprints:
+        return
+    now = timezone.now()
+    PodcastStage.objects.bulk_create(
+        [PodcastStage(podcast_id=podcast_id, stage=stage) for podcast_id in input_fingerprints],
+        ignore_conflicts=True
+    )
+    states = list(PodcastStage.objects.filter(podcast_id__in=list(input_fingerprints), stage=stage))
+    for state in states:
+        state.status = 'completed'
+        state.attempts += 1
+        state.input_fingerprint = input_fingerprints[state.podcast_id]
+        state.started_at = now
+        state.finished_at = now
+        state.error = ''
+    PodcastStage.objects.bulk_update(
+        states, ['status', 'attempts', 'input_fingerprint', 'started_at', 'finished_at', 'error']
+    )
+
+
+def backlog(stage):
+    """Podcasts for which a stage has not completed, for dispatchers to pick work from."""
+    from .models import Podcast, PodcastStage
+
+    # One subquery, so both conditions apply to the same PodcastStage row
+    completed = PodcastStage.objects.filter(podcast=OuterRef('pk'), stage=stage, status='completed')
+    return Podcast.objects.exclude(Exists(completed))
@@ -0,0 +1,259 @@
+"""
+Micro-batched tag classification.
+
+The single-episode tag prompt repeats the whole tag catalog for every episode,
+so for a catalog of any size most of each request is the same tag list. Here
+the excerpts of several episodes are packed into one request that sends the
+catalog once and returns a JSON object mapping each episode ID to its tag IDs.
+Groups are filled greedily up to TAG_BATCH_SIZE episodes and
+TAG_BATCH_PROMPT_TOKENS prompt tokens (capped by what the tag model's context
+window leaves after the response), and every group's tags are applied with
+a single bulk insert into the podcast/tag through table. Episodes the local
+tag classifier is confident about are tagged without an LLM request; episodes
+with both confident and uncertain tags are sent with their uncertain tags as
+candidates, and the LLM may only choose among those for them. Excerpts are
+representative sentences of the whole episode (see compression).
+"""
+import json
+import logging
+
+from django.conf import settings
+
+from .models.groq_mixin import TAG_MODEL
+from .prompt_budget import available_tokens, count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Response budget per episode: the ID key plus a handful of tag IDs
+TAG_BATCH_MAX_TOKENS_PER_EPISODE = 40
+
+
+def group_for_prompt(podcasts, excerpts, tag_list, batch_size, prompt_tokens, candidates=None):
+    """
+    Split podcasts into groups that each fit in one batched tag prompt, given
+    their {podcast_id: excerpt} and {podcast_id: candidate tag IDs}.
+    A podcast whose excerpt alone exceeds the budget still gets a group of its own.
+    """
+    from .prompts import format_tag_candidates, get_batch_tag_suggestion_prompt
+
+    candidates = candidates or {}
+    tags_by_id = {tag['id']: tag for tag in tag_list}
+
+    shortlist_size = getattr(settings, 'TAG_SHORTLIST_SIZE', 40)
+    prompt_tokens = min(
+        prompt_tokens, available_tokens(TAG_MODEL, TAG_BATCH_MAX_TOKENS_PER_EPISODE * batch_size)
+    )
+    # The instructions and the largest possible shortlist
+    catalog_tokens = count_tokens(get_batch_tag_suggestion_prompt(tag_list[:shortlist_size], {}), TAG_MODEL)
+
+    groups = []
+    group = []
+    group_tokens = catalog_tokens
+    for podcast in podcasts:
+        candidate_ids = candidates.get(podcast.id)
+        excerpt_tokens = count_tokens(
+            f"Episode {podcast.id}{format_tag_candidates(candidate_ids)}:\n{excerpts[podcast.id]}\n\n", TAG_MODEL
+        )
+        if candidate_ids:
+            # Candidates may add tags beyond the shortlist to the catalog section
+            excerpt_tokens += count_tokens(
+                json.dumps([tags_by_id[tag_id] for tag_id in candidate_ids], separators=(',', ':')), TAG_MODEL
+            )
+        if group and (len(group) >= batch_size or group_tokens + excerpt_tokens > prompt_tokens):
+            groups.append(group)
+            group = []
+            group_tokens = catalog_tokens
+        group.append(podcast)
+        group_tokens += excerpt_tokens
+
+    if group:
+        groups.append(group)
+    return groups
+
+
+def parse_tag_map(response, podcast_ids, valid_tag_ids, candidates=None):
+    """
+    Parse a batched tag response into {podcast_id: [tag IDs]}.
+    Unknown episodes and tag IDs, and tags outside an episode's candidates, are
+    dropped; episodes missing from the response are left out, so callers can
+    tell them apart from episodes with no tags.
+    Returns None if the response is not a JSON object.
+    """
+    candidates = candidates or {}
+    try:
+        data = json.loads(response)
+    except json.JSONDecodeError:
+        logger.error(f"Failed to parse batched tag response as JSON: {response}")
+        return None
+
+    if not isinstance(data, dict):
+        logger.error(f"Expected JSON object of episode tag IDs, got: {type(data)}")
+        return None
+
+    tag_map = {}
+    for key, tag_ids in data.items():
+        try:
+            podcast_id = int(key)
+        except (TypeError, ValueError):
+            podcast_id = None
+        if podcast_id not in podcast_ids:
+            logger.warning(f"Ignoring unknown episode in batched tag response: {key}")
+            continue
+        if not isinstance(tag_ids, list):
+            logger.warning(f"Expected list of tag IDs for episode {podcast_id}, got: {type(tag_ids)}")
+            continue
+
+        allowed = set(candidates[podcast_id]) if candidates.get(podcast_id) else valid_tag_ids
+        cleaned = []
+        for tag_id in tag_ids:
+            try:
+                tag_id = int(tag_id)
+            except (TypeError, ValueError):
+                continue
+            if tag_id not in valid_tag_ids:
+                logger.warning(f"Tag with ID {tag_id} does not exist")
+                continue
+            if tag_id not in allowed:
+                logger.warning(f"Ignoring tag {tag_id} for episode {podcast_id}: not one of its candidates")
+                continue
+            if tag_id not in cleaned:
+                cleaned.append(tag_id)
+        tag_map[podcast_id] = cleaned
+
+    return tag_map
+
+
+def bulk_apply_tags(tag_map):
+    """Apply {podcast_id: [tag IDs]} with one bulk insert into the podcast/tag through table."""
+    from .models import Podcast
+
+    through = Podcast.tags.through
+    through.objects.bulk_create(
+        [
+            through(podcast_id=podcast_id, tag_id=tag_id)
+            for podcast_id, tag_ids in tag_map.items()
+            for tag_id in tag_ids
+        ],
+        ignore_conflicts=True
+    )
+
+
+def _tag_group(group, excerpts, tag_list, valid_tag_ids, candidates):
+    """
+    Send one batched tag request for a group of podcasts. Episodes without candidates
+    share a shortlist of the catalog; the others are offered only their candidates.
+    Returns the tag map or None.
+    """
+    from .models import RSSFeed
+    from .prompts import get_batch_tag_suggestion_prompt
+    from .tag_catalog import shortlist_tags
+
+    excerpts = {podcast.id: excerpts[podcast.id] for podcast in group}
+    candidates = {podcast.id: candidates[podcast.id] for podcast in group if podcast.id in candidates}
+    open_podcasts = [podcast for podcast in group if podcast.id not in candidates]
+
+    offered = []
+    if open_podcasts:
+        feed_tag_ids = RSSFeed.tags.through.objects.filter(
+            rssfeed_id__in={podcast.rss_feed_id for podcast in open_podcasts if podcast.rss_feed_id}
+        ).values_list('tag_id', flat=True)
+        offered = shortlist_tags(
+            tag_list, "\n".join(excerpts[podcast.id] for podcast in open_podcasts), feed_tag_ids
+        )
+    offered_ids = {tag['id'] for tag in offered}
+    candidate_ids = {tag_id for tag_ids in candidates.values() for tag_id in tag_ids}
+    offered += [tag for tag in tag_list if tag['id'] in candidate_ids and tag['id'] not in offered_ids]
+    prompt = get_batch_tag_suggestion_prompt(offered, excerpts, candidates)
+
+    # Any podcast can make the request; the chat helper does not depend on the instance
+    response = group[0]._call_groq_chat(
+        prompt, TAG_MODEL, TAG_BATCH_MAX_TOKENS_PER_EPISODE * len(group), json_mode=True
+    )
+    if response is None:
+        logger.error(f"Failed to get batched tag suggestions for {len(group)} podcasts")
+        return None
+
+    return parse_tag_map(response, set(excerpts), valid_tag_ids, candidates)
+
+
+def suggest_and_apply_tags_batched(podcasts, batch_size=None, tag_list=None):
+    """
+    Suggest and apply tags for many podcasts, several episodes per LLM request.
+    Returns {podcast_id: [applied tag IDs]} with None for podcasts that could not be tagged.
+
+    Args:
+        tag_list: Only offer these tags (as from get_tag_catalog) instead of the whole
+            catalog; the local classifier is skipped, since it decides over every tag
+    """
+    from .compression import compress_for_tagging
+    from .models.groq_mixin import run_concurrently
+    from .tag_classifier import classify, schedule_update
+
+    if batch_size is None:
+        batch_size = getattr(settings, 'TAG_BATCH_SIZE', 10)
+    prompt_tokens = getattr(settings, 'TAG_BATCH_PROMPT_TOKENS', 6000)
+
+    podcasts = list(podcasts)
+    results = {podcast.id: None for podcast in podcasts}
+    podcasts = [podcast for podcast in podcasts if podcast._validate_transcript()]
+    if not podcasts:
+        return results
+
+    restricted = tag_list is not None
+    if not restricted:
+        tag_list = podcasts[0]._get_available_tags()
+    if not tag_list:
+        return results
+    valid_tag_ids = {tag['id'] for tag in tag_list}
+
+    # Confident tags are applied locally; only episodes with uncertain tags, or
+    # without any confident tag, reach the LLM, and its tags are added to them.
+    # Episodes with confident tags are only asked about their uncertain ones.
+    classified = {}
+    candidates = {}
+    ambiguous = []
+    for podcast in podcasts:
+        result = None if restricted else classify(podcast.transcript)
+        if result is None or not result[0]:
+            ambiguous.append(podcast)
+            continue
+        classified[podcast.id] = result[0]
+        uncertain_ids = [tag_id for tag_id in result[1] if tag_id in valid_tag_ids]
+        if uncertain_ids:
+            candidates[podcast.id] = uncertain_ids
+            ambiguous.append(podcast)
+    if classified:
+        bulk_apply_tags(classified)
+        results.update(classified)
+        logger.info(f"Classifier tagged {len(classified)} of {len(podcasts)} podcasts locally")
+    podcasts = ambiguous
+    if not podcasts:
+        return results
+
+    excerpts = {podcast.id: compress_for_tagging(podcast.transcript) for podcast in podcasts}
+    groups = group_for_prompt(podcasts, excerpts, tag_list, batch_size, prompt_tokens, candidates)
+    logger.info(f"Tagging {len(podcasts)} podcasts in {len(groups)} batched requests")
+
+    tag_maps = run_concurrently(
+        lambda group: _tag_group(group, excerpts, tag_list, valid_tag_ids, candidates), groups
+    )
+
+    tag_map = {}
+    for group, group_map in zip(groups, tag_maps):
+        if group_map is None:
+            continue
+        missing = [podcast.id for podcast in group if podcast.id not in group_map]
+        if missing:
+            logger.warning(f"Batched tag response omitted podcasts: {missing}")
+        tag_map.update(group_map)
+
+    bulk_apply_tags(tag_map)
+    for podcast_id, tag_ids in tag_map.items():
+        confident = classified.get(podcast_id, [])
+        results[podcast_id] = confident + [tag_id for tag_id in tag_ids if tag_id not in confident]
+    # Bulk inserts bypass the m2m signals, so train the classifier on the LLM's labels here
+    schedule_update(podcast_ids=tag_map.keys())
+
+    applied = sum(1 for tag_ids in tag_map.values() if tag_ids)
+    logger.info(f"Applied tags to {applied} of {len(results)} podcasts")
+    return results
@@ -0,0 +1,156 @@
+"""
+Cached and shortlisted tag catalog for the tag prompts.
+
+The serialized catalog is kept in process memory and reloaded only when its
+version changes. Tag save/delete signals bump the version, which is stored in
+the Django cache (TAG_CATALOG_CACHE_ALIAS), so with a shared cache backend
+every process sees the change on its next call. TAG_CATALOG_MAX_AGE_SECONDS
+bounds how stale a process can get when the cache is process-local.
+
+Prompts only include a shortlist of TAG_SHORTLIST_SIZE candidate tags per
+episode: the tags of the episode's RSS feed first, then the tags whose name
+and description share the most distinctive words with the transcript. The
+prompt size therefore stays constant however large the catalog grows.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'audio_processing:tag_catalog_version'
+# Tag names are a stronger signal than words in their descriptions
+NAME_WEIGHT = 2.0
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were "
+    "will with about episode episodes podcast podcasts show shows related topics topic discussing".split()
+)
+
+_catalog = {'version': None, 'loaded_at': 0.0, 'tags': None, 'tag_words': None}
+_catalog_lock = threading.Lock()
+
+
+def content_words(text):
+    """Lowercased content words in singular form ('policies' -> 'policy', 'markets' -> 'market')."""
+    words = set()
+    for word in WORD_PATTERN.findall((text or '').lower()):
+        if word in STOP_WORDS or len(word) < 3:
+            continue
+        if len(word) > 4 and word.endswith('ies'):
+            word = word[:-3] + 'y'
+        elif len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+def _cache():
+    return caches[getattr(settings, 'TAG_CATALOG_CACHE_ALIAS', 'default')]
+
+
+def invalidate():
+    """Bump the catalog version so every process reloads it on its next call."""
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+    with _catalog_lock:
+        _catalog['version'] = None
+
+
+def _weigh_tag_words(tags):
+    """
+    Word weights per tag for lexical matching: words that appear in few tags
+    weigh more, and words from the tag name weigh NAME_WEIGHT times as much.
+    """
+    name_words = [content_words(tag['name']) for tag in tags]
+    all_words = [names | content_words(tag['description']) for tag, names in zip(tags, name_words)]
+    document_freq = Counter(word for words in all_words for word in words)
+
+    tag_words = []
+    for names, words in zip(name_words, all_words):
+        tag_words.append({
+            word: math.log((1 + len(tags)) / document_freq[word]) * (NAME_WEIGHT if word in names else 1.0)
+            for word in words
+        })
+    return tag_words
+
+
+def _load():
+    from .models import Tag
+
+    tags = [
+        {"id": tag.id, "name": tag.name, "description": tag.description or tag.name}
+        for tag in Tag.objects.all()
+    ]
+    return tags, _weigh_tag_words(tags)
+
+
+def get_tag_catalog():
+    """
+    Return the tag catalog as a list of dicts with id, name and description, in
+    catalog order. The list is shared between callers and must not be modified.
+    """
+    version = _cache().get(VERSION_KEY, 0)
+    max_age = getattr(settings, 'TAG_CATALOG_MAX_AGE_SECONDS', 300)
+
+    with _catalog_lock:
+        if (
+            _catalog['tags'] is None
+            or _catalog['version'] != version
+            or time.monotonic() - _catalog['loaded_at'] > max_age
+        ):
+            _catalog['tags'], _catalog['tag_words'] = _load()
+            _catalog['version'] = version
+            _catalog['loaded_at'] = time.monotonic()
+            logger.info(f"Loaded tag catalog ({len(_catalog['tags'])} tags, version {version})")
+        return _catalog['tags']
+
+
+def _get_tag_words(tag_list):
+    """Word weights for tag_list, reusing the cached ones when it is the cached catalog."""
+    with _catalog_lock:
+        if tag_list is _catalog['tags']:
+            return _catalog['tag_words']
+    return _weigh_tag_words(tag_list)
+
+
+def shortlist_tags(tag_list, text, feed_tag_ids=(), limit=None):
+    """
+    Return at most `limit` (default TAG_SHORTLIST_SIZE) candidate tags for text:
+    the feed's tags first, then by weighted word overlap with the text, ties in
+    catalog order. Catalogs that already fit are returned unchanged.
+    """
+    if limit is None:
+        limit = getattr(settings, 'TAG_SHORTLIST_SIZE', 40)
+    if len(tag_list) <= limit:
+        return tag_list
+
+    text_words = content_words(text)
+    feed_tag_ids = set(feed_tag_ids)
+
+    def rank(position):
+        tag = tag_list[position]
+        weights = tag_words[position]
+        overlap = sum(weight for word, weight in weights.items() if word in text_words)
+        similarity = overlap / math.sqrt(sum(weights.values())) if weights else 0.0
+        return (tag['id'] not in feed_tag_ids, -similarity, position)
+
+    tag_words = _get_tag_words(tag_list)
+    positions = sorted(range(len(tag_list)), key=rank)[:limit]
+    return [tag_list[position] for position in sorted(positions)]
+
+
+def schedule_invalidate():
+    """Invalidate the catalog once the current transaction commits."""
+    transaction.on_commit(invalidate)
@@ -0,0 +1,429 @@
+"""
+Local tag classifier used as a pre-filter in front of the LLM.
+
+Episodes are represented as hashed TF-IDF vectors of their transcript's words
+and word pairs, and each tag as the centroid of the episodes already tagged
+with it through Podcast.tags, seeded with the tag's name and description.
+Scoring an episode is one matrix-vector product on the CPU, so confident
+decisions are made in milliseconds without a network call:
+
+- tags scoring at least TAG_CLASSIFIER_APPLY_THRESHOLD that have
+  TAG_CLASSIFIER_MIN_EXAMPLES tagged episodes are applied directly
+- tags scoring between TAG_CLASSIFIER_REJECT_THRESHOLD and the apply
+  threshold are uncertain, and the LLM decides on just those tags
+- episodes with no confident tag go to the LLM with the whole catalog
+
+Feature hashing keeps the vocabulary fixed, so the model is updated in place
+as labels change: signals on Podcast.tags and Tag record a pending
+TagClassifierUpdate row, and at most one update_tag_classifier task is queued
+per TAG_CLASSIFIER_UPDATE_DELAY_SECONDS to add or remove the vectors of every
+pending episode from the tag sums in one pass. The tags each episode was
+trained with are kept in TagClassifierLabel rows, so an update only reads and
+writes the labels of the episodes it touches. The arrays are stored in a
+single TagClassifierArtifact row and reloaded by workers when its version
+changes. Run `manage.py tag_classifier rebuild` to retrain from scratch, e.g.
+after transcripts have been regenerated.
+"""
+import io
+import logging
+import re
+import threading
+import zlib
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 2 ** 14
+MAX_TEXT_CHARS = 50000
+# Weight of the tag name and description relative to one tagged episode
+SEED_WEIGHT = 1.0
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9']*")
+
+_loaded = {'version': None, 'classifier': None}
+_loaded_lock = threading.Lock()
+
+
+def term_vector(text, dims=DIMENSIONS):
+    """Hashed, log-scaled and L2-normalized term frequencies of the words and word pairs in text."""
+    tokens = TOKEN_PATTERN.findall((text or '')[:MAX_TEXT_CHARS].lower())
+    features = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+    if not features:
+        return np.zeros(dims, dtype=np.float32)
+
+    indices = np.fromiter(
+        (zlib.crc32(feature.encode('utf-8')) % dims for feature in features),
+        dtype=np.int64, count=len(features)
+    )
+    vector = np.log1p(np.bincount(indices, minlength=dims).astype(np.float32))
+    return vector / np.linalg.norm(vector)
+
+
+def _seed_text(tag):
+    return f"{tag.name}. {tag.description or ''}"
+
+
+class TagClassifier:
+    """Hashed TF-IDF nearest-centroid classifier over the tag catalog."""
+
+    def __init__(self, dims=DIMENSIONS):
+        self.dims = dims
+        self.tag_ids = []
+        self.tag_sums = np.zeros((0, dims), dtype=np.float32)
+        self.example_counts = np.zeros(0, dtype=np.int64)
+        self.doc_freq = np.zeros(dims, dtype=np.float32)
+        self.document_count = 0
+        # tag ID -> seed text, and podcast ID -> tag IDs each episode was trained with,
+        # for the episodes being updated (loaded from and stored to TagClassifierLabel)
+        self.seeds = {}
+        self.labels = {}
+        self._centroids = None
+
+    def _row(self, tag_id):
+        return self.tag_ids.index(tag_id)
+
+    def add_tag(self, tag_id, seed_text):
+        self.tag_ids.append(tag_id)
+        self.tag_sums = np.vstack([self.tag_sums, np.zeros((1, self.dims), dtype=np.float32)])
+        self.example_counts = np.append(self.example_counts, 0)
+        self.seeds[tag_id] = ''
+        self.set_seed(tag_id, seed_text)
+
+    def set_seed(self, tag_id, seed_text):
+        """Replace a tag's seed text (its name and description)."""
+        if self.seeds.get(tag_id) == seed_text:
+            return
+        row = self._row(tag_id)
+        if self.seeds.get(tag_id):
+            self.tag_sums[row] -= SEED_WEIGHT * term_vector(self.seeds[tag_id], self.dims)
+        self.tag_sums[row] += SEED_WEIGHT * term_vector(seed_text, self.dims)
+        self.seeds[tag_id] = seed_text
+        self._centroids = None
+
+    def remove_tag(self, tag_id):
+        """Drop a tag's row. Episodes trained with the tag should be relabeled first."""
+        row = self._row(tag_id)
+        self.tag_ids.pop(row)
+        self.tag_sums = np.delete(self.tag_sums, row, axis=0)
+        self.example_counts = np.delete(self.example_counts, row)
+        self.seeds.pop(tag_id, None)
+        self._centroids = None
+
+    def set_labels(self, podcast_id, vector, tag_ids):
+        """
+        Make the model reflect an episode's current tags, adding or removing its vector
+        from the sums of the tags that changed since it was last trained.
+        """
+        new = [tag_id for tag_id in tag_ids if tag_id in self.seeds]
+        old = self.labels.get(podcast_id, [])
+
+        for tag_id in set(old) - set(new):
+            row = self._row(tag_id)
+            self.tag_sums[row] -= vector
+            self.example_counts[row] -= 1
+        for tag_id in set(new) - set(old):
+            row = self._row(tag_id)
+            self.tag_sums[row] += vector
+            self.example_counts[row] += 1
+
+        if new and not old:
+            self.doc_freq += vector > 0
+            self.document_count += 1
+        elif old and not new:
+            self.doc_freq -= vector > 0
+            self.document_count -= 1
+
+        if new:
+            self.labels[podcast_id] = sorted(new)
+        else:
+            self.labels.pop(podcast_id, None)
+        self._centroids = None
+
+    def _idf(self):
+        # Features that occur in every tagged episode get no weight
+        return np.log((1.0 + self.document_count) / (1.0 + self.doc_freq))
+
+    def _get_centroids(self):
+        if self._centroids is None:
+            centroids = self.tag_sums * self._idf()
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            self._centroids = np.divide(centroids, norms, out=np.zeros_like(centroids), where=norms > 0)
+        return self._centroids
+
+    def scores(self, text):
+        """Cosine similarity between the text and each tag centroid, as an array in tag_ids order."""
+        vector = term_vector(text, self.dims) * self._idf()
+        norm = np.linalg.norm(vector)
+        if not norm or not self.tag_ids:
+            return np.zeros(len(self.tag_ids), dtype=np.float32)
+        return self._get_centroids() @ (vector / norm)
+
+    def classify(self, text):
+        """
+        Classify a transcript. Returns (tag_ids, uncertain_ids): the tags confident enough
+        to apply, and the tags the LLM should decide on. With no confident tags the
+        episode needs the LLM even when no tag is uncertain.
+        """
+        apply_threshold = getattr(settings, 'TAG_CLASSIFIER_APPLY_THRESHOLD', 0.3)
+        reject_threshold = getattr(settings, 'TAG_CLASSIFIER_REJECT_THRESHOLD', 0.1)
+        min_examples = getattr(settings, 'TAG_CLASSIFIER_MIN_EXAMPLES', 5)
+
+        scores = self.scores(text)
+        confident = (scores >= apply_threshold) & (self.example_counts >= min_examples)
+        uncertain = (scores >= reject_threshold) & ~confident
+
+        tag_ids = [tag_id for tag_id, keep in zip(self.tag_ids, confident) if keep]
+        uncertain_ids = [tag_id for tag_id, ask in zip(self.tag_ids, uncertain) if ask]
+        return tag_ids, uncertain_ids
+
+    def to_artifact(self):
+        """Serialize to (data bytes, metadata dict) for TagClassifierArtifact."""
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer, tag_sums=self.tag_sums, example_counts=self.example_counts, doc_freq=self.doc_freq
+        )
+        metadata = {
+            'dims': self.dims,
+            'tag_ids': self.tag_ids,
+            'document_count': self.document_count,
+            'seeds': {str(tag_id): text for tag_id, text in self.seeds.items()},
+        }
+        return buffer.getvalue(), metadata
+
+    @classmethod
+    def from_artifact(cls, data, metadata):
+        classifier = cls(metadata['dims'])
+        arrays = np.load(io.BytesIO(bytes(data)))
+        classifier.tag_sums = arrays['tag_sums']
+        classifier.example_counts = arrays['example_counts']
+        classifier.doc_freq = arrays['doc_freq']
+        classifier.tag_ids = list(metadata['tag_ids'])
+        classifier.document_count = metadata['document_count']
+        classifier.seeds = {int(tag_id): text for tag_id, text in metadata['seeds'].items()}
+        return classifier
+
+
+def load_classifier():
+    """Return the current classifier, reloading it if another worker updated it, or None if untrained."""
+    from .models import TagClassifierArtifact
+
+    version = TagClassifierArtifact.objects.values_list('version', flat=True).first()
+    if not version:
+        return None
+
+    with _loaded_lock:
+        if _loaded['version'] != version:
+            artifact = TagClassifierArtifact.objects.get()
+            _loaded['classifier'] = TagClassifier.from_artifact(artifact.data, artifact.metadata)
+            _loaded['version'] = artifact.version
+        return _loaded['classifier']
+
+
+def _save(artifact, classifier):
+    artifact.data, artifact.metadata = classifier.to_artifact()
+    artifact.labeled_documents = classifier.document_count
+    artifact.version += 1
+    artifact.save()
+
+
+def _load_labels(podcast_ids):
+    """{podcast_id: [tag IDs]} the given episodes were trained with."""
+    from .models import TagClassifierLabel
+
+    labels = {}
+    rows = TagClassifierLabel.objects.filter(podcast_id__in=podcast_ids).order_by('tag_id')
+    for podcast_id, tag_id in rows.values_list('podcast_id', 'tag_id'):
+        labels.setdefault(podcast_id, []).append(tag_id)
+    return labels
+
+
+def _store_labels(classifier, podcast_ids):
+    """Replace the stored labels of the given episodes with the classifier's."""
+    from .models import TagClassifierLabel
+
+    TagClassifierLabel.objects.filter(podcast_id__in=podcast_ids).delete()
+    TagClassifierLabel.objects.bulk_create(
+        TagClassifierLabel(podcast_id=podcast_id, tag_id=tag_id)
+        for podcast_id in podcast_ids
+        for tag_id in classifier.labels.get(podcast_id, [])
+    )
+
+
+def _pending_updates():
+    """(last pending TagClassifierUpdate ID, podcast IDs, whether the catalog changed)."""
+    from .models import TagClassifierUpdate
+
+    pending = TagClassifierUpdate.objects.aggregate(last_id=Max('id'))['last_id']
+    if pending is None:
+        return None, set(), False
+    rows = TagClassifierUpdate.objects.filter(id__lte=pending)
+    podcast_ids = set(rows.exclude(podcast_id__isnull=True).values_list('podcast_id', flat=True))
+    return pending, podcast_ids, rows.filter(sync_tags=True).exists()
+
+
+def _clear_pending(last_id):
+    from .models import TagClassifierUpdate
+
+    if last_id is not None:
+        TagClassifierUpdate.objects.filter(id__lte=last_id).delete()
+
+
+def _podcast_tags(podcast_ids):
+    """Current {podcast_id: (transcript, [tag IDs])} for podcasts that have a transcript."""
+    from .models import Podcast
+
+    podcasts = (
+        Podcast.objects.filter(pk__in=podcast_ids)
+        .exclude(transcript__isnull=True).exclude(transcript='')
+        .only('id', 'transcript').prefetch_related('tags')
+    )
+    return {podcast.id: (podcast.transcript, [tag.id for tag in podcast.tags.all()]) for podcast in podcasts}
+
+
+def rebuild():
+    """Retrain the classifier from scratch from the tag catalog and every tagged episode."""
+    from .models import Podcast, Tag, TagClassifierArtifact, TagClassifierLabel
+
+    last_pending, _, _ = _pending_updates()
+    classifier = TagClassifier()
+    for tag in Tag.objects.all():
+        classifier.add_tag(tag.id, _seed_text(tag))
+
+    podcast_ids = Podcast.objects.filter(tags__isnull=False).values_list('id', flat=True).distinct()
+    for podcast_id, (transcript, tag_ids) in _podcast_tags(list(podcast_ids)).items():
+        classifier.set_labels(podcast_id, term_vector(transcript, classifier.dims), tag_ids)
+
+    with transaction.atomic():
+        artifact = TagClassifierArtifact.objects.select_for_update().first() or TagClassifierArtifact()
+        artifact.update_due_at = None
+        _save(artifact, classifier)
+        TagClassifierLabel.objects.all().delete()
+        _store_labels(classifier, list(classifier.labels))
+        _clear_pending(last_pending)
+
+    logger.info(f"Rebuilt tag classifier with {len(classifier.tag_ids)} tags from {classifier.document_count} episodes")
+    return classifier
+
+
+def update(podcast_ids=(), sync_tags=False):
+    """
+    Incrementally update the stored classifier: add, remove or reseed tags that changed in
+    the catalog when sync_tags is set, and retrain the given episodes with their current tags.
+    Pending TagClassifierUpdate rows are applied in the same pass.
+    """
+    from .models import Tag, TagClassifierArtifact, TagClassifierLabel
+
+    with transaction.atomic():
+        artifact = TagClassifierArtifact.objects.select_for_update().first()
+        if artifact is None or not artifact.version:
+            return rebuild()
+
+        # Changes recorded from now on queue the next update
+        artifact.update_due_at = None
+        last_pending, pending_ids, pending_sync = _pending_updates()
+        podcast_ids = set(podcast_ids) | pending_ids
+        sync_tags = sync_tags or pending_sync
+
+        classifier = TagClassifier.from_artifact(artifact.data, artifact.metadata)
+
+        removed = set(classifier.tag_ids)
+        if sync_tags:
+            for tag in Tag.objects.all():
+                removed.discard(tag.id)
+                if tag.id in classifier.seeds:
+                    classifier.set_seed(tag.id, _seed_text(tag))
+                else:
+                    classifier.add_tag(tag.id, _seed_text(tag))
+            # Episodes trained with a deleted tag are relabeled before its row is dropped
+            podcast_ids.update(
+                TagClassifierLabel.objects.filter(tag_id__in=removed).values_list('podcast_id', flat=True)
+            )
+        else:
+            removed = set()
+
+        classifier.labels = _load_labels(podcast_ids)
+        current = _podcast_tags(podcast_ids)
+        for podcast_id in podcast_ids:
+            transcript, tag_ids = current.get(podcast_id, (None, []))
+            if transcript is None and podcast_id not in classifier.labels:
+                continue
+            classifier.set_labels(podcast_id, term_vector(transcript, classifier.dims), [
+                tag_id for tag_id in tag_ids if tag_id not in removed
+            ])
+
+        for tag_id in removed:
+            classifier.remove_tag(tag_id)
+
+        _save(artifact, classifier)
+        _store_labels(classifier, podcast_ids)
+        _clear_pending(last_pending)
+    return classifier
+
+
+def _claim_update(delay):
+    """
+    Mark an update as queued unless one already is. Returns False if a queued task will
+    pick up pending changes. A claim whose task never ran expires after another delay.
+    """
+    from .models import TagClassifierArtifact
+
+    if not TagClassifierArtifact.objects.exists():
+        # Not trained yet: the queued update rebuilds from scratch
+        return True
+    now = timezone.now()
+    return bool(
+        TagClassifierArtifact.objects
+        .filter(Q(update_due_at__isnull=True) | Q(update_due_at__lt=now - timedelta(seconds=delay)))
+        .update(update_due_at=now + timedelta(seconds=delay))
+    )
+
+
+def schedule_update(podcast_ids=(), sync_tags=False):
+    """
+    Record the changed episodes, or a catalog change, as pending, and queue one
+    update_tag_classifier task per TAG_CLASSIFIER_UPDATE_DELAY_SECONDS once the
+    current transaction commits.
+    """
+    from .models import TagClassifierUpdate
+
+    if not getattr(settings, 'TAG_CLASSIFIER_ENABLED', True):
+        return
+
+    rows = [TagClassifierUpdate(podcast_id=podcast_id) for podcast_id in podcast_ids]
+    if sync_tags:
+        rows.append(TagClassifierUpdate(sync_tags=True))
+    if not rows:
+        return
+    TagClassifierUpdate.objects.bulk_create(rows)
+
+    def enqueue():
+        from .tasks.podcast_tasks import update_tag_classifier
+
+        delay = getattr(settings, 'TAG_CLASSIFIER_UPDATE_DELAY_SECONDS', 30)
+        try:
+            if _claim_update(delay):
+                update_tag_classifier.apply_async(countdown=delay)
+        except Exception as e:
+            logger.error(f"Failed to queue tag classifier update: {str(e)}")
+
+    transaction.on_commit(enqueue)
+
+
+def classify(text):
+    """
+    Classify a transcript with the stored model.
+    Returns (tag_ids, uncertain_ids), or None if the classifier is disabled or not trained yet.
+    """
+    if not getattr(settings, 'TAG_CLASSIFIER_ENABLED', True):
+        return None
+
+    classifier = load_classifier()
+    if classifier is None or not classifier.document_count:
+        return None
+    return classifier.classify(text)
@@ -1,5 +1,2 @@
-from celery import Celery
-
-from django.conf import settings
-
-celery = Celery('tasks', broker=settings.CELERY_BROKER_URL)
+# Tasks are sent through the app configured in audio_processing.celery, so its queues and routes apply
+from audio_processing.celery import app as celery
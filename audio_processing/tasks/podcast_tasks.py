@@ -1,59 +1,418 @@
 from celery import shared_task
 from audio_processing.models import Podcast
+from audio_processing import admission, background_jobs, locking, workflow
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task
-def add_transcript(podcast_id):
+def _get_podcast(podcast_id, job_id=None):
+    """The podcast, or None after reporting it as failed to the background job that sent the task."""
+    try:
+        return Podcast.objects.get(pk=podcast_id)
+    except Podcast.DoesNotExist:
+        logger.error(f"Podcast {podcast_id} does not exist")
+        background_jobs.report(job_id, podcast_id, {"errors": [f"Podcast {podcast_id} does not exist"]})
+        return None
+
+
+def _run_stage(task, podcast, stage, job_id=None, provider=None, refresh=False):
+    """
+    Run a workflow stage for a task, re-queueing the task if the stage wasn't
+    admitted and otherwise reporting the result to the background job that sent it.
+    """
+    try:
+        result = workflow.run_stage(podcast, stage, provider=provider, refresh=refresh)
+    except Exception as e:
+        background_jobs.report(job_id, podcast.pk, {"errors": [str(e)]})
+        raise
+    
+    if result.get('throttled'):
+        admission.requeue(task, podcast.pk, stage)
+    else:
+        background_jobs.report(job_id, podcast.pk, result)
+    return result
+
+
+@shared_task(bind=True)
+def add_transcript(self, podcast_id, method='groq', job_id=None):
     """
     Celery task to process a podcast file and generate transcript.
+    Re-queued with a delay while the provider is at its in-flight limit.
     """
     logger.info(f"Processing transcript for podcast ID: {podcast_id}")
-    # Get or create podcast entry
-    podcast = Podcast.objects.get(pk=podcast_id)
+    podcast = _get_podcast(podcast_id, job_id)
+    if podcast is None:
+        return {"success": False, "error": "Podcast does not exist"}
     
-    # Process transcript using model method
-    transcript = podcast.generate_transcript()
+    # Process transcript as a workflow stage, so it is leased and its attempts are recorded
+    result = _run_stage(self, podcast, 'transcript', job_id, provider=method)
     
-    if transcript:
+    if result.get('throttled'):
+        return {"success": False, "requeued": True}
+    if not result['errors']:
         logger.info(f"Podcast transcript updated: {podcast}")
-        return {"success": True, "transcript_length": len(transcript)}
+        return {"success": True, "transcript_length": len(podcast.transcript)}
     else:
         logger.error(f"Failed to process transcript for: {podcast}")
-        return {"success": False, "error": "Failed to generate transcript"}
+        return {"success": False, "error": result['errors'][0]}
 
-@shared_task
-def suggest_and_apply_tags(podcast_id):
+@shared_task(bind=True)
+def suggest_and_apply_tags(self, podcast_id, job_id=None, refresh=False):
     """
     Celery task to suggest and apply tags to a podcast.
+    Re-queued with a delay while the LLM provider is at its in-flight limit.
+    With refresh, cached LLM responses are not reused.
     """
     logger.info(f"Suggesting tags for podcast ID: {podcast_id}")
     
+    podcast = _get_podcast(podcast_id, job_id)
+    if podcast is None:
+        return {"success": False, "error": "Podcast does not exist"}
+    
     try:
-        podcast = Podcast.objects.get(pk=podcast_id)
-        applied_tags = podcast.suggest_and_apply_tags()
+        # Run as the tags workflow stage, so it is leased and admitted like the workflow's
+        result = _run_stage(self, podcast, 'tags', job_id, refresh=refresh)
         
-        if applied_tags is not None:
-            logger.info(f"Applied {len(applied_tags)} tags to podcast: {podcast.raw_audio_url[:50]}...")
-            return {"success": True, "applied_tags": len(applied_tags)}
+        if result.get('throttled'):
+            return {"success": False, "requeued": True}
+        if not result['errors']:
+            logger.info(f"Applied {result.get('tags_applied', 0)} tags to podcast: {podcast.raw_audio_url[:50]}...")
+            return {"success": True, "applied_tags": result.get('tags_applied', 0)}
         else:
             logger.error(f"No tags applied for podcast: {podcast.raw_audio_url[:50]}")
-            return {"success": False, "error": "No tags applied"}
+            return {"success": False, "error": result['errors'][0]}
     
     except Exception as e:
         logger.error(f"Error suggesting tags for podcast ID {podcast_id}: {str(e)}")
         return {"success": False, "error": str(e)}
+
+@shared_task(bind=True)
+def generate_speaker_script(self, podcast_id, job_id=None, refresh=False):
+    """
+    Celery task to generate a speaker-attributed script for a podcast.
+    Re-queued with a delay while the LLM provider is at its in-flight limit.
+    With refresh, cached LLM responses are not reused.
+    """
+    logger.info(f"Generating speaker script for podcast ID: {podcast_id}")
+    
+    podcast = _get_podcast(podcast_id, job_id)
+    if podcast is None:
+        return {"success": False, "error": "Podcast does not exist"}
+    result = _run_stage(self, podcast, 'script', job_id, refresh=refresh)
+    
+    if result.get('throttled'):
+        return {"success": False, "requeued": True}
+    if not result['errors']:
+        return {"success": True, "script_generated": result.get('script_generated', False)}
+    logger.error(f"Failed to generate speaker script for: {podcast}")
+    return {"success": False, "error": result['errors'][0]}
+
+@shared_task(bind=True)
+def generate_summary(self, podcast_id, job_id=None, refresh=False):
+    """
+    Celery task to generate a summary for a podcast.
+    Re-queued with a delay while the LLM provider is at its in-flight limit.
+    With refresh, cached LLM responses are not reused.
+    """
+    logger.info(f"Generating summary for podcast ID: {podcast_id}")
+    
+    podcast = _get_podcast(podcast_id, job_id)
+    if podcast is None:
+        return {"success": False, "error": "Podcast does not exist"}
+    result = _run_stage(self, podcast, 'summary', job_id, refresh=refresh)
+    
+    if result.get('throttled'):
+        return {"success": False, "requeued": True}
+    if not result['errors']:
+        return {"success": True, "summary_generated": result.get('summary_generated', False)}
+    logger.error(f"Failed to generate summary for: {podcast}")
+    return {"success": False, "error": result['errors'][0]}
+    
+@shared_task(bind=True)
+def suggest_and_apply_tags_batch(self, podcast_ids, job_id=None):
+    """
+    Celery task to suggest and apply tags to many podcasts, several episodes per LLM request.
+    Re-queued when the rate limiter holds its requests back.
+    """
+    from audio_processing.llm_scheduler import RateLimitWaitExceeded
+    from audio_processing.tag_batching import suggest_and_apply_tags_batched
+    
+    logger.info(f"Suggesting tags for {len(podcast_ids)} podcasts in batches")
+    
+    try:
+        results = suggest_and_apply_tags_batched(Podcast.objects.filter(pk__in=podcast_ids))
+        failed = [podcast_id for podcast_id, tag_ids in results.items() if tag_ids is None]
+        applied = sum(len(tag_ids) for tag_ids in results.values() if tag_ids)
+        if job_id:
+            background_jobs.record_items(job_id, {
+                podcast_id: (background_jobs.FAILED, "Tag suggestion failed") if podcast_id in failed else (background_jobs.DONE, '')
+                for podcast_id in podcast_ids
+            })
+        return {"success": True, "tagged": len(results) - len(failed), "applied_tags": applied, "failed": failed}
     
+    except RateLimitWaitExceeded as e:
+        logger.warning(f"Batched tags throttled, re-queueing: {str(e)}")
+        admission.requeue(self)
+        return {"success": False, "throttled": True, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Error suggesting batched tags: {str(e)}")
+        if job_id:
+            background_jobs.record_items(job_id, {podcast_id: (background_jobs.FAILED, str(e)) for podcast_id in podcast_ids})
+        return {"success": False, "error": str(e)}
+
 @shared_task
-def process_complete_workflow(podcast_id):
+def process_complete_workflow(podcast_id, enrichment=None, job_id=None):
     """
-    Celery task to process the complete workflow for a podcast:
-    1. Generate transcript
-    2. Suggest and apply tags
+    Celery task to start the complete workflow for a podcast: the transcript,
+    then the enrichment stages as parallel tasks, joined by workflow_results.
+    See audio_processing.workflow. A background job counts the podcast as done
+    once its run has started; the run itself is tracked as a WorkflowRun.
     """
     logger.info(f"Starting complete workflow for podcast ID: {podcast_id}")
     
-    podcast = Podcast.objects.get(pk=podcast_id)
-    return podcast.process_complete_workflow()
\ No newline at end of file
+    podcast = _get_podcast(podcast_id, job_id)
+    if podcast is None:
+        return {"success": False, "error": "Podcast does not exist"}
+    with locking.lease(podcast_id, 'workflow', 60) as acquired:
+        if not acquired:
+            background_jobs.report(job_id, podcast_id, {"skipped": True, "reason": "A workflow is already being started"})
+            return {"success": False, "error": "A workflow is already being started"}
+        try:
+            run = workflow.start(podcast, enrichment=enrichment)
+        except Exception as e:
+            background_jobs.report(job_id, podcast_id, {"errors": [str(e)]})
+            raise
+    if run is None:
+        background_jobs.report(job_id, podcast_id, {"skipped": True, "reason": "Up to date or already running"})
+    else:
+        background_jobs.report(job_id, podcast_id, {"errors": []})
+    return {"success": True, "workflow_run_id": run.id if run else None}
+
+def _run_workflow_stage(task, run_id, stage):
+    """
+    Run one stage of a workflow run, retrying failures per the stage's policy.
+    The result, success or not, is recorded on the run once retries are exhausted.
+    """
+    from celery.exceptions import SoftTimeLimitExceeded
+    from audio_processing.models import WorkflowRun
+    
+    run = WorkflowRun.objects.select_related('podcast').get(pk=run_id)
+    logger.info(f"Running workflow {run_id} stage {stage} for: {run.podcast.raw_audio_url}")
+    
+    try:
+        result = workflow.run_stage(run.podcast, stage)
+    except SoftTimeLimitExceeded:
+        logger.error(f"Workflow {run_id} stage {stage} exceeded its time limit")
+        result = {"errors": [f"{stage} stage timed out"]}
+    except Exception as e:
+        logger.error(f"Error in workflow {run_id} stage {stage}: {str(e)}")
+        result = {"errors": [f"{stage} stage failed: {str(e)}"]}
+    
+    if result.get("throttled"):
+        # Over the provider's in-flight limit: try again later without using up a retry
+        admission.requeue(task, run.podcast_id, stage)
+        return result
+    
+    if result["errors"] and task.request.retries < task.max_retries:
+        countdown = workflow.retry_countdown(stage, task.request.retries)
+        logger.warning(f"Retrying workflow {run_id} stage {stage} in {countdown}s: {result['errors']}")
+        raise task.retry(countdown=countdown)
+    
+    workflow.record_stage_result(run_id, stage, result)
+    return result
+
+@shared_task(bind=True, **workflow.task_options('transcript'))
+def workflow_transcript(self, run_id):
+    """Celery task for the transcript stage of a workflow run."""
+    return _run_workflow_stage(self, run_id, 'transcript')
+
+@shared_task(bind=True, **workflow.task_options('tags'))
+def workflow_tags(self, run_id):
+    """Celery task for the tagging stage of a workflow run."""
+    return _run_workflow_stage(self, run_id, 'tags')
+
+@shared_task(bind=True, **workflow.task_options('script'))
+def workflow_script(self, run_id):
+    """Celery task for the speaker script stage of a workflow run."""
+    return _run_workflow_stage(self, run_id, 'script')
+
+@shared_task(bind=True, **workflow.task_options('summary'))
+def workflow_summary(self, run_id):
+    """Celery task for the summary stage of a workflow run."""
+    return _run_workflow_stage(self, run_id, 'summary')
+
+@shared_task(bind=True, **workflow.task_options('enrichment'))
+def workflow_enrichment(self, run_id):
+    """Celery task for the combined enrichment stage of a workflow run."""
+    return _run_workflow_stage(self, run_id, 'enrichment')
+
+WORKFLOW_STAGE_TASKS = {
+    'transcript': workflow_transcript,
+    'tags': workflow_tags,
+    'script': workflow_script,
+    'summary': workflow_summary,
+    'enrichment': workflow_enrichment,
+}
+
+@shared_task
+def workflow_results(run_id):
+    """
+    Celery task that joins the results of a workflow run once all its stages have finished.
+    """
+    results = workflow.complete(run_id)
+    return {"success": not results["errors"], **results}
+
+@shared_task
+def enrich_podcasts_async(podcast_ids, stages=None):
+    """
+    Celery task to run LLM enrichment for many podcasts concurrently on one event loop.
+    Stages default to combined enrichment plus the speaker script.
+    """
+    from audio_processing.async_enrichment import enrich_podcasts, DEFAULT_STAGES
+    
+    logger.info(f"Starting async enrichment for {len(podcast_ids)} podcasts")
+    results = enrich_podcasts(podcast_ids, stages or DEFAULT_STAGES)
+    
+    failed = sum(1 for result in results if result['errors'])
+    logger.info(f"Async enrichment complete: {len(results) - failed} succeeded, {failed} with errors")
+    
+    # Stages the rate limiter held back are sent again; stages that completed are skipped then
+    throttled = [result['podcast_id'] for result in results if result.get('throttled_stages')]
+    if throttled:
+        delay = admission.requeue_delay()
+        logger.info(f"Re-queueing async enrichment for {len(throttled)} throttled podcasts in {delay:.0f}s")
+        enrich_podcasts_async.apply_async((throttled, stages), countdown=delay)
+    return {"success": True, "processed": len(results), "with_errors": failed, "requeued": len(throttled)}
+
+
+@shared_task
+def submit_llm_batch(podcast_ids, stage):
+    """
+    Celery task to submit an offline LLM batch for a stage (tags, summary, script or enrichment).
+    """
+    from audio_processing.llm_batch import submit_batch, BatchAPIError
+    
+    podcasts = Podcast.objects.filter(pk__in=podcast_ids).order_by('pk')
+    try:
+        job = submit_batch(podcasts.iterator(), stage)
+    except BatchAPIError as e:
+        logger.error(f"Failed to submit {stage} batch: {str(e)}")
+        return {"success": False, "error": str(e)}
+    
+    if job is None:
+        return {"success": True, "batch_job_id": None, "requests": 0}
+    return {"success": True, "batch_job_id": job.id, "requests": job.request_count}
+
+
+@shared_task
+def dispatch_transcriptions(provider='groq'):
+    """
+    Celery task to enqueue the next transcriptions from the backlog, shortest
+    first with aging, up to the provider's concurrency limit.
+    Intended to run periodically (e.g. every minute from celery beat).
+    """
+    from audio_processing.transcription_scheduler import dispatch
+    
+    dispatched = dispatch(provider)
+    return {"success": True, "dispatched": len(dispatched)}
+
+
+@shared_task
+def poll_llm_batches():
+    """
+    Celery task to poll all submitted LLM batches and apply the results of completed ones.
+    Intended to run periodically (e.g. every few minutes from celery beat).
+    """
+    from audio_processing.llm_batch import poll_batch, BatchAPIError
+    from audio_processing.models import LLMBatchJob
+    
+    polled = 0
+    for job in LLMBatchJob.objects.filter(status='submitted'):
+        try:
+            poll_batch(job)
+            polled += 1
+        except BatchAPIError as e:
+            logger.error(f"Failed to poll batch {job.provider_batch_id}: {str(e)}")
+    
+    return {"success": True, "polled": polled}
+
+
+@shared_task
+def update_tag_classifier(podcast_ids=None, sync_tags=False):
+    """
+    Celery task to incrementally update the local tag classifier after tags or labels changed.
+    Applies every pending TagClassifierUpdate as well as the given podcasts.
+    """
+    from audio_processing import tag_classifier
+    
+    classifier = tag_classifier.update(podcast_ids or [], sync_tags=sync_tags)
+    return {"success": True, "tags": len(classifier.tag_ids), "documents": classifier.document_count}
+
+
+@shared_task
+def rebuild_tag_classifier():
+    """
+    Celery task to retrain the local tag classifier from scratch.
+    """
+    from audio_processing import tag_classifier
+    
+    classifier = tag_classifier.rebuild()
+    return {"success": True, "tags": len(classifier.tag_ids), "documents": classifier.document_count}
+
+
+@shared_task
+def retag_changed_tags(tag_ids=None):
+    """
+    Celery task to re-tag only the podcasts plausibly affected by new or edited tags.
+    Resumes an unfinished re-tag job first, unless another worker is running it.
+    Suitable for running periodically from celery beat.
+    """
+    from audio_processing import locking, retagging
+    from audio_processing.models import JobCheckpoint
+    
+    job = JobCheckpoint.objects.filter(kind=retagging.KIND, status__in=['running', 'failed']).order_by('-started_at').first()
+    if job is None:
+        job = retagging.start_job(tag_ids)
+    if job is None:
+        return {"success": True, "job": None}
+    
+    with locking.job_lease(job) as acquired:
+        if not acquired:
+            return {"success": True, "job": job.name, "skipped": "already running"}
+        job = retagging.run_job(job)
+    return {
+        "success": job.status == 'completed',
+        "job": job.name,
+        "processed": job.processed_count,
+        "failed": job.failed_count,
+    }
+
+
+@shared_task
+def run_background_job(job_id):
+    """
+    Celery task that sends the per-podcast tasks of a background job started from the admin.
+    See audio_processing.background_jobs.
+    """
+    from audio_processing.models import BackgroundJob
+    from django.utils import timezone
+    
+    try:
+        sent = background_jobs.run(job_id)
+    except Exception as e:
+        logger.error(f"Background job {job_id} failed: {str(e)}")
+        BackgroundJob.objects.filter(pk=job_id).update(status='failed', finished_at=timezone.now())
+        return {"success": False, "error": str(e)}
+    return {"success": True, "sent": sent}
+
+
+@shared_task
+def sweep_background_jobs():
+    """
+    Celery task that fails the unreported podcasts of background jobs that stopped
+    making progress, so they don't stay running forever.
+    Intended to run periodically (e.g. every ten minutes from celery beat).
+    """
+    swept = background_jobs.sweep_stale()
+    return {"success": True, "swept": swept}
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from audio_processing import admission, locking
+from audio_processing.models import Podcast, PodcastLease
+
+PROVIDER = 'groq-llm'
+
+
+@override_settings(PROVIDER_IN_FLIGHT_LIMITS={PROVIDER: 2})
+class AdmitTests(TestCase):
+    def setUp(self):
+        self.podcasts = [Podcast.objects.create(raw_audio_url=f'http://example.com/{i}.mp3') for i in range(3)]
+
+    def hold(self, podcast):
+        return locking.acquire(podcast.pk, 'summary', provider=PROVIDER)
+
+    def test_only_limit_leases_are_admitted(self):
+        for podcast in self.podcasts:
+            self.hold(podcast)
+        admitted = [admission.admit(PROVIDER, podcast.pk, 'summary') for podcast in self.podcasts]
+        self.assertEqual(admitted, [True, True, False])
+        # Holders that weren't admitted don't take a slot
+        self.assertTrue(admission.admit(PROVIDER, self.podcasts[0].pk, 'summary'))
+
+    def test_released_slot_is_free_again(self):
+        tokens = [self.hold(podcast) for podcast in self.podcasts]
+        admission.admit(PROVIDER, self.podcasts[0].pk, 'summary')
+        admission.admit(PROVIDER, self.podcasts[1].pk, 'summary')
+
+        locking.release(self.podcasts[0].pk, 'summary', tokens[0])
+        self.assertTrue(admission.admit(PROVIDER, self.podcasts[2].pk, 'summary'))
+
+    def test_expired_slot_is_free_again(self):
+        for podcast in self.podcasts:
+            self.hold(podcast)
+        admission.admit(PROVIDER, self.podcasts[0].pk, 'summary')
+        admission.admit(PROVIDER, self.podcasts[1].pk, 'summary')
+
+        PodcastLease.objects.filter(podcast=self.podcasts[0]).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(admission.admit(PROVIDER, self.podcasts[2].pk, 'summary'))
+
+    @override_settings(PROVIDER_IN_FLIGHT_LIMITS={})
+    def test_unlimited_provider_is_admitted(self):
+        self.assertTrue(admission.admit(PROVIDER, self.podcasts[0].pk, 'summary'))
+
+
+class RequeueTests(TestCase):
+    def test_requeued_work_is_not_enqueued_again(self):
+        podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3')
+        running_task = mock.Mock()
+        admission.requeue(running_task, podcast.pk, 'summary')
+        running_task.signature_from_request.return_value.apply_async.assert_called_once()
+
+        task = mock.Mock()
+        self.assertFalse(locking.enqueue(task, podcast, 'summary'))
+        task.apply_async.assert_not_called()
+
+
+class GaugeTests(TestCase):
+    def test_gauge_is_staff_only(self):
+        response = self.client.get('/admission/')
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(ADMISSION_QUEUE_DEPTHS_CACHE_SECONDS=60)
+    def test_queue_depths_are_cached(self):
+        from django.core.cache import cache
+
+        cache.delete(admission.QUEUE_DEPTHS_KEY)
+        with mock.patch.object(admission, '_read_queue_depths', return_value={'default': 3}) as read:
+            self.assertEqual(admission.queue_depths(), {'default': 3})
+            self.assertEqual(admission.queue_depths(), {'default': 3})
+        read.assert_called_once()
@@ -0,0 +1,69 @@
+import asyncio
+from unittest import mock
+
+from django.test import TransactionTestCase, override_settings
+
+from audio_processing import async_enrichment
+from audio_processing.models import Podcast
+from audio_processing.models.summarizable_mixin import SEGMENT_SUMMARY_MAX_TOKENS
+
+
+def transcript(sentences):
+    return " ".join(f"Sentence number {number} covers topic {number}." for number in range(sentences))
+
+
+@override_settings(
+    COMPRESSION_ENABLED=False, LLM_CACHE_BACKEND='none', TAG_CLASSIFIER_ENABLED=False,
+    MODEL_ROUTING_TIERS={'summary': ['small-model', 'large-model'], 'segment_summary': ['small-model']},
+    LLM_CONTEXT_TOKENS={'small-model': 2000, 'large-model': 20000},
+    SUMMARY_CHUNK_TOKENS=1000,
+)
+class AsyncSummaryTests(TransactionTestCase):
+    # The async path runs its database work on other threads, outside a test transaction
+    def summarize(self, text):
+        podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3', transcript=text)
+
+        async def chat(prompt, model, max_tokens, *args, **kwargs):
+            return "A segment summary." if max_tokens == SEGMENT_SUMMARY_MAX_TOKENS else "The final summary."
+
+        groq = mock.Mock()
+        groq.chat = mock.AsyncMock(side_effect=chat)
+        summary = asyncio.run(async_enrichment.generate_summary(podcast, groq))
+        return summary, groq.chat.call_args_list
+
+    def test_long_transcript_is_reduced_from_segment_summaries(self):
+        summary, calls = self.summarize(transcript(3000))
+
+        self.assertEqual(summary, "The final summary.")
+        *segment_calls, final_call = calls
+        self.assertGreater(len(segment_calls), 1)
+        self.assertIn("Segment 1:\nA segment summary.", final_call.args[0])
+
+    def test_budget_follows_the_routed_model(self):
+        summary, calls = self.summarize(transcript(800))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0].args[1], 'large-model')
+
+
+@override_settings(
+    COMPRESSION_ENABLED=False, LLM_CACHE_BACKEND='none', TAG_CLASSIFIER_ENABLED=False,
+    MODEL_ROUTING_TIERS={'script': ['script-model'], 'roster': ['roster-model']},
+    LLM_CONTEXT_TOKENS={'script-model': 100000, 'roster-model': 8192},
+    SCRIPT_WINDOW_TOKENS=300, SCRIPT_WINDOW_OVERLAP_TOKENS=50,
+)
+class AsyncWindowedScriptTests(TransactionTestCase):
+    def test_windows_share_one_roster_and_are_merged(self):
+        from audio_processing.models.test_groq_mixin import fake_chat
+
+        podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3', transcript=transcript(150))
+        groq = mock.Mock()
+        groq.chat = mock.AsyncMock(side_effect=fake_chat)
+        script = asyncio.run(async_enrichment.generate_speaker_script(podcast, groq))
+
+        script_prompts = [call.args[0] for call in groq.chat.call_args_list if "This is part" in call.args[0]]
+        self.assertGreater(len(script_prompts), 1)
+        self.assertTrue(all('["Alice", "Bob"]' in prompt for prompt in script_prompts))
+        self.assertEqual(script.count("Closing1 words1."), 1)
+        podcast.refresh_from_db()
+        self.assertEqual(podcast.script_transcript, script)
@@ -0,0 +1,36 @@
+from django.test import TestCase
+
+from audio_processing import background_jobs
+from audio_processing.background_jobs import DONE, FAILED, SKIPPED
+from audio_processing.models import BackgroundJob, BackgroundJobItem
+
+
+class RecordItemsTests(TestCase):
+    def setUp(self):
+        self.job = BackgroundJob.objects.create(
+            action='add_summary', status='running', podcast_ids=[1, 2, 3], total_count=3
+        )
+
+    def test_redelivered_outcome_counts_once(self):
+        background_jobs.record_items(self.job.pk, {1: (DONE, '')})
+        background_jobs.record_items(self.job.pk, {1: (DONE, '')})
+        background_jobs.report(self.job.pk, 1, {'errors': ["Late duplicate failure"]})
+
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.done_count, self.job.failed_count), (1, 0))
+        self.assertEqual(BackgroundJobItem.objects.get(job=self.job, podcast_id=1).status, DONE)
+
+    def test_job_completes_when_every_podcast_has_an_outcome(self):
+        background_jobs.record_items(self.job.pk, {1: (DONE, ''), 2: (SKIPPED, 'No transcript available')})
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'running')
+
+        background_jobs.report(self.job.pk, 3, {'errors': ["Request failed"]})
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'completed')
+        self.assertEqual((self.job.done_count, self.job.failed_count, self.job.skipped_count), (1, 1, 1))
+        self.assertEqual(background_jobs.progress(self.job)['errors'], {'2': 'No transcript available', '3': "Request failed"})
+
+    def test_report_without_job_does_nothing(self):
+        background_jobs.report(None, 1, {})
+        self.assertFalse(BackgroundJobItem.objects.exists())
@@ -0,0 +1,54 @@
+from django.test import SimpleTestCase, override_settings
+
+from audio_processing.chunking import estimate_tokens
+from audio_processing.compression import compress_for_summary, compress_transcript, remove_fillers
+
+
+def transcript(sentences):
+    return " ".join(f"Speaker {number} talks about subject {number} at length." for number in range(sentences))
+
+
+class RemoveFillersTests(SimpleTestCase):
+    def test_fillers_and_stutters_are_removed(self):
+        self.assertEqual(remove_fillers("Um, I I think the the rates, you know, went up."), "I think the rates, went up.")
+
+    def test_grammatical_repeats_are_kept(self):
+        self.assertEqual(remove_fillers("We had had enough. I knew that that was wrong."), "We had had enough. I knew that that was wrong.")
+
+
+class CompressTranscriptTests(SimpleTestCase):
+    def test_result_fits_the_budget(self):
+        compressed = compress_transcript(transcript(200), 300)
+        self.assertLessEqual(estimate_tokens(compressed), 300)
+        self.assertGreater(estimate_tokens(compressed), 250)
+
+    def test_kept_sentences_stay_in_order(self):
+        compressed = compress_transcript(transcript(200), 300)
+        numbers = [int(sentence.split()[1]) for sentence in compressed.split('.') if sentence.strip()]
+        self.assertEqual(numbers, sorted(numbers))
+
+    def test_text_under_budget_is_unchanged(self):
+        self.assertEqual(compress_transcript(transcript(5), 1000), transcript(5))
+
+    def test_single_sentence_is_truncated_to_the_budget(self):
+        compressed = compress_transcript("word " * 1000, 50)
+        self.assertLessEqual(estimate_tokens(compressed), 50)
+        self.assertTrue(compressed.startswith("word word"))
+
+    def test_oversized_sentences_are_truncated(self):
+        compressed = compress_transcript(("x" * 400 + ". ") * 3, 20)
+        self.assertTrue(compressed)
+        self.assertLessEqual(estimate_tokens(compressed), 20)
+
+    def test_near_duplicates_are_removed(self):
+        self.assertEqual(compress_transcript("Rates went up today. Rates went up today! Prices fell."), "Rates went up today. Prices fell.")
+
+
+@override_settings(COMPRESSION_ENABLED=True, COMPRESSION_SUMMARY_RATIO=0.5, COMPRESSION_MIN_TOKENS=100)
+class CompressForSummaryTests(SimpleTestCase):
+    def test_long_transcript_keeps_the_ratio(self):
+        text = transcript(300)
+        self.assertLessEqual(estimate_tokens(compress_for_summary(text)), estimate_tokens(text) * 0.5)
+
+    def test_short_transcript_is_only_cleaned(self):
+        self.assertEqual(compress_for_summary("Um, rates went up."), "rates went up.")
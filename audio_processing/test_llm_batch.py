@@ -0,0 +1,131 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from audio_processing import llm_batch, llm_cache, stage_state
+from audio_processing.management.commands.batch_standin_server import StandinBatchAPI, make_handler
+from audio_processing.models import LLMBatchJob, Podcast, Tag
+
+
+class StandinServerTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        class QuietHandler(make_handler(StandinBatchAPI())):
+            def log_message(self, format, *args):
+                pass
+
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), QuietHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.api_settings = override_settings(
+            GROQ_API_KEY='test-key',
+            GROQ_BATCH_API_BASE=f"http://127.0.0.1:{cls.server.server_port}/openai/v1",
+            LLM_CACHE_BACKEND='none',
+            TAG_CLASSIFIER_ENABLED=False,
+        )
+        cls.api_settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.api_settings.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+
+class BatchRoundTripTests(StandinServerTestCase):
+    def setUp(self):
+        Tag.objects.create(name="Technology", description="Technology news")
+        self.podcasts = [
+            Podcast.objects.create(raw_audio_url=f'http://example.com/{i}.mp3', transcript="Hello world. " * 50)
+            for i in range(3)
+        ]
+
+    def test_submit_poll_and_apply(self):
+        job = llm_batch.submit_batch(self.podcasts, 'summary')
+        self.assertEqual((job.status, job.request_count), ('submitted', 3))
+        self.assertEqual(len(job.input_fingerprints), 3)
+
+        job = llm_batch.poll_batch(job)
+        self.assertEqual((job.status, job.applied_count, job.failed_count), ('applied', 3, 0))
+        for podcast in self.podcasts:
+            podcast.refresh_from_db()
+            self.assertEqual(podcast.summary, "Stand-in summary of the episode.")
+            self.assertTrue(stage_state.is_current(podcast, 'summary'))
+
+    def test_failed_download_is_polled_again(self):
+        job = llm_batch.submit_batch(self.podcasts, 'summary')
+        with mock.patch.object(llm_batch, 'apply_results', side_effect=llm_batch.BatchAPIError("Download failed")):
+            with self.assertRaises(llm_batch.BatchAPIError):
+                llm_batch.poll_batch(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'submitted')
+
+        job = llm_batch.poll_batch(job)
+        self.assertEqual((job.status, job.applied_count), ('applied', 3))
+
+    def test_results_are_cached(self):
+        job = llm_batch.submit_batch(self.podcasts, 'summary')
+        with override_settings(LLM_CACHE_BACKEND='database'):
+            llm_batch.poll_batch(job)
+            model, messages, params = llm_batch.render_request(self.podcasts[0], 'summary', [])
+            key = llm_cache.make_cache_key(model, params, messages)
+            self.assertEqual(llm_cache.get_cached_response(key), "Stand-in summary of the episode.")
+
+    def test_podcasts_without_transcript_are_not_submitted(self):
+        empty = Podcast.objects.create(raw_audio_url='http://example.com/empty.mp3')
+        job = llm_batch.submit_batch(self.podcasts + [empty], 'script')
+        self.assertEqual(job.request_count, 3)
+        self.assertIsNone(llm_batch.submit_batch([empty], 'script'))
+
+    def test_results_for_changed_inputs_are_discarded(self):
+        job = llm_batch.submit_batch(self.podcasts, 'summary')
+        changed = self.podcasts[0]
+        changed.transcript = "A corrected transcript."
+        changed.save()
+
+        job = llm_batch.poll_batch(job)
+        self.assertEqual((job.applied_count, job.failed_count), (2, 1))
+        changed.refresh_from_db()
+        self.assertFalse(changed.summary)
+        self.assertFalse(stage_state.is_current(changed, 'summary'))
+
+
+@override_settings(LLM_CACHE_BACKEND='none', TAG_CLASSIFIER_ENABLED=False)
+class ApplyTagResultsTests(TestCase):
+    def setUp(self):
+        self.tag = Tag.objects.create(name="Technology")
+        self.podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3', transcript="Hello world.")
+        self.job = LLMBatchJob.objects.create(stage='tags', status='completed', request_count=1)
+
+    def output_line(self, content):
+        return json.dumps({
+            "custom_id": f"podcast-{self.podcast.pk}",
+            "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+        })
+
+    def test_valid_tags_are_applied(self):
+        job = llm_batch.apply_results(self.job, [self.output_line(json.dumps([self.tag.pk]))])
+        self.assertEqual((job.applied_count, job.failed_count), (1, 0))
+        self.assertEqual(list(self.podcast.tags.all()), [self.tag])
+        self.assertTrue(stage_state.is_current(self.podcast, 'tags'))
+
+    def test_empty_suggestion_is_applied(self):
+        job = llm_batch.apply_results(self.job, [self.output_line("[]")])
+        self.assertEqual((job.applied_count, job.failed_count), (1, 0))
+
+    def test_only_invalid_tags_is_a_failure(self):
+        job = llm_batch.apply_results(self.job, [self.output_line("[999999]")])
+        self.assertEqual((job.applied_count, job.failed_count), (0, 1))
+        self.assertIsNone(stage_state.get_state(self.podcast, 'tags'))
+
+    def test_request_errors_are_recorded(self):
+        line = json.dumps({
+            "custom_id": f"podcast-{self.podcast.pk}",
+            "response": {"status_code": 400, "body": {"error": "Bad request"}},
+        })
+        job = llm_batch.apply_results(self.job, [line, "not json"])
+        self.assertEqual((job.applied_count, job.failed_count), (0, 2))
@@ -0,0 +1,19 @@
+from django.test import TestCase, override_settings
+
+from audio_processing import llm_cache
+
+
+@override_settings(LLM_CACHE_BACKEND='database', LLM_CACHE_MAX_ENTRIES=0)
+class CacheStatsTests(TestCase):
+    def test_counters_are_shared(self):
+        key = llm_cache.make_cache_key('llama3-8b-8192', {'max_tokens': 100}, [{'role': 'user', 'content': "Hi"}])
+        self.assertIsNone(llm_cache.get_cached_response(key))
+        llm_cache.store_response(key, 'llama3-8b-8192', "Hello")
+        self.assertEqual(llm_cache.get_cached_response(key), "Hello")
+
+        stats = llm_cache.get_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['stores']), (1, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_no_lookups(self):
+        self.assertEqual(llm_cache.get_cache_stats()['hit_rate'], 0.0)
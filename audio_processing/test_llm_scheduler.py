@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from audio_processing import llm_scheduler
+from audio_processing.models import RateLimitBucket
+
+API_KEY = 'test-key'
+MODEL = 'llama3-8b-8192'
+
+
+@override_settings(GROQ_RATE_LIMITS={'default': {'rpm': 2, 'tpm': 1000}})
+class TokenBucketTests(TestCase):
+    def test_requests_are_limited_per_minute(self):
+        self.assertEqual(llm_scheduler._try_acquire(API_KEY, MODEL, 10), 0)
+        self.assertEqual(llm_scheduler._try_acquire(API_KEY, MODEL, 10), 0)
+        # Refills at 2/60 requests per second, so the next one is about 30s away
+        wait = llm_scheduler._try_acquire(API_KEY, MODEL, 10)
+        self.assertGreater(wait, 25)
+        self.assertLessEqual(wait, 30)
+
+    def test_tokens_are_limited_per_minute(self):
+        self.assertEqual(llm_scheduler._try_acquire(API_KEY, MODEL, 800), 0)
+        self.assertGreater(llm_scheduler._try_acquire(API_KEY, MODEL, 800), 0)
+
+    def test_failed_acquire_takes_nothing(self):
+        llm_scheduler._try_acquire(API_KEY, MODEL, 800)
+        llm_scheduler._try_acquire(API_KEY, MODEL, 800)
+        requests_bucket = RateLimitBucket.objects.get(kind=RateLimitBucket.REQUESTS)
+        self.assertAlmostEqual(requests_bucket.available, 1, places=1)
+
+    def test_request_larger_than_bucket_runs_on_full_bucket(self):
+        self.assertEqual(llm_scheduler._try_acquire(API_KEY, MODEL, 5000), 0)
+        tokens_bucket = RateLimitBucket.objects.get(kind=RateLimitBucket.TOKENS)
+        self.assertLess(tokens_bucket.available, 1)
+
+    def test_block_until_pauses_the_model(self):
+        llm_scheduler._try_acquire(API_KEY, MODEL, 10)
+        llm_scheduler.block_until(API_KEY, MODEL, 60)
+        self.assertGreater(llm_scheduler._try_acquire(API_KEY, MODEL, 10), 55)
+        self.assertEqual(llm_scheduler.remaining_quota(API_KEY, MODEL), 0.0)
+
+    def test_sync_from_headers_only_lowers(self):
+        llm_scheduler._try_acquire(API_KEY, MODEL, 10)
+        llm_scheduler.sync_from_headers(API_KEY, MODEL, {
+            'x-ratelimit-remaining-requests': '0',
+            'x-ratelimit-remaining-tokens': '5000',
+        })
+        self.assertEqual(RateLimitBucket.objects.get(kind=RateLimitBucket.REQUESTS).available, 0)
+        self.assertLessEqual(RateLimitBucket.objects.get(kind=RateLimitBucket.TOKENS).available, 1000)
+
+    @override_settings(LLM_SCHEDULER_MAX_WAIT_SECONDS=1)
+    def test_acquire_gives_up_after_max_wait(self):
+        llm_scheduler.acquire(API_KEY, MODEL, 10)
+        llm_scheduler.acquire(API_KEY, MODEL, 10)
+        with self.assertRaises(llm_scheduler.RateLimitWaitExceeded):
+            llm_scheduler.acquire(API_KEY, MODEL, 10)
+
+    def test_buckets_follow_reconfigured_limits(self):
+        llm_scheduler._try_acquire(API_KEY, MODEL, 10)
+        with self.settings(GROQ_RATE_LIMITS={'default': {'rpm': 1, 'tpm': 1000}}):
+            self.assertEqual(llm_scheduler._try_acquire(API_KEY, MODEL, 10), 0)
+            # Refills at 1/60 requests per second now
+            self.assertGreater(llm_scheduler._try_acquire(API_KEY, MODEL, 10), 55)
+        self.assertEqual(RateLimitBucket.objects.get(kind=RateLimitBucket.REQUESTS).capacity, 1)
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {'choices': [{'message': {'content': self.content}}]}
+
+    def close(self):
+        pass
+
+
+@override_settings(GROQ_API_KEY=API_KEY, LLM_CACHE_BACKEND='none', LLM_SCHEDULER_MAX_WAIT_SECONDS=1,
+                   GROQ_RATE_LIMITS={'default': {'rpm': 1, 'tpm': 100000}})
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        from audio_processing.models import Podcast
+        self.podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3', transcript="Hello there.")
+
+    def test_throttled_chat_request_raises(self):
+        with mock.patch.object(llm_scheduler.requests, 'post', return_value=FakeResponse("First")):
+            self.assertEqual(self.podcast._call_groq_chat("Prompt one", MODEL, 100), "First")
+            with self.assertRaises(llm_scheduler.RateLimitWaitExceeded):
+                self.podcast._call_groq_chat("Prompt two", MODEL, 100)
+
+    def test_throttled_stage_is_requeued_not_failed(self):
+        from audio_processing import workflow
+
+        llm_scheduler._try_acquire(API_KEY, 'llama3-8b-8192', 1)
+        llm_scheduler._try_acquire(API_KEY, 'llama3-70b-8192', 1)
+        with mock.patch.object(llm_scheduler.requests, 'post') as post:
+            result = workflow.run_stage(self.podcast, 'summary')
+        post.assert_not_called()
+        self.assertTrue(result['throttled'])
+
+
+class ReservationTests(TestCase):
+    def test_reserves_expected_output_not_max_tokens(self):
+        from audio_processing.models.groq_mixin import estimate_request_tokens
+        from audio_processing.prompt_budget import count_tokens
+
+        messages = [{'role': 'user', 'content': "Write a speaker script."}]
+        prompt_tokens = count_tokens(messages[0]['content'], MODEL)
+        with self.settings(LLM_OUTPUT_RESERVE_TOKENS=500):
+            self.assertEqual(estimate_request_tokens(messages, 8000, MODEL), prompt_tokens + 500)
+            self.assertEqual(estimate_request_tokens(messages, 100, MODEL), prompt_tokens + 100)
@@ -0,0 +1,101 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from audio_processing import locking
+from audio_processing.models import JobCheckpoint, Podcast, PodcastLease
+
+
+class LeaseTests(TestCase):
+    def setUp(self):
+        self.podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3')
+
+    def test_lease_is_exclusive(self):
+        token = locking.acquire(self.podcast.pk, 'summary')
+        self.assertIsNotNone(token)
+        self.assertIsNone(locking.acquire(self.podcast.pk, 'summary'))
+        # Other stages are leased separately
+        self.assertIsNotNone(locking.acquire(self.podcast.pk, 'tags'))
+
+        locking.release(self.podcast.pk, 'summary', token)
+        self.assertIsNotNone(locking.acquire(self.podcast.pk, 'summary'))
+
+    def test_release_needs_the_owner_token(self):
+        locking.acquire(self.podcast.pk, 'summary')
+        locking.release(self.podcast.pk, 'summary', 'not-the-owner')
+        self.assertIsNone(locking.acquire(self.podcast.pk, 'summary'))
+
+    def test_expired_lease_can_be_taken_over(self):
+        locking.acquire(self.podcast.pk, 'summary')
+        PodcastLease.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNotNone(locking.acquire(self.podcast.pk, 'summary'))
+
+    def test_lease_context_manager(self):
+        with locking.lease(self.podcast.pk, 'summary') as acquired:
+            self.assertTrue(acquired)
+            with locking.lease(self.podcast.pk, 'summary') as acquired_again:
+                self.assertFalse(acquired_again)
+        with locking.lease(self.podcast.pk, 'summary') as acquired:
+            self.assertTrue(acquired)
+
+
+class EnqueueTests(TestCase):
+    def setUp(self):
+        self.podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3')
+        self.task = mock.Mock()
+
+    def test_duplicate_enqueue_is_dropped(self):
+        self.assertTrue(locking.enqueue(self.task, self.podcast, 'summary'))
+        self.assertFalse(locking.enqueue(self.task, self.podcast, 'summary'))
+        self.assertEqual(self.task.apply_async.call_count, 1)
+        self.assertEqual(self.task.apply_async.call_args.args[0], (self.podcast.pk,))
+
+    def test_pickup_allows_the_next_enqueue(self):
+        locking.enqueue(self.task, self.podcast, 'summary')
+        token = locking.acquire(self.podcast.pk, 'summary')
+        locking.release(self.podcast.pk, 'summary', token)
+        self.assertTrue(locking.enqueue(self.task, self.podcast, 'summary'))
+
+    def test_running_work_is_not_enqueued(self):
+        locking.acquire(self.podcast.pk, 'summary')
+        self.assertFalse(locking.enqueue(self.task, self.podcast, 'summary'))
+        self.task.apply_async.assert_not_called()
+
+    @override_settings(ENQUEUE_DEDUP_SECONDS=60)
+    def test_stale_enqueue_is_sent_again(self):
+        locking.enqueue(self.task, self.podcast, 'summary')
+        PodcastLease.objects.update(enqueued_at=timezone.now() - timedelta(seconds=120))
+        self.assertTrue(locking.enqueue(self.task, self.podcast, 'summary'))
+
+    def test_failed_send_is_not_remembered(self):
+        self.task.apply_async.side_effect = ConnectionError("broker unavailable")
+        with self.assertRaises(ConnectionError):
+            locking.enqueue(self.task, self.podcast, 'summary')
+        self.task.apply_async.side_effect = None
+        self.assertTrue(locking.enqueue(self.task, self.podcast, 'summary'))
+
+
+class JobLeaseTests(TestCase):
+    def setUp(self):
+        self.job = JobCheckpoint.objects.create(name='retag-test', kind='retag')
+
+    def test_job_lease_is_exclusive(self):
+        other = JobCheckpoint.objects.get(pk=self.job.pk)
+        with locking.job_lease(self.job) as acquired:
+            self.assertTrue(acquired)
+            with locking.job_lease(other) as acquired_again:
+                self.assertFalse(acquired_again)
+        with locking.job_lease(other) as acquired:
+            self.assertTrue(acquired)
+
+    def test_expired_job_lease_is_lost(self):
+        other = JobCheckpoint.objects.get(pk=self.job.pk)
+        self.assertTrue(locking.claim_job(self.job))
+        JobCheckpoint.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(locking.claim_job(other))
+
+        self.job.lease_expires_at = timezone.now()
+        self.assertFalse(locking.renew_job(self.job))
+        self.assertTrue(locking.renew_job(other))
@@ -0,0 +1,65 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from audio_processing import model_routing
+from audio_processing.model_routing import BACKLOG, HIGH, NORMAL, choose_model
+
+
+@mock.patch.object(model_routing, '_quota', return_value=1.0)
+class ChooseModelTests(SimpleTestCase):
+    def test_high_priority_gets_last_tier(self, quota):
+        self.assertEqual(choose_model('summary', HIGH, 100, 1000), ('llama3-70b-8192', 'high priority'))
+
+    def test_backlog_gets_cheapest_tier(self, quota):
+        self.assertEqual(choose_model('summary', BACKLOG, 5000, 1000), ('llama3-8b-8192', 'backlog'))
+
+    def test_normal_short_input_gets_cheapest_tier(self, quota):
+        self.assertEqual(choose_model('summary', NORMAL, 500, 1000), ('llama3-8b-8192', 'short input'))
+
+    def test_normal_long_input_gets_last_tier(self, quota):
+        self.assertEqual(choose_model('summary', NORMAL, 5000, 1000), ('llama3-70b-8192', 'long input'))
+
+    def test_only_fitting_tiers_are_used(self, quota):
+        self.assertEqual(
+            choose_model('script', BACKLOG, 20000, 1000),
+            ('deepseek-r1-distill-llama-70b', 'backlog'),
+        )
+
+    def test_falls_back_to_last_tier_when_nothing_fits(self, quota):
+        self.assertEqual(choose_model('summary', BACKLOG, 50000, 1000), ('llama3-70b-8192', 'no smaller tier fits'))
+
+    def test_low_quota_moves_to_another_fitting_tier(self, quota):
+        quota.side_effect = lambda model: 0.05 if model == 'llama3-8b-8192' else 0.9
+        self.assertEqual(
+            choose_model('summary', BACKLOG, 500, 1000),
+            ('llama3-70b-8192', 'backlog, llama3-8b-8192 quota low'),
+        )
+
+    def test_high_priority_is_never_downgraded(self, quota):
+        quota.return_value = 0.0
+        self.assertEqual(choose_model('summary', HIGH, 500, 1000)[0], 'llama3-70b-8192')
+
+    @override_settings(MODEL_ROUTING_TIERS={'summary': ['small-model', 'large-model']})
+    def test_tiers_can_be_overridden(self, quota):
+        self.assertEqual(choose_model('summary', BACKLOG, 100, 100)[0], 'small-model')
+
+
+class GetPriorityTests(SimpleTestCase):
+    def podcast(self, **kwargs):
+        return mock.Mock(spec=['priority', 'release_date'], **{'priority': '', 'release_date': None, **kwargs})
+
+    def test_explicit_priority_wins(self):
+        self.assertEqual(model_routing.get_priority(self.podcast(priority=BACKLOG, release_date=timezone.now())), BACKLOG)
+
+    def test_recent_release_is_high(self):
+        self.assertEqual(model_routing.get_priority(self.podcast(release_date=timezone.now())), HIGH)
+
+    def test_old_release_is_backlog(self):
+        old = timezone.now() - timedelta(days=365)
+        self.assertEqual(model_routing.get_priority(self.podcast(release_date=old)), BACKLOG)
+
+    def test_unknown_release_is_normal(self):
+        self.assertEqual(model_routing.get_priority(self.podcast()), NORMAL)
@@ -0,0 +1,46 @@
+import os
+
+from django.test import SimpleTestCase, override_settings
+
+from audio_processing.prompt_budget import DEFAULT_CONTEXT_TOKENS, available_tokens, context_tokens, count_tokens, fits
+from audio_processing.prompts import get_tag_suggestion_prompt
+
+
+class FitsTests(SimpleTestCase):
+    def test_short_prompt_fits(self):
+        self.assertTrue(fits("Summarize this episode.", 'llama3-8b-8192', 1000))
+
+    def test_prompt_over_context_window_does_not_fit(self):
+        self.assertFalse(fits("word " * 9000, 'llama3-8b-8192', 1000))
+
+    def test_response_tokens_count_against_the_window(self):
+        prompt = "word " * 3000
+        self.assertTrue(fits(prompt, 'llama3-8b-8192', 1000))
+        self.assertFalse(fits(prompt, 'llama3-8b-8192', 8000))
+
+    def test_larger_model_fits_more(self):
+        prompt = "word " * 9000
+        self.assertTrue(fits(prompt, 'deepseek-r1-distill-llama-70b', 1000))
+
+    @override_settings(LLM_CONTEXT_TOKENS={'llama3-8b-8192': 100000})
+    def test_context_window_override(self):
+        self.assertTrue(fits("word " * 9000, 'llama3-8b-8192', 1000))
+
+    def test_available_tokens_subtracts_fixed_text(self):
+        fixed = "Some fixed instructions."
+        self.assertEqual(
+            available_tokens('llama3-8b-8192', 1000) - available_tokens('llama3-8b-8192', 1000, fixed),
+            count_tokens(fixed, 'llama3-8b-8192'),
+        )
+
+    def test_unknown_model_gets_default_window(self):
+        self.assertEqual(context_tokens('some-new-model'), DEFAULT_CONTEXT_TOKENS)
+
+
+class PromptPrefixTests(SimpleTestCase):
+    def test_tag_prompts_share_the_instructions(self):
+        first = get_tag_suggestion_prompt([{'id': 1, 'name': "Economics"}], "Interest rates went up.")
+        second = get_tag_suggestion_prompt([{'id': 2, 'name': "Housing"}], "House prices went down.")
+        shared = first[:len(os.path.commonprefix([first, second]))]
+        self.assertIn("Respond only with a JSON array of tag IDs", shared)
+        self.assertTrue(shared.endswith('"id": '))
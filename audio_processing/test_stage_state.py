@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from audio_processing import stage_state
+from audio_processing.models import Podcast, PodcastStage, Tag
+
+
+class FingerprintTests(TestCase):
+    def setUp(self):
+        self.podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3', transcript="Hello there.")
+
+    def test_same_inputs_same_fingerprint(self):
+        self.assertEqual(stage_state.fingerprint(self.podcast, 'tags'), stage_state.fingerprint(self.podcast, 'tags'))
+
+    def test_stages_have_different_fingerprints(self):
+        self.assertNotEqual(stage_state.fingerprint(self.podcast, 'tags'), stage_state.fingerprint(self.podcast, 'summary'))
+
+    def test_transcript_change_changes_later_stages(self):
+        before = {stage: stage_state.fingerprint(self.podcast, stage) for stage in stage_state.STAGE_VERSIONS}
+        self.podcast.transcript = "Something else entirely."
+        after = {stage: stage_state.fingerprint(self.podcast, stage) for stage in stage_state.STAGE_VERSIONS}
+
+        self.assertEqual(before['transcript'], after['transcript'])
+        for stage in ('tags', 'script', 'summary', 'enrichment'):
+            self.assertNotEqual(before[stage], after[stage])
+
+    def test_audio_url_change_changes_transcript_stage(self):
+        before = stage_state.fingerprint(self.podcast, 'transcript')
+        self.podcast.raw_audio_url = 'http://example.com/other.mp3'
+        self.assertNotEqual(before, stage_state.fingerprint(self.podcast, 'transcript'))
+
+    def test_version_bump_changes_fingerprint(self):
+        before = stage_state.fingerprint(self.podcast, 'summary')
+        with mock.patch.dict(stage_state.STAGE_VERSIONS, {'summary': 2}):
+            self.assertNotEqual(before, stage_state.fingerprint(self.podcast, 'summary'))
+
+    def test_tag_catalog_is_not_an_input(self):
+        before = stage_state.fingerprint(self.podcast, 'tags')
+        Tag.objects.create(name="Brand new tag")
+        self.assertEqual(before, stage_state.fingerprint(self.podcast, 'tags'))
+
+
+class StageStateTests(TestCase):
+    def setUp(self):
+        self.podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3', transcript="Hello there.")
+
+    def test_completed_stage_is_current_until_inputs_change(self):
+        stage_state.begin(self.podcast, 'summary', stage_state.fingerprint(self.podcast, 'summary'))
+        self.assertFalse(stage_state.is_current(self.podcast, 'summary'))
+        stage_state.finish(self.podcast, 'summary')
+        self.assertTrue(stage_state.is_current(self.podcast, 'summary'))
+
+        self.podcast.transcript = "A corrected transcript."
+        self.assertFalse(stage_state.is_current(self.podcast, 'summary'))
+
+    def test_failed_stage_is_not_current(self):
+        stage_state.begin(self.podcast, 'summary', stage_state.fingerprint(self.podcast, 'summary'))
+        stage_state.finish(self.podcast, 'summary', ["Request failed"])
+        state = stage_state.get_state(self.podcast, 'summary')
+        self.assertEqual((state.status, state.error, state.attempts), ('failed', "Request failed", 1))
+        self.assertFalse(stage_state.is_current(self.podcast, 'summary'))
+
+    def test_existing_output_is_adopted(self):
+        self.podcast.summary = "An older summary."
+        self.assertTrue(stage_state.is_current(self.podcast, 'summary'))
+        self.assertEqual(PodcastStage.objects.get(podcast=self.podcast, stage='summary').status, 'completed')
+
+    def test_pending_stages_include_everything_after_a_missing_transcript(self):
+        podcast = Podcast.objects.create(raw_audio_url='http://example.com/new.mp3')
+        stages = ['transcript', 'tags', 'summary']
+        self.assertEqual(stage_state.pending_stages(podcast, stages), stages)
+
+    def test_backlog_matches_stage_and_status_on_the_same_row(self):
+        stage_state.begin(self.podcast, 'transcript', stage_state.fingerprint(self.podcast, 'transcript'))
+        stage_state.finish(self.podcast, 'transcript')
+        stage_state.begin(self.podcast, 'summary', stage_state.fingerprint(self.podcast, 'summary'))
+        stage_state.finish(self.podcast, 'summary', ["Request failed"])
+
+        self.assertIn(self.podcast, stage_state.backlog('summary'))
+        self.assertNotIn(self.podcast, stage_state.backlog('transcript'))
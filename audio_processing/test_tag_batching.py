@@ -0,0 +1,63 @@
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from audio_processing import tag_catalog, tag_classifier
+from audio_processing.models import Podcast, Tag
+from audio_processing.tag_batching import parse_tag_map, suggest_and_apply_tags_batched
+
+
+class ParseTagMapTests(SimpleTestCase):
+    def test_tags_outside_the_candidates_are_dropped(self):
+        response = json.dumps({"1": [10, 11], "2": [11, 99]})
+        self.assertEqual(parse_tag_map(response, {1, 2}, {10, 11, 12}, {1: [10]}), {1: [10], 2: [11]})
+
+    def test_non_object_response_is_rejected(self):
+        self.assertIsNone(parse_tag_map("[1, 2]", {1}, {1, 2}))
+
+
+@override_settings(LLM_CACHE_BACKEND='none', GROQ_API_KEY='test-key', TAG_CLASSIFIER_ENABLED=False)
+class BatchedPrefilterTests(TestCase):
+    def setUp(self):
+        self.confident = Tag.objects.create(name="Economics")
+        self.uncertain = Tag.objects.create(name="Housing")
+        self.other = Tag.objects.create(name="Gardening")
+        # The tag signals only invalidate the catalog on commit, which a test transaction never reaches
+        tag_catalog.invalidate()
+        self.partial = Podcast.objects.create(raw_audio_url='http://example.com/1.mp3', transcript="Interest rates and housing.")
+        self.open = Podcast.objects.create(raw_audio_url='http://example.com/2.mp3', transcript="Growing tomatoes.")
+
+        def classify(transcript):
+            if transcript == self.partial.transcript:
+                return [self.confident.id], [self.uncertain.id]
+            return None
+
+        for name, replacement in (('classify', classify), ('schedule_update', lambda **kwargs: None)):
+            patcher = mock.patch.object(tag_classifier, name, side_effect=replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_partially_classified_episode_is_asked_only_about_uncertain_tags(self):
+        response = json.dumps({
+            str(self.partial.id): [self.uncertain.id, self.other.id],
+            str(self.open.id): [self.other.id],
+        })
+        with mock.patch.object(Podcast, '_call_groq_chat', return_value=response) as chat:
+            results = suggest_and_apply_tags_batched(Podcast.objects.order_by('pk'))
+
+        prompt = chat.call_args.args[0]
+        self.assertIn(f"Episode {self.partial.id} (candidate tag IDs: [{self.uncertain.id}]):", prompt)
+        self.assertIn(f"Episode {self.open.id}:", prompt)
+        self.assertEqual(results[self.partial.id], [self.confident.id, self.uncertain.id])
+        self.assertEqual(results[self.open.id], [self.other.id])
+        self.assertEqual(
+            set(self.partial.tags.values_list('id', flat=True)), {self.confident.id, self.uncertain.id}
+        )
+
+    def test_fully_classified_episode_is_not_sent(self):
+        tag_classifier.classify.side_effect = lambda transcript: ([self.confident.id], [])
+        with mock.patch.object(Podcast, '_call_groq_chat') as chat:
+            results = suggest_and_apply_tags_batched([self.partial])
+        chat.assert_not_called()
+        self.assertEqual(results[self.partial.id], [self.confident.id])
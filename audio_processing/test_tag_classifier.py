@@ -0,0 +1,91 @@
+import json
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from audio_processing import tag_catalog, tag_classifier
+from audio_processing.models import Podcast, Tag
+from audio_processing.tag_classifier import TagClassifier
+
+
+@override_settings(TAG_CLASSIFIER_APPLY_THRESHOLD=0.3, TAG_CLASSIFIER_REJECT_THRESHOLD=0.1, TAG_CLASSIFIER_MIN_EXAMPLES=5)
+class ClassifyThresholdTests(SimpleTestCase):
+    def classify(self, scores, example_counts):
+        classifier = TagClassifier(dims=16)
+        classifier.tag_ids = list(range(1, len(scores) + 1))
+        classifier.example_counts = np.array(example_counts)
+        with mock.patch.object(classifier, 'scores', return_value=np.array(scores)):
+            return classifier.classify("Some transcript.")
+
+    def test_scores_split_into_confident_uncertain_and_rejected(self):
+        self.assertEqual(self.classify([0.5, 0.2, 0.05], [10, 10, 10]), ([1], [2]))
+
+    def test_thresholds_are_inclusive(self):
+        self.assertEqual(self.classify([0.3, 0.1], [10, 10]), ([1], [2]))
+
+    def test_tags_with_few_examples_are_only_uncertain(self):
+        self.assertEqual(self.classify([0.9, 0.9], [4, 5]), ([2], [1]))
+
+    def test_no_confident_tag(self):
+        self.assertEqual(self.classify([0.05, 0.2], [10, 10]), ([], [2]))
+
+
+class TermVectorTests(SimpleTestCase):
+    def test_vector_is_normalized(self):
+        self.assertAlmostEqual(float(np.linalg.norm(tag_classifier.term_vector("Interest rates and housing"))), 1.0, places=5)
+
+    def test_empty_text_has_zero_vector(self):
+        self.assertFalse(tag_classifier.term_vector("").any())
+
+
+@override_settings(LLM_CACHE_BACKEND='none', GROQ_API_KEY='test-key', TAG_CLASSIFIER_ENABLED=False)
+class PrefilterTests(TestCase):
+    def setUp(self):
+        self.confident = Tag.objects.create(name="Economics")
+        self.uncertain = Tag.objects.create(name="Housing")
+        self.rejected = Tag.objects.create(name="Gardening")
+        # The tag signals only invalidate the catalog on commit, which a test transaction never reaches
+        tag_catalog.invalidate()
+        self.podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3', transcript="Interest rates and housing.")
+        # Scores are fixed here; updates of the stored model are disabled
+        classify = mock.patch.object(tag_classifier, 'classify', return_value=([self.confident.id], [self.uncertain.id]))
+        classify.start()
+        self.addCleanup(classify.stop)
+
+    def test_combined_enrichment_asks_only_about_uncertain_tags(self):
+        response = json.dumps({"tag_ids": [self.uncertain.id], "summary": "An episode about housing.", "guest_names": [], "topics": ["housing"]})
+        with mock.patch.object(Podcast, '_call_groq_chat', return_value=response) as chat:
+            enrichment = self.podcast.enrich_with_llm()
+
+        prompt = chat.call_args.args[0]
+        self.assertIn("Housing", prompt)
+        self.assertNotIn("Economics", prompt)
+        self.assertNotIn("Gardening", prompt)
+        self.assertEqual(enrichment['tag_ids'], [self.confident.id, self.uncertain.id])
+        self.assertEqual(set(self.podcast.tags.values_list('id', flat=True)), {self.confident.id, self.uncertain.id})
+
+    def test_tags_stage_asks_only_about_uncertain_tags(self):
+        with mock.patch.object(Podcast, '_call_groq_chat', return_value="[]") as chat:
+            self.assertEqual(self.podcast.classify_and_apply_tags(), [self.confident.id])
+
+        prompt = chat.call_args.args[0]
+        self.assertIn("Housing", prompt)
+        self.assertNotIn("Gardening", prompt)
+
+
+@override_settings(LLM_CACHE_BACKEND='none', GROQ_API_KEY='test-key', TAG_CLASSIFIER_ENABLED=False)
+class AsyncPrefilterTests(TransactionTestCase):
+    # The async path runs its database work on other threads, outside a test transaction
+    setUp = PrefilterTests.setUp
+
+    def test_async_tags_use_the_classifier(self):
+        import asyncio
+        from audio_processing import async_enrichment
+
+        groq = mock.Mock()
+        groq.chat = mock.AsyncMock(return_value=json.dumps([self.uncertain.id]))
+        tag_ids = asyncio.run(async_enrichment.suggest_and_apply_tags(self.podcast, groq))
+
+        self.assertEqual(tag_ids, [self.confident.id, self.uncertain.id])
+        self.assertNotIn("Gardening", groq.chat.call_args.args[0])
@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from audio_processing import locking, transcription_scheduler
+from audio_processing.models import Podcast, PodcastLease, PodcastStage
+
+
+class BacklogTests(TestCase):
+    def setUp(self):
+        self.podcast = Podcast.objects.create(raw_audio_url='http://example.com/episode.mp3')
+
+    def test_waiting_podcast_is_in_backlog(self):
+        self.assertIn(self.podcast, transcription_scheduler.backlog())
+
+    def test_transcribed_podcast_is_not_in_backlog(self):
+        Podcast.objects.filter(pk=self.podcast.pk).update(transcript="Hello there.")
+        self.assertNotIn(self.podcast, transcription_scheduler.backlog())
+
+    def test_running_transcription_is_not_in_backlog(self):
+        locking.acquire(self.podcast.pk, 'transcript')
+        self.assertNotIn(self.podcast, transcription_scheduler.backlog())
+
+    def test_expired_transcript_lease_with_another_live_lease(self):
+        locking.acquire(self.podcast.pk, 'transcript')
+        PodcastLease.objects.filter(name='transcript').update(expires_at=timezone.now() - timedelta(seconds=1))
+        locking.acquire(self.podcast.pk, 'workflow')
+        self.assertIn(self.podcast, transcription_scheduler.backlog())
+
+    @override_settings(TRANSCRIPTION_MAX_ATTEMPTS=3)
+    def test_exhausted_attempts_leave_the_backlog(self):
+        PodcastStage.objects.create(podcast=self.podcast, stage='transcript', status='failed', attempts=3)
+        self.assertNotIn(self.podcast, transcription_scheduler.backlog())
+
+    @override_settings(TRANSCRIPTION_MAX_ATTEMPTS=3)
+    def test_attempts_on_other_stages_do_not_count(self):
+        PodcastStage.objects.create(podcast=self.podcast, stage='transcript', status='failed', attempts=1)
+        PodcastStage.objects.create(podcast=self.podcast, stage='summary', status='failed', attempts=5)
+        self.assertIn(self.podcast, transcription_scheduler.backlog())
+
+
+@override_settings(TRANSCRIPTION_AGING_WEIGHT=1.0)
+class OrderTests(TestCase):
+    def podcast(self, name, duration_seconds, waited_seconds, **kwargs):
+        podcast = Podcast.objects.create(raw_audio_url=f'http://example.com/{name}.mp3', duration_seconds=duration_seconds, **kwargs)
+        podcast.created_at = self.now - timedelta(seconds=waited_seconds)
+        return podcast
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_shortest_goes_first_among_equal_waits(self):
+        long_episode = self.podcast('long', 3 * 3600, 600, priority='normal')
+        short_episode = self.podcast('short', 1200, 600, priority='normal')
+        self.assertEqual(transcription_scheduler.order([long_episode, short_episode], self.now), [short_episode, long_episode])
+
+    def test_long_wait_overtakes_short_episode(self):
+        old_long = self.podcast('old-long', 3 * 3600, 10 * 3 * 3600, priority='normal')
+        new_short = self.podcast('new-short', 1200, 600, priority='normal')
+        self.assertEqual(transcription_scheduler.order([new_short, old_long], self.now), [old_long, new_short])
+
+    def test_high_priority_goes_first(self):
+        short_episode = self.podcast('short', 600, 3600, priority='normal')
+        urgent = self.podcast('urgent', 3 * 3600, 0, priority='high')
+        self.assertEqual(transcription_scheduler.order([short_episode, urgent], self.now)[0], urgent)
+
+    def test_size_falls_back_to_audio_bytes(self):
+        podcast = Podcast(audio_bytes=16000 * 600)
+        with self.settings(TRANSCRIPTION_AUDIO_BYTES_PER_SECOND=16000):
+            self.assertEqual(transcription_scheduler.estimate_seconds(podcast), 600)
@@ -0,0 +1,186 @@
+"""
+Transcription with failover between providers and optional hedging.
+
+transcribe() tries the configured TRANSCRIPTION_PROVIDERS in order, starting
+with the requested one, and moves on to the next when a provider fails or its
+circuit is open (see circuit_breaker). Every attempt is recorded with the
+breaker, so an outage at one provider is noticed after a few failures and
+later episodes go straight to the next provider until it recovers.
+
+With TRANSCRIPTION_HEDGE_SECONDS set, a provider that hasn't answered within
+that many seconds doesn't hold the episode up either: the next provider is
+started alongside it and the first transcript returned wins. The loser is
+cancelled where the provider allows it: a running AWS Transcribe job is
+deleted, while a Groq request can't be interrupted and its result is simply
+discarded when it arrives. Hedging trades extra provider usage on slow
+episodes for a shorter tail, so leave it off when quota is tight.
+
+Failover attempts run under the lease of the requested provider, so they
+aren't counted against the other provider's in-flight limit (see admission).
+
+A provider whose request is held back by our own rate limiter (see
+llm_scheduler) hasn't failed, so nothing is recorded with its breaker. The
+next provider is tried, and if none produced a transcript the
+RateLimitWaitExceeded is raised so the stage is re-queued instead of failed.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.conf import settings
+from django.db import connections
+
+from . import circuit_breaker
+from .llm_scheduler import RateLimitWaitExceeded
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ['groq', 'aws']
+
+
+def is_configured(provider):
+    """Whether the credentials provider needs are set."""
+    if provider == 'groq':
+        return bool(getattr(settings, 'GROQ_API_KEY', None))
+    if provider == 'aws':
+        return all([
+            getattr(settings, 'AWS_ACCESS_KEY_ID', None),
+            getattr(settings, 'AWS_SECRET_ACCESS_KEY', None)
+        ])
+    return False
+
+
+def provider_order(preferred=None):
+    """Providers to try, in order, for a transcription requested from preferred (None for any)."""
+    failover = getattr(settings, 'TRANSCRIPTION_FAILOVER', True)
+    if preferred and not failover:
+        return [preferred]
+
+    providers = [provider for provider in getattr(settings, 'TRANSCRIPTION_PROVIDERS', PROVIDERS) if provider in PROVIDERS]
+    if preferred:
+        providers = [preferred] + [provider for provider in providers if provider != preferred]
+    providers = [provider for provider in providers if is_configured(provider)]
+    return providers if failover else providers[:1]
+
+
+def _attempt(podcast, provider, cancel_event=None):
+    """
+    Transcribe with one provider and record the outcome with its circuit breaker.
+    RateLimitWaitExceeded propagates without being recorded.
+    """
+    error = ''
+    try:
+        if provider == 'aws':
+            transcript = podcast.fetch_transcript_from_aws(cancel_event=cancel_event)
+        else:
+            transcript = podcast.fetch_transcript_from_groq()
+    except RateLimitWaitExceeded:
+        logger.info(f"{provider} transcription of {podcast.raw_audio_url} held back by the rate limiter")
+        raise
+    except Exception as e:
+        transcript = None
+        error = str(e)
+
+    if transcript:
+        circuit_breaker.record_success(provider)
+    elif cancel_event is not None and cancel_event.is_set():
+        # Lost the race to another provider; not the provider's fault
+        return None
+    else:
+        circuit_breaker.record_failure(provider, error or f"No transcript returned for {podcast.raw_audio_url}")
+    return transcript
+
+
+def _attempt_in_thread(podcast, provider, cancel_event):
+    try:
+        return _attempt(podcast, provider, cancel_event)
+    finally:
+        connections.close_all()
+
+
+def _sequential(podcast, providers):
+    throttled = None
+    for provider in providers:
+        if not circuit_breaker.allow(provider):
+            logger.info(f"Skipping {provider} transcription, its circuit is open")
+            continue
+        try:
+            transcript = _attempt(podcast, provider)
+        except RateLimitWaitExceeded as e:
+            throttled = e
+            continue
+        if transcript:
+            return transcript, provider
+        logger.warning(f"{provider} transcription failed for: {podcast.raw_audio_url}")
+    if throttled is not None:
+        raise throttled
+    return None, None
+
+
+def _hedged(podcast, providers, hedge_seconds):
+    cancel_event = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=len(providers))
+    remaining = iter(providers)
+    running = {}
+    throttled = None
+
+    def start_next():
+        for provider in remaining:
+            if circuit_breaker.allow(provider):
+                running[pool.submit(_attempt_in_thread, podcast, provider, cancel_event)] = provider
+                return provider
+            logger.info(f"Skipping {provider} transcription, its circuit is open")
+        return None
+
+    try:
+        start_next()
+        while running:
+            done, _ = wait(list(running), timeout=hedge_seconds, return_when=FIRST_COMPLETED)
+            for future in done:
+                provider = running.pop(future)
+                try:
+                    transcript = future.result()
+                except RateLimitWaitExceeded as e:
+                    throttled = e
+                    continue
+                if transcript:
+                    return transcript, provider
+                logger.warning(f"{provider} transcription failed for: {podcast.raw_audio_url}")
+            if done:
+                start_next()
+            else:
+                provider = start_next()
+                if provider:
+                    logger.info(f"Transcription of {podcast.raw_audio_url} is slow, hedging with {provider}")
+        if throttled is not None:
+            raise throttled
+        return None, None
+    finally:
+        # Stop whichever providers are still working
+        cancel_event.set()
+        pool.shutdown(wait=False)
+
+
+def transcribe(podcast, preferred=None):
+    """
+    Transcribe podcast's audio, failing over between providers. Nothing is saved.
+    Returns the transcript text or None if every provider failed. Raises
+    RateLimitWaitExceeded if no provider returned a transcript and at least one
+    was held back by the rate limiter.
+    """
+    providers = provider_order(preferred)
+    if not providers:
+        logger.error("No transcription service configured (GROQ_API_KEY or AWS credentials)")
+        return None
+
+    hedge_seconds = getattr(settings, 'TRANSCRIPTION_HEDGE_SECONDS', 0)
+    if hedge_seconds and len(providers) > 1:
+        transcript, provider = _hedged(podcast, providers, hedge_seconds)
+    else:
+        transcript, provider = _sequential(podcast, providers)
+
+    if transcript:
+        logger.info(f"Transcribed {podcast.raw_audio_url} with {provider}")
+    else:
+        logger.error(f"No transcription provider succeeded for: {podcast.raw_audio_url} (tried {', '.join(providers)})")
+    return transcript
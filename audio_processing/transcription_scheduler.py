@@ -0,0 +1,132 @@
+"""
+Size-aware scheduling of the transcription backlog.
+
+Transcribing in arrival order lets a batch of three-hour episodes hold up
+dozens of twenty-minute ones queued behind them. dispatch() instead picks the
+next episodes by highest response ratio:
+
+    ratio = 1 + TRANSCRIPTION_AGING_WEIGHT * waited_seconds / estimated_seconds
+
+Among episodes that have waited equally long, the shortest goes first, which
+minimizes mean time-to-transcript. An episode's ratio keeps growing while it
+waits, so long episodes are never starved. High-priority episodes (see
+model_routing.get_priority) go before everything else.
+
+An episode's size comes from the itunes:duration captured at ingest, or else
+from the enclosure length in bytes at TRANSCRIPTION_AUDIO_BYTES_PER_SECOND.
+Episodes with neither get a HEAD request for their Content-Length, at most
+TRANSCRIPTION_PROBE_LIMIT per dispatch, and TRANSCRIPTION_DEFAULT_DURATION_SECONDS
+when that fails too.
+
+Each provider has at most its PROVIDER_IN_FLIGHT_LIMITS entry of transcriptions
+queued or running at once (counted from the transcript leases, see admission),
+so dispatch() only fills the free slots; run it periodically from celery beat.
+"""
+import logging
+
+import requests
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from . import admission, locking
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT_SECONDS = 5
+
+
+def estimate_seconds(podcast):
+    """Estimated audio length of a podcast in seconds."""
+    if podcast.duration_seconds:
+        return podcast.duration_seconds
+    if podcast.audio_bytes:
+        return max(1, podcast.audio_bytes // getattr(settings, 'TRANSCRIPTION_AUDIO_BYTES_PER_SECOND', 16000))
+    return getattr(settings, 'TRANSCRIPTION_DEFAULT_DURATION_SECONDS', 3600)
+
+
+def probe_audio_bytes(podcast):
+    """Fetch the audio size with a HEAD request and store it. Returns the size or None."""
+    try:
+        response = requests.head(podcast.raw_audio_url, allow_redirects=True, timeout=PROBE_TIMEOUT_SECONDS)
+        audio_bytes = int(response.headers.get('Content-Length', 0))
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.warning(f"Failed to probe audio size for {podcast.raw_audio_url}: {str(e)}")
+        return None
+    if audio_bytes <= 0:
+        return None
+
+    type(podcast).objects.filter(pk=podcast.pk).update(audio_bytes=audio_bytes)
+    podcast.audio_bytes = audio_bytes
+    return audio_bytes
+
+
+def response_ratio(podcast, now=None):
+    """How overdue a podcast's transcription is relative to its size; higher goes first."""
+    now = now or timezone.now()
+    waited = max(0.0, (now - podcast.created_at).total_seconds())
+    return 1 + getattr(settings, 'TRANSCRIPTION_AGING_WEIGHT', 1.0) * waited / estimate_seconds(podcast)
+
+
+def backlog():
+    """Podcasts waiting for a transcript that haven't used up their attempts."""
+    from .models import Podcast, PodcastLease, PodcastStage
+
+    max_attempts = getattr(settings, 'TRANSCRIPTION_MAX_ATTEMPTS', 3)
+    # Subqueries, so each pair of conditions applies to the same row
+    exhausted = PodcastStage.objects.filter(podcast=OuterRef('pk'), stage='transcript', attempts__gte=max_attempts)
+    running = PodcastLease.objects.filter(podcast=OuterRef('pk'), name='transcript', expires_at__gt=timezone.now())
+    return Podcast.objects.filter(Q(transcript__isnull=True) | Q(transcript='')).exclude(
+        Exists(exhausted)
+    ).exclude(
+        # Running already
+        Exists(running)
+    ).only('id', 'raw_audio_url', 'created_at', 'release_date', 'priority', 'audio_bytes', 'duration_seconds')
+
+
+def order(podcasts, now=None):
+    """Podcasts in dispatch order: high priority first, then by response ratio."""
+    from .model_routing import get_priority, HIGH
+
+    now = now or timezone.now()
+    return sorted(podcasts, key=lambda podcast: (get_priority(podcast) != HIGH, -response_ratio(podcast, now)))
+
+
+def free_slots(provider):
+    """Transcriptions that can still be sent to provider."""
+    provider_limit = admission.limit(provider)
+    if provider_limit is None:
+        provider_limit = 1
+    return max(0, provider_limit - locking.in_flight(provider))
+
+
+def dispatch(provider='groq'):
+    """
+    Enqueue the next transcriptions for provider, up to its free slots.
+    Returns the IDs of the podcasts enqueued.
+    """
+    from .tasks.podcast_tasks import add_transcript
+
+    slots = free_slots(provider)
+    if not slots:
+        logger.info(f"No free {provider} transcription slots")
+        return []
+
+    podcasts = list(backlog())
+    probes = getattr(settings, 'TRANSCRIPTION_PROBE_LIMIT', 20)
+    for podcast in podcasts:
+        if probes <= 0:
+            break
+        if not podcast.duration_seconds and not podcast.audio_bytes:
+            probe_audio_bytes(podcast)
+            probes -= 1
+
+    dispatched = []
+    for podcast in order(podcasts):
+        if len(dispatched) >= slots:
+            break
+        if locking.enqueue(add_transcript, podcast, 'transcript', provider=provider, method=provider):
+            dispatched.append(podcast.id)
+
+    logger.info(f"Dispatched {len(dispatched)} of {len(podcasts)} waiting transcriptions to {provider}")
+    return dispatched
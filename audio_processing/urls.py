@@ -17,11 +17,26 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import get_object_or_404
 
 def health_check(request):
     return JsonResponse({'status': 'healthy'})
 
+@staff_member_required
+def admission_gauge(request):
+    from audio_processing.admission import gauge
+    return JsonResponse(gauge())
+
+@staff_member_required
+def background_job_progress(request, job_id):
+    from audio_processing.background_jobs import progress
+    from audio_processing.models import BackgroundJob
+    return JsonResponse(progress(get_object_or_404(BackgroundJob, pk=job_id)))
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('health/', health_check, name='health'),
+    path('admission/', admission_gauge, name='admission'),
+    path('jobs/<int:job_id>/', background_job_progress, name='background_job_progress'),
 ]
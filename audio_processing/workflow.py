@@ -0,0 +1,279 @@
+"""
+Episode processing as a workflow graph of Celery tasks.
+
+                  ┌── tags ─────┐
+    transcript ───┼── script ───┼── results
+                  └── summary ──┘
+
+In 'combined' enrichment mode the fan-out is enrichment and script instead.
+The LLM stages don't depend on each other, so after the transcript they run
+as separate tasks in parallel and the episode is done as soon as the slowest
+stage is. Each stage records its result on the WorkflowRun row under a row
+lock, and the stage that finishes last enqueues the results task. The join
+lives in the database rather than in a Celery chord, so no result backend is
+needed.
+
+Stages that are up to date for the podcast's current inputs are skipped (see
+stage_state), and no run is started at all when every stage is.
+
+Every stage has its own retry policy and time limits (WORKFLOW_STAGE_POLICIES).
+A stage that still fails after its retries is recorded with its error, so the
+other stages and the join are unaffected; a failed transcript ends the run.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT = 'transcript'
+STAGES = {
+    'separate': ['tags', 'script', 'summary'],
+    'combined': ['enrichment', 'script'],
+}
+
+DEFAULT_POLICIES = {
+    'transcript': {'max_retries': 3, 'retry_backoff': 60, 'soft_time_limit': 1800},
+    'tags': {'max_retries': 3, 'retry_backoff': 10, 'soft_time_limit': 120},
+    'script': {'max_retries': 2, 'retry_backoff': 30, 'soft_time_limit': 1200},
+    'summary': {'max_retries': 2, 'retry_backoff': 30, 'soft_time_limit': 600},
+    'enrichment': {'max_retries': 2, 'retry_backoff': 30, 'soft_time_limit': 900},
+}
+# Seconds between the soft time limit and the hard kill
+HARD_LIMIT_GRACE = 60
+MAX_RETRY_COUNTDOWN = 3600
+
+
+def get_policy(stage):
+    """Retry and time limit policy for a stage, with WORKFLOW_STAGE_POLICIES overriding the defaults."""
+    overrides = getattr(settings, 'WORKFLOW_STAGE_POLICIES', {}) or {}
+    return {**DEFAULT_POLICIES[stage], **overrides.get(stage, {})}
+
+
+def task_options(stage):
+    """Celery task options implementing a stage's policy."""
+    policy = get_policy(stage)
+    return {
+        'max_retries': policy['max_retries'],
+        'soft_time_limit': policy['soft_time_limit'],
+        'time_limit': policy['soft_time_limit'] + HARD_LIMIT_GRACE,
+    }
+
+
+def retry_countdown(stage, retries):
+    """Exponential backoff before retry number retries + 1 of a stage."""
+    return min(MAX_RETRY_COUNTDOWN, get_policy(stage)['retry_backoff'] * 2 ** retries)
+
+
+def _run(podcast, stage, provider):
+    if stage == TRANSCRIPT:
+        if podcast.generate_transcript(method=provider):
+            return {'transcript_generated': True, 'errors': []}
+        return {'errors': ["Failed to generate transcript"]}
+
+    if stage == 'tags':
+        applied_tags = podcast.classify_and_apply_tags()
+        # An empty list means no tag applies, which is a successful run
+        if applied_tags is not None:
+            return {'tags_applied': len(applied_tags), 'errors': []}
+        return {'errors': ["Failed to apply tags"]}
+
+    if stage == 'script':
+        if podcast.generate_speaker_script():
+            return {'script_generated': True, 'errors': []}
+        return {'errors': ["Failed to generate speaker script"]}
+
+    if stage == 'summary':
+        if podcast.generate_summary():
+            return {'summary_generated': True, 'errors': []}
+        return {'errors': ["Failed to generate episode summary"]}
+
+    if stage == 'enrichment':
+        enriched = podcast.enrich_with_llm()
+        if enriched:
+            return {'tags_applied': len(enriched['tag_ids']), 'summary_generated': True, 'errors': []}
+        return {'errors': ["Failed to run combined enrichment"]}
+
+    raise ValueError(f"Unknown workflow stage: {stage}")
+
+
+def run_stage(podcast, stage, provider=None, refresh=False):
+    """
+    Run one stage for a podcast unless it is up to date (see stage_state) or
+    already running elsewhere (see locking). provider picks the transcription
+    method for the transcript stage, and refresh makes its LLM requests skip
+    cached responses (see llm_cache).
+    Returns a partial results dict in the shape of Podcast.process_complete_workflow;
+    a non-empty 'errors' list means the stage failed, and 'throttled' that it
+    wasn't admitted because its provider is at its in-flight limit (see admission)
+    or our rate limiter held its request back (see llm_scheduler).
+    """
+    from . import admission, locking, stage_state
+    from .llm_scheduler import RateLimitWaitExceeded
+
+    # The lease outlives the stage task's hard time limit, so a killed worker's lease expires soon after
+    policy = get_policy(stage)
+    if stage == TRANSCRIPT:
+        provider = provider or 'groq'
+    lease_provider = provider if stage == TRANSCRIPT else admission.LLM_PROVIDER
+    with locking.lease(podcast.pk, stage, policy['soft_time_limit'] + HARD_LIMIT_GRACE, lease_provider) as acquired:
+        if not acquired:
+            return {'errors': [f"{stage} stage is already running"]}
+
+        input_fingerprint = stage_state.fingerprint(podcast, stage)
+        if stage_state.is_current(podcast, stage, input_fingerprint):
+            logger.info(f"Skipping up-to-date {stage} stage for: {podcast.raw_audio_url}")
+            return {'skipped': True, 'errors': []}
+
+        if not admission.admit(lease_provider, podcast.pk, stage):
+            return {'throttled': True, 'errors': [f"{lease_provider} is at its in-flight limit"]}
+
+        stage_state.begin(podcast, stage, input_fingerprint)
+        podcast.refresh_llm_cache = refresh
+        try:
+            result = _run(podcast, stage, provider)
+        except RateLimitWaitExceeded as e:
+            # Our own quota held the request back; re-queue it like an unadmitted stage
+            stage_state.finish(podcast, stage, [str(e)])
+            return {'throttled': True, 'errors': [str(e)]}
+        except Exception as e:
+            stage_state.finish(podcast, stage, [str(e)])
+            raise
+        finally:
+            podcast.refresh_llm_cache = False
+        stage_state.finish(podcast, stage, result['errors'])
+        return result
+
+
+def merge_results(stage_results, stages):
+    """Merge per-stage results into the Podcast.process_complete_workflow results shape."""
+    results = {
+        'transcript_generated': False,
+        'tags_applied': 0,
+        'script_generated': False,
+        'summary_generated': False,
+        'skipped_stages': [],
+        'errors': []
+    }
+    for stage in stages:
+        stage_result = dict(stage_results.get(stage) or {})
+        results['errors'].extend(stage_result.pop('errors', []))
+        if stage_result.pop('skipped', False):
+            results['skipped_stages'].append(stage)
+        stage_result.pop('throttled', None)
+        results.update(stage_result)
+    return results
+
+
+def join_results(run):
+    """Merge the stage results of a workflow run."""
+    return merge_results(run.stage_results, [TRANSCRIPT] + run.stages)
+
+
+def run_sequentially(podcast, enrichment):
+    """Run every stage for a podcast in this process, in order. Returns the merged results."""
+    stages = [TRANSCRIPT] + STAGES[enrichment]
+    stage_results = {}
+    for stage in stages:
+        stage_results[stage] = run_stage(podcast, stage)
+        if stage == TRANSCRIPT and stage_results[stage]['errors']:
+            break
+    return merge_results(stage_results, stages)
+
+
+def start(podcast, enrichment=None):
+    """
+    Create a workflow run for a podcast and enqueue its transcript task. Returns the
+    WorkflowRun, or None if every stage is already up to date or another run for
+    the podcast is still in progress.
+    """
+    from . import stage_state
+    from .celery import podcast_options
+    from .models import WorkflowRun
+    from .tasks.podcast_tasks import workflow_transcript
+
+    if enrichment is None:
+        enrichment = getattr(settings, 'ENRICHMENT_MODE', 'combined')
+    if enrichment not in STAGES:
+        raise ValueError(f"Unknown enrichment mode: {enrichment}")
+
+    if not stage_state.pending_stages(podcast, [TRANSCRIPT] + STAGES[enrichment]):
+        logger.info(f"Workflow is up to date, nothing to run for: {podcast.raw_audio_url}")
+        return None
+    # Runs older than a lease are assumed dead; their stages are still guarded by the stage leases
+    recent = timezone.now() - timedelta(seconds=getattr(settings, 'PODCAST_LEASE_SECONDS', 3600))
+    if WorkflowRun.objects.filter(podcast=podcast, status='running', started_at__gte=recent).exists():
+        logger.info(f"A workflow is already running for: {podcast.raw_audio_url}")
+        return None
+
+    run = WorkflowRun.objects.create(podcast=podcast, enrichment=enrichment, stages=STAGES[enrichment])
+    options = podcast_options(podcast)
+    transaction.on_commit(lambda: workflow_transcript.apply_async((run.id,), **options))
+    logger.info(f"Started workflow {run.id} for: {podcast.raw_audio_url}")
+    return run
+
+
+def _fan_out(run_id, stages, options):
+    from celery import group
+    from .tasks.podcast_tasks import WORKFLOW_STAGE_TASKS
+
+    group(WORKFLOW_STAGE_TASKS[stage].si(run_id).set(**options) for stage in stages).apply_async()
+
+
+def _finish(run, status):
+    from .tasks.podcast_tasks import workflow_results
+
+    run.status = status
+    run.save(update_fields=['stage_results', 'status', 'transcribed_at'])
+    transaction.on_commit(lambda: workflow_results.delay(run.id))
+
+
+def record_stage_result(run_id, stage, result):
+    """
+    Store a stage's result on its run. A successful transcript fans out to the
+    parallel stages; the last parallel stage to finish, or a failed transcript,
+    enqueues the results task.
+    """
+    from .celery import podcast_options
+    from .models import WorkflowRun
+
+    with transaction.atomic():
+        run = WorkflowRun.objects.select_for_update().get(pk=run_id)
+        if stage in run.stage_results:
+            # A redelivered task; the stage was already counted
+            return
+        run.stage_results[stage] = result
+
+        if stage == TRANSCRIPT:
+            if result['errors']:
+                _finish(run, 'failed')
+            else:
+                run.transcribed_at = timezone.now()
+                run.save(update_fields=['stage_results', 'transcribed_at'])
+                stages = list(run.stages)
+                options = podcast_options(run.podcast)
+                transaction.on_commit(lambda: _fan_out(run_id, stages, options))
+        elif not run.pending_stages:
+            _finish(run, 'completed')
+        else:
+            run.save(update_fields=['stage_results'])
+
+
+def complete(run_id):
+    """Join a finished run's stage results and store them. Returns the results dict."""
+    from .models import WorkflowRun
+
+    run = WorkflowRun.objects.get(pk=run_id)
+    run.results = join_results(run)
+    run.finished_at = timezone.now()
+    run.save(update_fields=['results', 'finished_at'])
+
+    if run.transcribed_at:
+        logger.info(
+            f"Workflow {run.id} {run.status} {(run.finished_at - run.transcribed_at).total_seconds():.1f}s "
+            f"after transcription: {run.results}"
+        )
+    return run.results